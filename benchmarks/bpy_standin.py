@@ -0,0 +1,765 @@
+"""
+Lightweight stand-in for the parts of bpy, bpy_extras and mathutils the addon uses.
+
+It is only meant for running the addon's hot paths outside of Blender. Collections
+look up names with a linear scan like most RNA collections do, keyframes are stored
+in flat lists, and nothing is evaluated.
+"""
+
+import re
+import sys
+import math
+import types
+import itertools
+
+_pointers = itertools.count(1)
+
+
+### mathutils
+
+class Vector(list):
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        list.__init__(self, [float(value) for value in values])
+
+    x = property(lambda self: self[0], lambda self, value: self.__setitem__(0, value))
+    y = property(lambda self: self[1], lambda self, value: self.__setitem__(1, value))
+    z = property(lambda self: self[2], lambda self, value: self.__setitem__(2, value))
+
+
+class Euler(Vector):
+    def __init__(self, values=(0.0, 0.0, 0.0), order="XYZ"):
+        Vector.__init__(self, values)
+        self.order = order
+
+
+class Quaternion(list):
+    def __init__(self, values=(1.0, 0.0, 0.0, 0.0)):
+        list.__init__(self, [float(value) for value in values])
+
+    def to_euler(self, order="XYZ"):
+        w, x, y, z = self
+        return Euler((math.atan2(2.0*(y*z + w*x), 1.0 - 2.0*(x*x + y*y)),
+                      math.asin(max(-1.0, min(1.0, 2.0*(w*y - x*z)))),
+                      math.atan2(2.0*(x*y + w*z), 1.0 - 2.0*(y*y + z*z))), order)
+
+
+### RNA structs and collections
+
+_PATH_TOKEN = re.compile(r'\.?([A-Za-z_]\w*)|\[("(?:[^"\\]|\\.)*"|\d+)\]')
+
+
+class Struct(object):
+    """Base of all stand-in structs. id_data is the owning ID, path the data path from it."""
+    def __init__(self, id_data=None, path=""):
+        self._pointer = next(_pointers)
+        self._id_data = id_data
+        self._path = path
+        self._id_properties = {}
+
+    @property
+    def id_data(self):
+        return self._id_data if self._id_data != None else self
+
+    def as_pointer(self):
+        return self._pointer
+
+    def path_from_id(self, path=""):
+        if self._path == "":
+            return path
+        if path == "":
+            return self._path
+        return self._path + ("" if path.startswith("[") else ".") + path
+
+    def keys(self):
+        return list(self._id_properties.keys())
+
+    def __getitem__(self, key):
+        return self._id_properties[key]
+
+    def __setitem__(self, key, value):
+        self._id_properties[key] = value
+
+    def __contains__(self, key):
+        return key in self._id_properties
+
+    def get(self, key, default=None):
+        return self._id_properties.get(key, default)
+
+    def driver_add(self, path, index=-1):
+        owner = self.id_data
+        if owner.animation_data == None:
+            owner.animation_data = AnimData(owner)
+        full_path = self.path_from_id(path)
+        value = getattr(self, path, None) if "[" not in path and "." not in path else None
+        if index == -1 and isinstance(value, (list, tuple)):
+            return [owner.animation_data.drivers.find_or_new(full_path, i) for i in range(len(value))]
+        return owner.animation_data.drivers.find_or_new(full_path, max(index, 0))
+
+    def path_resolve(self, path):
+        value = self
+        for attribute, key in _PATH_TOKEN.findall(path):
+            try:
+                if attribute != "":
+                    value = getattr(value, attribute)
+                elif key.startswith('"'):
+                    value = value[key[1:-1].replace('\\"', '"')]
+                else:
+                    value = value[int(key)]
+            except (AttributeError, KeyError, IndexError, TypeError):
+                raise ValueError("Struct.path_resolve(\"{}\") could not be resolved".format(path))
+        return value
+
+    def driver_remove(self, path, index=-1):
+        owner = self.id_data
+        if owner.animation_data == None:
+            return False
+        full_path = self.path_from_id(path)
+        drivers = owner.animation_data.drivers
+        removed = [curve for curve in drivers if curve.data_path == full_path and (index == -1 or curve.array_index == index)]
+        for curve in removed:
+            drivers.remove(curve)
+        return len(removed) > 0
+
+
+class Collection(object):
+    """RNA collection stand-in. Name lookups scan the items like RNA does for most collections."""
+    def __init__(self, items=(), factory=None):
+        self._items = list(items)
+        self._factory = factory
+        self.is_updated = False
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def _find(self, name):
+        for item in self._items:
+            if item.name == name:
+                return item
+        return None
+
+    def __contains__(self, name):
+        if not isinstance(name, str):
+            raise TypeError("bpy_prop_collection.__contains__: expected a string")
+        return self._find(name) != None
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return self._items[key]
+        item = self._find(key)
+        if item == None:
+            raise KeyError("bpy_prop_collection[key]: key \"{}\" not found".format(key))
+        return item
+
+    def get(self, name, default=None):
+        item = self._find(name)
+        return item if item != None else default
+
+    def keys(self):
+        return [item.name for item in self._items]
+
+    def values(self):
+        return list(self._items)
+
+    def items(self):
+        return [(item.name, item) for item in self._items]
+
+    def find(self, name):
+        for i, item in enumerate(self._items):
+            if item.name == name:
+                return i
+        return -1
+
+    def new(self, *args, **kwargs):
+        item = self._factory(*args, **kwargs)
+        self._items.append(item)
+        return item
+
+    def link(self, item):
+        self._items.append(item)
+
+    def remove(self, item, **kwargs):
+        self._items.remove(item)
+
+    def foreach_get(self, attribute, sequence):
+        values = []
+        for item in self._items:
+            value = getattr(item, attribute)
+            values.extend(value if isinstance(value, (list, tuple)) else [value])
+        sequence[:len(values)] = values
+
+    def foreach_set(self, attribute, sequence):
+        size = len(sequence) // max(1, len(self._items))
+        for i, item in enumerate(self._items):
+            if size == 1:
+                setattr(item, attribute, sequence[i])
+            else:
+                setattr(item, attribute, list(sequence[i*size:(i+1)*size]))
+
+
+class PropCollection(Collection):
+    """Collection of a CollectionProperty, items are added with add() and removed by index."""
+    def add(self):
+        item = self._factory()
+        if not hasattr(item, "name"):
+            item.name = ""
+        self._items.append(item)
+        return item
+
+    def remove(self, index):
+        del self._items[index]
+
+    def clear(self):
+        del self._items[:]
+
+
+class ID(Struct):
+    def __init__(self, name):
+        Struct.__init__(self)
+        self.name = name
+        self.animation_data = None
+        self.is_updated = False
+        self.is_updated_data = False
+
+    def update_tag(self, refresh=set()):
+        self.is_updated = True
+
+    def animation_data_create(self):
+        if self.animation_data == None:
+            self.animation_data = AnimData(self)
+        return self.animation_data
+
+
+### animation
+
+INTERPOLATIONS = ("CONSTANT", "LINEAR", "BEZIER")
+
+
+class Keyframe(object):
+    """View on one keyframe of KeyframePoints."""
+    def __init__(self, points, index):
+        self._points = points
+        self._index = index
+
+    def _get(self, attribute):
+        values = getattr(self._points, "_" + attribute)
+        return [values[self._index*2], values[self._index*2+1]]
+
+    def _set(self, attribute, value):
+        values = getattr(self._points, "_" + attribute)
+        values[self._index*2], values[self._index*2+1] = float(value[0]), float(value[1])
+
+    co = property(lambda self: self._get("co"), lambda self, value: self._set("co", value))
+    handle_left = property(lambda self: self._get("handle_left"), lambda self, value: self._set("handle_left", value))
+    handle_right = property(lambda self: self._get("handle_right"), lambda self, value: self._set("handle_right", value))
+
+    @property
+    def interpolation(self):
+        return INTERPOLATIONS[self._points._interpolation[self._index]]
+
+    @interpolation.setter
+    def interpolation(self, value):
+        self._points._interpolation[self._index] = INTERPOLATIONS.index(value)
+
+    def __eq__(self, other):
+        return isinstance(other, Keyframe) and other._points is self._points and other._index == self._index
+
+
+class KeyframePoints(object):
+    """Keyframes are stored in flat lists, like the raw arrays foreach_get/foreach_set work on."""
+    def __init__(self):
+        self._co = []
+        self._handle_left = []
+        self._handle_right = []
+        self._interpolation = []
+
+    def __len__(self):
+        return len(self._interpolation)
+
+    def __iter__(self):
+        return (Keyframe(self, i) for i in range(len(self)))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("keyframe index out of range")
+        return Keyframe(self, index)
+
+    def add(self, count=1):
+        self._co.extend([0.0] * (count*2))
+        self._handle_left.extend([0.0] * (count*2))
+        self._handle_right.extend([0.0] * (count*2))
+        self._interpolation.extend([2] * count)
+
+    def insert(self, frame, value, options=set()):
+        frames = self._co[0::2]
+        index = 0
+        while index < len(frames) and frames[index] < frame:
+            index += 1
+        if index < len(frames) and frames[index] == frame:
+            self._co[index*2+1] = float(value)
+            return Keyframe(self, index)
+        for values in (self._co, self._handle_left, self._handle_right):
+            values[index*2:index*2] = [float(frame), float(value)]
+        self._interpolation.insert(index, 2)
+        return Keyframe(self, index)
+
+    def remove(self, keyframe, fast=False):
+        index = keyframe._index
+        for values in (self._co, self._handle_left, self._handle_right):
+            del values[index*2:index*2+2]
+        del self._interpolation[index]
+
+    def foreach_get(self, attribute, sequence):
+        values = self._interpolation if attribute == "interpolation" else getattr(self, "_" + attribute)
+        sequence[:len(values)] = values
+
+    def foreach_set(self, attribute, sequence):
+        if attribute == "interpolation":
+            self._interpolation[:] = [int(value) for value in sequence]
+        else:
+            getattr(self, "_" + attribute)[:] = [float(value) for value in sequence]
+
+
+class DriverTarget(Struct):
+    def __init__(self):
+        Struct.__init__(self)
+        self.id = None
+        self.id_type = "OBJECT"
+        self.bone_target = ""
+        self.data_path = ""
+        self.transform_space = "WORLD_SPACE"
+        self.transform_type = "LOC_X"
+
+
+class DriverVariable(Struct):
+    def __init__(self):
+        Struct.__init__(self)
+        self.name = "var"
+        self.type = "SINGLE_PROP"
+        self.targets = [DriverTarget(), DriverTarget()]
+
+
+class Driver(Struct):
+    def __init__(self):
+        Struct.__init__(self)
+        self.type = "SCRIPTED"
+        self.expression = "var"
+        self.is_valid = True
+        self.use_self = False
+        self.variables = Collection(factory=DriverVariable)
+
+
+class FModifier(Struct):
+    def __init__(self, type="GENERATOR"):
+        Struct.__init__(self)
+        self.type = type
+        self.mute = False
+        self.mode = "POLYNOMIAL"
+        self.poly_order = 1
+        self.coefficients = [0.0, 1.0]
+        self.use_additive = False
+        self.use_restricted_range = False
+        self.use_influence = False
+
+
+class FCurve(Struct):
+    def __init__(self, data_path="", index=0, id_data=None, action_group=""):
+        Struct.__init__(self, id_data)
+        self.data_path = data_path
+        self.array_index = index
+        self.driver = Driver()
+        self.keyframe_points = KeyframePoints()
+        self.modifiers = Collection(factory=FModifier)
+        self.mute = False
+        self.is_valid = True
+        self.extrapolation = "CONSTANT"
+        self.group = None
+
+    def update(self):
+        pass
+
+    def evaluate(self, frame):
+        co = self.keyframe_points._co
+        if len(co) == 0:
+            return frame
+        frames, values = co[0::2], co[1::2]
+        if frame <= frames[0]:
+            return values[0]
+        for i in range(1, len(frames)):
+            if frame <= frames[i]:
+                factor = (frame - frames[i-1]) / ((frames[i] - frames[i-1]) or 1.0)
+                return values[i-1] + (values[i] - values[i-1]) * factor
+        return values[-1]
+
+
+class FCurves(Collection):
+    def __init__(self, owner=None):
+        Collection.__init__(self)
+        self._owner = owner
+
+    def new(self, data_path, index=0, action_group=""):
+        curve = FCurve(data_path, index, self._owner)
+        self._items.append(curve)
+        return curve
+
+    def find(self, data_path, index=0):
+        for curve in self._items:
+            if curve.data_path == data_path and curve.array_index == index:
+                return curve
+        return None
+
+    def find_or_new(self, data_path, index):
+        curve = self.find(data_path, index)
+        if curve == None:
+            curve = self.new(data_path, index)
+            curve.modifiers.new("GENERATOR")
+        return curve
+
+
+class AnimData(Struct):
+    def __init__(self, owner):
+        Struct.__init__(self, owner)
+        self.action = None
+        self.drivers = FCurves(owner)
+
+
+class Action(ID):
+    def __init__(self, name):
+        ID.__init__(self, name)
+        self.fcurves = FCurves(self)
+
+
+### scene data
+
+class Constraint(Struct):
+    def __init__(self, type, id_data=None, path=""):
+        Struct.__init__(self, id_data, path)
+        self.type = type
+        self.name = type.replace("_", " ").title()
+        self.mute = False
+        self.influence = 1.0
+        self.target = None
+        self.subtarget = ""
+        self.action = None
+        self.owner_space = "WORLD"
+        self.target_space = "WORLD"
+
+
+class ConstraintCollection(Collection):
+    def __init__(self, owner, path=""):
+        Collection.__init__(self)
+        self._owner = owner
+        self._path = path
+
+    def new(self, type):
+        name = type.replace("_", " ").title()
+        existing = set(self.keys())
+        unique_name = name
+        counter = 1
+        while unique_name in existing:
+            unique_name = "{}.{:03d}".format(name, counter)
+            counter += 1
+        const = Constraint(type, self._owner, self._path + 'constraints["' + unique_name + '"]')
+        const.name = unique_name
+        self._items.append(const)
+        return const
+
+
+class Bone(Struct):
+    def __init__(self, name, id_data=None):
+        Struct.__init__(self, id_data, 'bones["' + name + '"]')
+        self.name = name
+        self.select = False
+        self.hide = False
+        self.layers = [True] + [False] * 31
+
+
+class PoseBone(Struct):
+    def __init__(self, name, id_data=None):
+        Struct.__init__(self, id_data, 'pose.bones["' + name + '"]')
+        self.name = name
+        self.location = Vector()
+        self.rotation_mode = "QUATERNION"
+        self.rotation_euler = Euler()
+        self.rotation_quaternion = Quaternion()
+        self.scale = Vector((1.0, 1.0, 1.0))
+        self.constraints = ConstraintCollection(id_data, self._path + ".")
+        self.bone = None
+
+
+class Pose(Struct):
+    def __init__(self):
+        Struct.__init__(self)
+        self.bones = Collection()
+
+
+class Armature(ID):
+    def __init__(self, name):
+        ID.__init__(self, name)
+        self.bones = Collection()
+        self.layers = [True] + [False] * 31
+
+
+class KeyBlock(Struct):
+    def __init__(self, name, id_data=None):
+        Struct.__init__(self, id_data, 'key_blocks["' + name + '"]')
+        self.name = name
+        self.value = 0.0
+        self.mute = False
+        self.slider_min = 0.0
+        self.slider_max = 1.0
+        self.relative_key = self
+        self.data = Collection()
+
+
+class Key(ID):
+    def __init__(self, name):
+        ID.__init__(self, name)
+        self.key_blocks = Collection()
+        self.use_relative = True
+
+
+class Mesh(ID):
+    def __init__(self, name):
+        ID.__init__(self, name)
+        self.shape_keys = None
+        self.vertices = Collection()
+
+
+class Modifier(Struct):
+    def __init__(self, name, type, id_data=None):
+        Struct.__init__(self, id_data, 'modifiers["' + name + '"]')
+        self.name = name
+        self.type = type
+        self.show_viewport = True
+
+
+class Object(ID):
+    def __init__(self, name, data=None, type=None):
+        ID.__init__(self, name)
+        self.data = data
+        self.type = type or ("ARMATURE" if isinstance(data, Armature) else "MESH" if isinstance(data, Mesh) else "EMPTY")
+        self.pose = Pose() if self.type == "ARMATURE" else None
+        self.modifiers = Collection()
+        self.constraints = ConstraintCollection(self)
+        self.material_slots = []
+        self.active_material = None
+        self.location = Vector()
+        self.rotation_mode = "XYZ"
+        self.rotation_euler = Euler()
+        self.rotation_quaternion = Quaternion()
+        self.scale = Vector((1.0, 1.0, 1.0))
+        self.select = False
+        self.mode = "OBJECT"
+
+    def shape_key_add(self, name="Key", from_mix=True):
+        if self.data.shape_keys == None:
+            self.data.shape_keys = Key("Key")
+        key_blocks = self.data.shape_keys.key_blocks
+        key_block = KeyBlock(name, self.data.shape_keys)
+        if len(key_blocks) > 0:
+            key_block.relative_key = key_blocks[0]
+        key_blocks.link(key_block)
+        return key_block
+
+
+class SceneObjects(Collection):
+    def __init__(self):
+        Collection.__init__(self)
+        self.active = None
+
+
+class Scene(ID):
+    def __init__(self, name="Scene"):
+        ID.__init__(self, name)
+        self.objects = SceneObjects()
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_current = 1
+
+    def frame_set(self, frame, subframe=0.0):
+        self.frame_current = frame
+
+    def update(self):
+        pass
+
+
+class WindowManager(ID):
+    def __init__(self):
+        ID.__init__(self, "WinMan")
+        self.clipboard = ""
+
+    def invoke_props_dialog(self, operator, width=300):
+        return {'RUNNING_MODAL'}
+
+
+class Context(object):
+    """Context built from a scene. Selection lists are built on every access like in Blender."""
+    def __init__(self, scene):
+        self.scene = scene
+        self.window_manager = WindowManager()
+        self.active_pose_bone = None
+        self.mode = "OBJECT"
+
+    @property
+    def active_object(self):
+        return self.scene.objects.active
+
+    @property
+    def object(self):
+        return self.scene.objects.active
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.scene.objects if obj.select]
+
+    @property
+    def selected_pose_bones(self):
+        obj = self.active_object
+        if obj == None or obj.pose == None:
+            return []
+        return [bone for bone in obj.pose.bones if bone.bone != None and bone.bone.select]
+
+
+class BlendData(object):
+    def __init__(self):
+        for name in ("objects", "meshes", "curves", "armatures", "shape_keys", "materials",
+                     "textures", "actions", "scenes", "lattices"):
+            setattr(self, name, Collection())
+        self.actions._factory = Action
+        self.filepath = ""
+
+    def clear(self):
+        self.__init__()
+
+
+### bpy.types, bpy.props, bpy.utils
+
+class _PropertyDeferred(object):
+    def __init__(self, kind, kwargs):
+        self.kind = kind
+        self.kwargs = kwargs
+
+    def default(self):
+        if "default" in self.kwargs:
+            return self.kwargs["default"]
+        if self.kind == "EnumProperty":
+            items = self.kwargs.get("items")
+            if isinstance(items, (list, tuple)) and len(items) > 0:
+                return items[0][0]
+            return ""
+        return {"BoolProperty": False, "IntProperty": 0, "FloatProperty": 0.0, "StringProperty": "",
+                "CollectionProperty": None, "PointerProperty": None}.get(self.kind)
+
+    def __get__(self, instance, owner):
+        """Properties registered on data types like bpy.types.Scene get their value on first access."""
+        if instance == None:
+            return self
+        value = PropCollection(factory=self.kwargs["type"]) if self.kind == "CollectionProperty" else self.default()
+        for cls in type(instance).__mro__:
+            for name, attribute in vars(cls).items():
+                if attribute is self:
+                    instance.__dict__[name] = value
+                    return value
+        return value
+
+
+def _property_function(kind):
+    def property_function(**kwargs):
+        return _PropertyDeferred(kind, kwargs)
+    property_function.__name__ = kind
+    return property_function
+
+
+class bpy_struct(object):
+    """Base class of registrable types. Instances get the defaults of their properties."""
+    def __init__(self):
+        for cls in reversed(type(self).__mro__):
+            for name, value in vars(cls).items():
+                if isinstance(value, _PropertyDeferred):
+                    object.__setattr__(self, name, value.default())
+
+    def report(self, type, message):
+        self.reports = getattr(self, "reports", [])
+        self.reports.append((type, message))
+
+    def as_keywords(self, ignore=()):
+        return {}
+
+
+def _make_type(name):
+    return type(name, (bpy_struct,), {})
+
+
+def install():
+    """Installs the stand-in modules into sys.modules and returns the bpy module."""
+    if "bpy" in sys.modules and getattr(sys.modules["bpy"], "__standin__", False):
+        return sys.modules["bpy"]
+
+    bpy = types.ModuleType("bpy")
+    bpy.__standin__ = True
+    bpy.data = BlendData()
+
+    bpy_types = types.ModuleType("bpy.types")
+    for name in ("Operator", "Panel", "Menu", "UIList", "PropertyGroup", "AddonPreferences", "Header"):
+        setattr(bpy_types, name, _make_type(name))
+    bpy_types.UIList.bitflag_filter_item = 1 << 30
+    bpy_types.UIList.filter_name = ""
+    bpy_types.UIList.use_filter_invert = False
+    bpy_types.UIList.use_filter_sort_alpha = False
+    for cls in (Object, PoseBone, Bone, KeyBlock, Key, Mesh, Armature, Action, FCurve, Constraint, Scene, ID):
+        setattr(bpy_types, cls.__name__, cls)
+
+    bpy_props = types.ModuleType("bpy.props")
+    for kind in ("BoolProperty", "IntProperty", "FloatProperty", "StringProperty", "EnumProperty",
+                 "CollectionProperty", "PointerProperty", "FloatVectorProperty", "IntVectorProperty", "BoolVectorProperty"):
+        setattr(bpy_props, kind, _property_function(kind))
+
+    bpy_utils = types.ModuleType("bpy.utils")
+    for name in ("register_class", "unregister_class", "register_module", "unregister_module"):
+        setattr(bpy_utils, name, lambda *args, **kwargs: None)
+
+    bpy_app = types.ModuleType("bpy.app")
+    bpy_app.version = (2, 77, 0)
+    bpy_app.background = True
+    bpy_app.driver_namespace = {}
+    handlers = types.ModuleType("bpy.app.handlers")
+    for name in ("scene_update_pre", "scene_update_post", "frame_change_pre", "frame_change_post",
+                 "undo_pre", "undo_post", "redo_pre", "redo_post", "load_pre", "load_post", "save_pre", "save_post"):
+        setattr(handlers, name, [])
+    handlers.persistent = lambda function: function
+    bpy_app.handlers = handlers
+
+    bpy_ops = types.ModuleType("bpy.ops")
+    bpy_ops.ed = types.SimpleNamespace(undo_push=lambda **kwargs: {'FINISHED'})
+    bpy_ops.wm = types.SimpleNamespace(open_mainfile=lambda **kwargs: {'FINISHED'}, save_mainfile=lambda **kwargs: {'FINISHED'})
+
+    bpy.types, bpy.props, bpy.utils, bpy.app, bpy.ops = bpy_types, bpy_props, bpy_utils, bpy_app, bpy_ops
+    bpy.context = Context(Scene())
+
+    bpy_extras = types.ModuleType("bpy_extras")
+    io_utils = types.ModuleType("bpy_extras.io_utils")
+    io_utils.ImportHelper = type("ImportHelper", (object,), {"filepath": ""})
+    io_utils.ExportHelper = type("ExportHelper", (object,), {"filepath": ""})
+    bpy_extras.io_utils = io_utils
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector, mathutils.Euler, mathutils.Quaternion = Vector, Euler, Quaternion
+
+    sys.modules.update({"bpy": bpy, "bpy.types": bpy_types, "bpy.props": bpy_props, "bpy.utils": bpy_utils,
+                        "bpy.app": bpy_app, "bpy.app.handlers": handlers, "bpy.ops": bpy_ops,
+                        "bpy_extras": bpy_extras, "bpy_extras.io_utils": io_utils, "mathutils": mathutils})
+    return bpy
+
+
+def new_context(bpy):
+    """Resets bpy.data and returns a fresh context with an empty scene."""
+    bpy.data.clear()
+    scene = Scene()
+    bpy.data.scenes.link(scene)
+    bpy.context = Context(scene)
+    return bpy.context
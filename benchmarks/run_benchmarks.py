@@ -0,0 +1,332 @@
+"""
+Headless benchmarks for the addon's hot paths.
+
+Runs without Blender against the bpy stand-in in bpy_standin.py:
+
+    python benchmarks/run_benchmarks.py                    # sizes 10, 100, 1000
+    python benchmarks/run_benchmarks.py --sizes 10 10000   # up to face rig sizes
+    python benchmarks/run_benchmarks.py --save-baseline    # store the timings in baselines.json
+    python benchmarks/run_benchmarks.py --compare          # fail if a timing regressed
+
+Every benchmark reports its best wall time and how often the addon's functions were called.
+A fixed calibration loop runs between the repeats of every benchmark, and the timings are scaled by
+how fast it ran, so a busier or slower machine doesn't show up as a regression. The baselines store
+the calibration they were taken with. Timings that are less than --min-seconds slower than their
+baseline never count as a regression, sub-millisecond timings jitter by more than the tolerance.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import cProfile
+import gc
+import pstats
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import bpy_standin
+bpy = bpy_standin.install()
+
+import driver_constraint_addon
+from driver_constraint_addon import constraint_operator, constraint_registry, data_cache, data_path, action_index, batch_driver, menu_state, driver_map
+import synthetic
+
+driver_map.register()
+
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baselines.json")
+CALIBRATION_KEY = "calibration"
+PACKAGE_DIR = os.path.dirname(driver_constraint_addon.__file__)
+
+
+def reset_caches():
+    data_cache.bump_generation()
+    data_path.parse_data_path.cache_clear()
+    action_index.invalidate_action()
+    constraint_operator._enum_items_cache.clear()
+
+
+def new_operator(context, **settings):
+    op = constraint_operator.CreateDriverConstraint()
+    for key, value in settings.items():
+        setattr(op, key, value)
+    return op
+
+
+### benchmarks, every function gets the context and the size and returns a callable that runs once
+
+def bench_get_prop_object_cold(context, size):
+    face = bpy.data.objects["Face"]
+    paths = ['key_blocks["{}"].value'.format(name) for name in face.data.shape_keys.key_blocks.keys()[1:]]
+    def run():
+        reset_caches()
+        for path in paths:
+            constraint_operator.get_prop_object(None, context, path, face)
+    return run
+
+
+def bench_get_prop_object_warm(context, size):
+    face = bpy.data.objects["Face"]
+    paths = ['key_blocks["{}"].value'.format(name) for name in face.data.shape_keys.key_blocks.keys()[1:]]
+    for path in paths:
+        constraint_operator.get_prop_object(None, context, path, face)
+    def run():
+        for path in paths:
+            constraint_operator.get_prop_object(None, context, path, face)
+    return run
+
+
+def bench_create_property_driver(context, size):
+    op = new_operator(context, mode="DRIVER", prop_data_path='key_blocks["shape_00000.L"].value',
+                      property_type="SHAPEKEY_PROPERTY", type="LOC_Y", space="LOCAL_SPACE", only_update_changed=False)
+    def run():
+        op.execute(context)
+    return run
+
+
+def bench_spec_batch(context, size):
+    face = bpy.data.objects["Face"]
+    rows = [(i, {"data_path": 'key_blocks["{}"].value'.format(name), "object": "Face", "type": "LOC_Y"})
+            for i, name in enumerate(face.data.shape_keys.key_blocks.keys()[1:])]
+    def run():
+        reset_caches()
+        batch_driver.create_drivers_from_spec(context, rows)
+    return run
+
+
+def bench_spec_batch_unchanged(context, size):
+    face = bpy.data.objects["Face"]
+    rows = [(i, {"data_path": 'key_blocks["{}"].value'.format(name), "object": "Face", "type": "LOC_Y"})
+            for i, name in enumerate(face.data.shape_keys.key_blocks.keys()[1:])]
+    batch_driver.create_drivers_from_spec(context, rows)
+    def run():
+        batch_driver.create_drivers_from_spec(context, rows, incremental=True)
+    return run
+
+
+def bench_set_defaults(context, size):
+    op = new_operator(context)
+    op.driver = context.active_pose_bone
+    def run():
+        op.set_defaults(context)
+    return run
+
+
+def bench_get_action_length_cold(context, size):
+    actions = list(bpy.data.actions)
+    def run():
+        action_index.invalidate_action()
+        for action in actions:
+            constraint_operator.get_action_length(action)
+    return run
+
+
+def bench_enum_get_shapes(context, size):
+    op = new_operator(context)
+    def run():
+        constraint_operator._enum_items_cache.clear()
+        op.get_shapes(context)
+    return run
+
+
+def bench_enum_get_actions(context, size):
+    op = new_operator(context)
+    def run():
+        constraint_operator._enum_items_cache.clear()
+        op.get_actions(context)
+    return run
+
+
+def bench_enum_get_action_constraints(context, size):
+    """Action constraint enum of the dialog with all bones selected, after invoke stored the registry of the rig."""
+    rig = bpy.data.objects["Rig"]
+    for bone in rig.pose.bones:
+        bone.bone.select = True
+        if len(bone.constraints) == 0:
+            bone.constraints.new("ACTION")
+    constraint_registry.store_registry(rig)
+    op = new_operator(context)
+    def run():
+        constraint_operator._enum_items_cache.clear()
+        op.get_action_constraints(context)
+    return run
+
+
+def bench_enum_redraw(context, size):
+    """All dynamic enums of the dialog as they are queried on one redraw, with a warm cache."""
+    op = new_operator(context)
+    def run():
+        op.get_shapes(context)
+        op.get_actions(context)
+        op.get_property_type_items(context)
+    return run
+
+
+def bench_menu_state(context, size):
+    """Visibility of the menu entries on repeated redraws of the pose tools panel."""
+    context.mode = "POSE"
+    def run():
+        for i in range(100):
+            menu_state.get_menu_state(context)
+    return run
+
+
+def bench_driver_map_filter(context, size):
+    """Filter of the driver map list after the map changed, one entry per shape key."""
+    face = bpy.data.objects["Face"]
+    rows = [(i, {"data_path": 'key_blocks["{}"].value'.format(name), "object": "Face", "type": "LOC_Y"})
+            for i, name in enumerate(face.data.shape_keys.key_blocks.keys()[1:])]
+    batch_driver.create_drivers_from_spec(context, rows)
+    ui_list = driver_map.DriverMapList()
+    ui_list.filter_bone = "bone_0001"
+    def run():
+        data_cache.bump_generation("driver_map")
+        ui_list.filter_items(context, context.scene, "driver_map")
+        for i in range(100):
+            ui_list.filter_items(context, context.scene, "driver_map")
+    return run
+
+
+BENCHMARKS = [
+    ("get_prop_object_cold", bench_get_prop_object_cold),
+    ("get_prop_object_warm", bench_get_prop_object_warm),
+    ("create_property_driver", bench_create_property_driver),
+    ("spec_batch", bench_spec_batch),
+    ("spec_batch_unchanged", bench_spec_batch_unchanged),
+    ("set_defaults", bench_set_defaults),
+    ("get_action_length_cold", bench_get_action_length_cold),
+    ("enum_get_shapes", bench_enum_get_shapes),
+    ("enum_get_actions", bench_enum_get_actions),
+    ("enum_get_action_constraints", bench_enum_get_action_constraints),
+    ("enum_redraw", bench_enum_redraw),
+    ("menu_state", bench_menu_state),
+    ("driver_map_filter", bench_driver_map_filter),
+]
+
+
+def addon_call_counts(profile):
+    """Returns {function: calls} for the functions of the addon package in a profile."""
+    counts = {}
+    for (filename, line, function), stats in pstats.Stats(profile).stats.items():
+        if filename.startswith(PACKAGE_DIR):
+            name = "{}.{}".format(os.path.splitext(os.path.basename(filename))[0], function)
+            counts[name] = counts.get(name, 0) + stats[1]
+    return counts
+
+
+def calibrate(repeat=5):
+    """Best time of a fixed loop of dict and attribute work, a measure of how fast this machine runs Python right now."""
+    class Item(object):
+        pass
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        table = {}
+        for j in range(20000):
+            item = Item()
+            item.name = "bone_{}".format(j)
+            table[item.name] = item
+        for j in range(20000):
+            table.get("bone_{}".format(j))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best == None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(function, context, size, repeat):
+    """
+    Returns the best time of repeat runs, the best time of the calibration loop run between them and
+    the call counts of one profiled run. Interleaving both makes them see the same load of the machine.
+    """
+    run = function(context, size)
+    best = None
+    best_calibration = None
+    ### like timeit, garbage collection would add pauses of its own to the timings
+    gc.disable()
+    try:
+        for i in range(repeat):
+            calibration = calibrate(1)
+            best_calibration = calibration if best_calibration == None else min(best_calibration, calibration)
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best == None else min(best, elapsed)
+    finally:
+        gc.enable()
+    profile = cProfile.Profile()
+    profile.enable()
+    run()
+    profile.disable()
+    return best, best_calibration, addon_call_counts(profile)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--calls", action="store_true", help="print the call counts of all addon functions")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="compare with baselines.json, exit with 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor for --compare")
+    parser.add_argument("--min-seconds", type=float, default=0.001, help="slowdowns below this many seconds are never regressions")
+    args = parser.parse_args(argv)
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as baseline_file:
+            baselines = json.load(baseline_file)
+    calibration = calibrate()
+    saved_calibration = baselines.get(CALIBRATION_KEY, 0)
+    print("calibration {:.6f}s, baselines calibrated at {:.6f}s".format(calibration, saved_calibration))
+
+    results = {}
+    regressions = []
+    print("{:<30} {:>7} {:>12} {:>10}  {}".format("benchmark", "size", "seconds", "baseline", "most called"))
+    for size in args.sizes:
+        for name, function in BENCHMARKS:
+            if args.filter not in name:
+                continue
+            context = synthetic.build_scene(bpy, size)
+            reset_caches()
+            ### the load of the machine changes during a run, so every benchmark gets its own calibration
+            seconds, local_calibration, calls = run_benchmark(function, context, size, args.repeat)
+            seconds_calibrated = seconds * calibration / local_calibration
+            key = "{}@{}".format(name, size)
+            results[key] = seconds_calibrated
+
+            baseline = baselines.get(key)
+            if baseline != None and saved_calibration > 0:
+                baseline *= calibration / saved_calibration
+            ratio = "" if baseline == None else "{:.2f}x".format(seconds_calibrated / baseline if baseline > 0 else 0.0)
+            top = sorted(calls.items(), key=lambda item: -item[1])
+            summary = ", ".join("{} {}".format(function_name, count) for function_name, count in top[:3])
+            print("{:<30} {:>7} {:>12.6f} {:>10}  {}".format(name, size, seconds, ratio, summary))
+            if args.calls:
+                for function_name, count in top:
+                    print("    {:<60} {:>10}".format(function_name, count))
+            if baseline != None and seconds_calibrated > baseline * args.tolerance and seconds_calibrated - baseline > args.min_seconds:
+                regressions.append(key)
+
+    if args.save_baseline:
+        ### timings that are kept from an earlier save are scaled to the new calibration
+        for key in baselines:
+            if key != CALIBRATION_KEY and key not in results and saved_calibration > 0:
+                baselines[key] *= calibration / saved_calibration
+        baselines.update(results)
+        baselines[CALIBRATION_KEY] = calibration
+        with open(BASELINE_PATH, "w") as baseline_file:
+            json.dump(baselines, baseline_file, indent=1, sort_keys=True)
+        print("Baselines saved to " + BASELINE_PATH)
+
+    if args.compare and len(regressions) > 0:
+        print("Regressions: " + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Builders for synthetic rigs in the bpy stand-in: an armature with n bones, a face mesh
+with n key blocks and n actions, wired into a context like the operator expects it.
+"""
+
+import bpy_standin as standin
+
+
+def build_armature(bpy, name, bone_count):
+    armature = standin.Armature(name + "Data")
+    obj = standin.Object(name, armature)
+    bpy.data.armatures.link(armature)
+    bpy.data.objects.link(obj)
+    for i in range(bone_count):
+        bone_name = "bone_{:05d}.{}".format(i // 2, "L" if i % 2 == 0 else "R")
+        bone = standin.Bone(bone_name, armature)
+        pose_bone = standin.PoseBone(bone_name, obj)
+        pose_bone.bone = bone
+        armature.bones.link(bone)
+        obj.pose.bones.link(pose_bone)
+    return obj
+
+
+def build_face_mesh(bpy, name, key_count):
+    mesh = standin.Mesh(name + "Data")
+    obj = standin.Object(name, mesh)
+    bpy.data.meshes.link(mesh)
+    bpy.data.objects.link(obj)
+    obj.shape_key_add("Basis")
+    for i in range(key_count):
+        obj.shape_key_add("shape_{:05d}.{}".format(i // 2, "L" if i % 2 == 0 else "R"))
+    bpy.data.shape_keys.link(mesh.shape_keys)
+    for i in range(4):
+        obj.modifiers.link(standin.Modifier("Modifier{}".format(i), "SUBSURF", obj))
+    return obj
+
+
+def build_actions(bpy, rig, action_count, bones_per_action=1, keys_per_curve=10):
+    bone_names = rig.pose.bones.keys()
+    for i in range(action_count):
+        action = bpy.data.actions.new("action_{:05d}".format(i))
+        for b in range(bones_per_action):
+            bone_name = bone_names[(i + b) % len(bone_names)]
+            for path, count in (("location", 3), ("rotation_quaternion", 4), ("scale", 3)):
+                for index in range(count):
+                    curve = action.fcurves.new('pose.bones["{}"].{}'.format(bone_name, path), index)
+                    points = curve.keyframe_points
+                    points.add(keys_per_curve)
+                    points.foreach_set("co", [value for k in range(keys_per_curve) for value in (float(k * 2), 0.1 * k)])
+
+
+def build_scene(bpy, size):
+    """Builds a rig with size bones, a mesh with size key blocks and size actions and returns the context."""
+    context = standin.new_context(bpy)
+    rig = build_armature(bpy, "Rig", size)
+    face = build_face_mesh(bpy, "Face", size)
+    build_actions(bpy, rig, size)
+    for obj in (rig, face):
+        context.scene.objects.link(obj)
+        obj.select = True
+    context.scene.objects.active = rig
+
+    active_bone = rig.pose.bones[0]
+    active_bone.location = standin.Vector((0.0, 0.25, 0.0))
+    active_bone.bone.select = True
+    context.active_pose_bone = active_bone
+    return context
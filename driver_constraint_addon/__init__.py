@@ -37,52 +37,81 @@ import bpy
 ##################################
 
 import importlib
+### bpy is always imported at this point, developer_utils only when the addon is enabled again
+reloading = "developer_utils" in locals()
 from . import developer_utils
-importlib.reload(developer_utils)
-modules = developer_utils.setup_addon_modules(__path__, __name__, "bpy" in locals())
+if reloading:
+    importlib.reload(developer_utils)
+### the tools behind these modules are registered by tool_operators and imported the first time they run
+deferred_modules = ("driver_bake", "driver_lint", "expression_convert", "driver_profiler", "rbf_driver", "driver_io", "batch_driver")
+modules = developer_utils.setup_addon_modules(__path__, __name__, reloading, deferred_modules)
 
 
 
 # register
 ##################################
 
+import time
 import traceback
 
+from . menu_state import get_menu_state, timed_draw
+
+@timed_draw
 def add_to_specials(self,context):
-    if len(bpy.context.selected_objects) > 0:
+    state = get_menu_state(context)
+    if state["driver"]:
         self.layout.operator_context = "INVOKE_DEFAULT"
         self.layout.separator()
         op = self.layout.operator("object.create_driver_constraint",text="Driver Constraint",icon="DRIVER")
         op.mode = "DRIVER"
-        if context.active_object.type == "ARMATURE" and len(context.selected_pose_bones) > 1:
+        if state["action"]:
             op = self.layout.operator("object.create_driver_constraint",text="Action Constraint",icon="ACTION")
             op.mode = "ACTION"
-        
+
+@timed_draw
 def add_pose_tools(self,context):
-    if len(bpy.context.selected_objects) > 0:
+    state = get_menu_state(context)
+    if state["driver"]:
         self.layout.operator_context = "INVOKE_DEFAULT"
         self.layout.separator()
         self.layout.label("Driver Tools:")
         op = self.layout.operator("object.create_driver_constraint",text="Driver Constraint",icon="DRIVER")
         op.mode = "DRIVER"
-        if context.active_object != None and context.active_object.type == "ARMATURE" and len(context.selected_pose_bones) > 1:
+        if state["action"]:
             op = self.layout.operator("object.create_driver_constraint",text="Action Constraint",icon="ACTION")
             op.mode = "ACTION"
+        if state["rbf"]:
+            self.layout.operator("object.rbf_pose_driver",text="RBF Pose Driver",icon="POSE_HLT")
 
 def register():
-    try: bpy.utils.register_module(__name__)
-    except: traceback.print_exc()
+    ### modules list their classes in "classes" and can define their own register function for handlers and properties
+    for module in modules:
+        start = time.perf_counter()
+        for cls in getattr(module, "classes", ()):
+            try: bpy.utils.register_class(cls)
+            except: traceback.print_exc()
+        if hasattr(module, "register"):
+            module.register()
+        developer_utils.add_startup_timing("register", module.__name__.rsplit(".", 1)[-1], time.perf_counter() - start)
     
     bpy.types.VIEW3D_MT_pose_specials.append(add_to_specials)
     bpy.types.VIEW3D_MT_object_specials.append(add_to_specials)
     bpy.types.VIEW3D_PT_tools_posemode.append(add_pose_tools) 
     bpy.types.VIEW3D_PT_tools_object.append(add_pose_tools) 
     
-    print("Registered {} with {} modules".format(bl_info["name"], len(modules)))
+    timings = developer_utils.startup_timings
+    total = sum(sum(phase.values()) for phase in timings.values())
+    print("Registered {} with {} modules in {:.1f} ms".format(bl_info["name"], len(modules), total * 1000))
+    if bpy.app.debug:
+        print(developer_utils.format_startup_report())
 
 def unregister():
-    try: bpy.utils.unregister_module(__name__)
-    except: traceback.print_exc()
+    for module in reversed(modules):
+        if hasattr(module, "unregister"):
+            module.unregister()
+        for cls in reversed(getattr(module, "classes", ())):
+            try: bpy.utils.unregister_class(cls)
+            except: traceback.print_exc()
     
     bpy.types.VIEW3D_MT_pose_specials.remove(add_to_specials)
     bpy.types.VIEW3D_MT_object_specials.remove(add_to_specials)
@@ -0,0 +1,93 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import bpy
+from . lazy_import import numpy as np
+from collections import namedtuple
+from bpy.app.handlers import persistent
+from . data_path import parse_data_path
+
+__reload_order_index__ = -1
+
+ActionInfo = namedtuple("ActionInfo", ["frame_start", "frame_end", "channel_count", "bones"])
+
+### action name -> (action pointer, ActionInfo)
+_action_infos = {}
+
+def compute_action_info(action):
+    """Reads the keyframe coordinates of all fcurves of action in bulk and returns its ActionInfo."""
+    frame_start = None
+    frame_end = None
+    bones = set()
+    for fcurve in action.fcurves:
+        count = len(fcurve.keyframe_points)
+        if count > 0:
+            co = np.empty(count * 2, dtype=np.float32)
+            fcurve.keyframe_points.foreach_get("co", co)
+            frames = co[0::2]
+            start, end = float(frames.min()), float(frames.max())
+            frame_start = start if frame_start == None else min(frame_start, start)
+            frame_end = end if frame_end == None else max(frame_end, end)
+        try:
+            bone_name = parse_data_path(fcurve.data_path).collection_key("bones")
+        except ValueError:
+            bone_name = None
+        if isinstance(bone_name, str):
+            bones.add(bone_name)
+    return ActionInfo(frame_start or 0.0, frame_end or 0.0, len(action.fcurves), frozenset(bones))
+
+def get_action_info(action):
+    """Returns the cached ActionInfo of action, it is recomputed only after the action changed."""
+    entry = _action_infos.get(action.name)
+    if entry == None or entry[0] != action.as_pointer():
+        entry = (action.as_pointer(), compute_action_info(action))
+        _action_infos[action.name] = entry
+    return entry[1]
+
+def invalidate_action(action=None):
+    if action == None:
+        _action_infos.clear()
+    else:
+        _action_infos.pop(action.name, None)
+
+@persistent
+def action_update_handler(scene):
+    if bpy.data.actions.is_updated:
+        for action in bpy.data.actions:
+            if action.is_updated:
+                invalidate_action(action)
+
+@persistent
+def action_reset_handler(dummy):
+    invalidate_action()
+
+def register():
+    bpy.app.handlers.scene_update_post.append(action_update_handler)
+    bpy.app.handlers.undo_post.append(action_reset_handler)
+    bpy.app.handlers.redo_post.append(action_reset_handler)
+    bpy.app.handlers.load_post.append(action_reset_handler)
+
+def unregister():
+    for handlers, handler in ((bpy.app.handlers.scene_update_post, action_update_handler),
+                              (bpy.app.handlers.undo_post, action_reset_handler),
+                              (bpy.app.handlers.redo_post, action_reset_handler),
+                              (bpy.app.handlers.load_post, action_reset_handler)):
+        if handler in handlers:
+            handlers.remove(handler)
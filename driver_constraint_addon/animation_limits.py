@@ -0,0 +1,113 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Driver limits from the animation of a bone or object. The transform fcurves are evaluated
+### with NumPy at every frame of the action, no frame is set and the depsgraph is not touched.
+
+from . lazy_import import numpy as np, LazyModule
+
+### the bake module is only imported with the first limits taken from an animation, see tool_operators
+driver_bake = LazyModule(__package__ + ".driver_bake")
+
+__reload_order_index__ = -1
+
+### transform groups in the order set_defaults checks them, with the value of the rest pose
+LIMIT_GROUPS = (("LOC", "location", 0.0, "LIMIT_LOCATION"),
+                ("ROT", "rotation_euler", 0.0, "LIMIT_ROTATION"),
+                ("SCALE", "scale", 1.0, "LIMIT_SCALE"))
+AXES = ("X", "Y", "Z")
+### ranges smaller than this count as not animated
+MIN_RANGE = 1e-5
+
+def get_transform_curves(action, bone_name=None):
+    """Returns {(path, array_index): fcurve} of the transform channels of a bone, or of the object if bone_name is None."""
+    prefix = "" if bone_name == None else 'pose.bones["' + bone_name.replace('"', '\\"') + '"].'
+    paths = set(prefix + path for path in driver_bake.CHANNEL_DEFAULTS)
+    curves = {}
+    for curve in action.fcurves:
+        if curve.data_path in paths:
+            curves[(curve.data_path[len(prefix):], curve.array_index)] = curve
+    return curves
+
+def get_sample_frames(curves, frame_step=1.0):
+    """Every frame_step frames of the keyframed range of curves plus all keyframe positions."""
+    keyframes = []
+    for curve in curves.values():
+        points = np.zeros(len(curve.keyframe_points) * 2, dtype=np.float32)
+        curve.keyframe_points.foreach_get("co", points)
+        keyframes.append(points[0::2])
+    keyframes = np.concatenate(keyframes).astype(np.float64)
+    if len(keyframes) == 0:
+        return keyframes
+    frames = np.arange(keyframes.min(), keyframes.max() + frame_step, frame_step)
+    return np.union1d(frames, keyframes)
+
+def sample_transform_ranges(action, bone_name=None, rotation_mode="XYZ", frame_step=1.0):
+    """
+    Returns {"LOC_X": (min, max), ...} for all animated transform channels. Rotations are XYZ eulers in radians,
+    quaternion rotations are converted like the ROT_X/Y/Z driver variables read them.
+    """
+    curves = get_transform_curves(action, bone_name)
+    if len(curves) == 0:
+        return {}
+    frames = get_sample_frames(curves, frame_step)
+    if len(frames) == 0:
+        return {}
+
+    def sample(path, array_index, default):
+        curve = curves.get((path, array_index))
+        return np.full(len(frames), default) if curve == None else driver_bake.evaluate_fcurve(curve, frames)
+
+    samples = {}
+    for group, path, rest, limit_type in LIMIT_GROUPS:
+        if group == "ROT" and rotation_mode == "QUATERNION":
+            if not any((("rotation_quaternion", i) in curves) for i in range(4)):
+                continue
+            components = [sample("rotation_quaternion", i, driver_bake.CHANNEL_DEFAULTS["rotation_quaternion"][i]) for i in range(4)]
+            for axis, values in zip(AXES, driver_bake.quaternions_to_euler(*components)):
+                samples[group + "_" + axis] = values
+            continue
+        for i, axis in enumerate(AXES):
+            if (path, i) in curves:
+                samples[group + "_" + axis] = sample(path, i, rest)
+    return dict((name, (float(values.min()), float(values.max()))) for name, values in samples.items())
+
+def get_animation_limits(ranges):
+    """
+    Picks the channel a driver should read from sampled ranges like set_defaults picks it from the pose:
+    location before rotation before scale, the axis that moves farthest from the rest pose.
+    Returns (transform type, min, max, limit constraint type) or None. min is the extreme closer to the rest pose.
+    """
+    for group, path, rest, limit_type in LIMIT_GROUPS:
+        best = None
+        for axis in AXES:
+            name = group + "_" + axis
+            if name not in ranges:
+                continue
+            low, high = ranges[name]
+            if high - low < MIN_RANGE:
+                continue
+            distance = max(abs(low - rest), abs(high - rest))
+            if best == None or distance > best[0]:
+                near, far = (low, high) if abs(low - rest) <= abs(high - rest) else (high, low)
+                best = (distance, name, near, far)
+        if best != None:
+            return best[1], best[2], best[3], limit_type
+    return None
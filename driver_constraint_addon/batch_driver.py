@@ -0,0 +1,236 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import bpy
+import os
+import csv
+import json
+from . constraint_operator import CreateDriverConstraint, apply_driver_plan, get_mirror_plan, add_action_constraints
+from . driver_plan import plan_property_drivers
+from . rig_index import RigIndex
+from . fcurve_utils import RESPONSE_CURVES
+
+### every spec row is a dict with these keys, missing keys fall back to the defaults.
+### "driver" rows create a driver constraint on data_path. "action" rows add an Action constraint
+### playing action to the bones of the armature object (the driver object if empty), driven by
+### the driver bone like the Action mode of the operator. bones is a list or a comma separated string.
+SPEC_DEFAULTS = {
+    "kind": "driver",
+    "data_path": "",
+    "object": "",
+    "property_type": "",
+    "driver": "",
+    "bone": "",
+    "type": "LOC_X",
+    "space": "LOCAL_SPACE",
+    "min": 0.0,
+    "max": 1.0,
+    "prop_min": 0.0,
+    "prop_max": 1.0,
+    "interpolation": "LINEAR",
+    "response_curve": "LINEAR",
+    "response_points": 5,
+    "mirror": False,
+    "action": "",
+    "bones": "",
+    "frame_start": 0,
+    "frame_end": 10}
+
+SPEC_KINDS = ("driver", "action")
+
+TRANSFORM_TYPES = [item[0] for item in CreateDriverConstraint.type_values]
+SPACES = [item[0] for item in CreateDriverConstraint.space_values]
+INTERPOLATION_TYPES = [item[0] for item in CreateDriverConstraint.int_type_values]
+RESPONSE_CURVE_TYPES = [item[0] for item in RESPONSE_CURVES]
+
+def iter_spec_rows(filepath):
+    """
+    Streams the rows of a driver spec file. CSV files need a header line, every other
+    file is read as JSON lines. Yields (line_number, row) tuples, JSON rows are
+    yielded as strings and decoded in parse_spec_row.
+    """
+    with open(filepath, newline="") as spec_file:
+        if os.path.splitext(filepath)[1].lower() == ".csv":
+            reader = csv.DictReader(spec_file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(spec_file, 1):
+                line = line.strip()
+                if line == "" or line.startswith("#"):
+                    continue
+                yield line_number, line
+
+def parse_spec_row(row):
+    """Fills in defaults and converts the row values. Raises ValueError for invalid rows."""
+    if isinstance(row, str):
+        row = json.loads(row)
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    spec = dict(SPEC_DEFAULTS)
+    for key, value in row.items():
+        if key in spec and value not in (None, ""):
+            spec[key] = value
+    for key in ("min", "max", "prop_min", "prop_max"):
+        spec[key] = float(spec[key])
+    for key in ("response_points", "frame_start", "frame_end"):
+        spec[key] = int(spec[key])
+    if isinstance(spec["mirror"], str):
+        spec["mirror"] = spec["mirror"].strip().lower() in ("1", "true", "yes")
+    if isinstance(spec["bones"], str):
+        spec["bones"] = [name.strip() for name in spec["bones"].split(",") if name.strip() != ""]
+
+    if spec["kind"] not in SPEC_KINDS:
+        raise ValueError("unknown kind " + str(spec["kind"]))
+    if spec["kind"] == "driver" and spec["data_path"] == "":
+        raise ValueError("data_path is missing")
+    if spec["kind"] == "action" and spec["action"] == "":
+        raise ValueError("action is missing")
+    if spec["kind"] == "action" and (not isinstance(spec["bones"], list) or len(spec["bones"]) == 0):
+        raise ValueError("bones are missing")
+    if spec["type"] not in TRANSFORM_TYPES:
+        raise ValueError("unknown transform type " + str(spec["type"]))
+    if spec["space"] not in SPACES:
+        raise ValueError("unknown space " + str(spec["space"]))
+    if spec["interpolation"] not in INTERPOLATION_TYPES:
+        raise ValueError("unknown interpolation " + str(spec["interpolation"]))
+    if spec["response_curve"] not in RESPONSE_CURVE_TYPES:
+        raise ValueError("unknown response curve " + str(spec["response_curve"]))
+    return spec
+
+def get_action_spec_objects(context, spec, index):
+    """Returns the armature object, the action, the driver object and the driver bone name of an action row."""
+    objects, driver_obj, bone_name = get_spec_objects(context, spec, index)
+    obj = objects[0] if spec["object"] != "" else driver_obj
+    if obj.type != "ARMATURE":
+        raise ValueError(obj.name + " is not an armature")
+    if bone_name == None:
+        raise ValueError("action constraints need a driver bone")
+    if spec["action"] not in bpy.data.actions:
+        raise ValueError("action " + spec["action"] + " not found")
+    return obj, bpy.data.actions[spec["action"]], driver_obj, bone_name
+
+def get_spec_objects(context, spec, index):
+    """Returns the driven objects, the driver object and the driver bone name of a spec row."""
+    if spec["object"] != "":
+        if spec["object"] not in bpy.data.objects:
+            raise ValueError("object " + spec["object"] + " not found")
+        objects = [bpy.data.objects[spec["object"]]]
+    else:
+        objects = [obj for obj in context.selected_objects if obj != context.active_object or len(context.selected_objects) == 1]
+
+    if spec["driver"] != "":
+        if spec["driver"] not in bpy.data.objects:
+            raise ValueError("driver object " + spec["driver"] + " not found")
+        driver_obj = bpy.data.objects[spec["driver"]]
+    else:
+        driver_obj = context.active_object
+    if driver_obj == None:
+        raise ValueError("no driver object")
+
+    bone_name = None
+    if driver_obj.type == "ARMATURE":
+        if spec["bone"] != "":
+            bone_name = spec["bone"]
+        elif driver_obj == context.active_object and context.active_pose_bone != None:
+            bone_name = context.active_pose_bone.name
+        if bone_name == None or bone_name not in index.pose_bones(driver_obj):
+            raise ValueError("bone " + str(bone_name) + " not found in " + driver_obj.name)
+    return objects, driver_obj, bone_name
+
+def create_drivers_from_spec(context, rows, incremental=False, stats=None):
+    """
+    Creates one driver constraint per spec row, or the Action constraints of an action row. rows is an
+    iterable of (line_number, row) tuples. All driver rows are planned first and then applied in a single
+    pass, the action rows follow after them. With incremental only drivers
+    that differ from their row are updated, see apply_driver_plan.
+    Returns a list of (line_number, data_path, success, message) tuples.
+    """
+    results = []
+    plan = []
+    planned_rows = []
+    action_rows = []
+    index = RigIndex()
+    for line_number, row in rows:
+        data_path = ""
+        try:
+            spec = parse_spec_row(row)
+            if spec["kind"] == "action":
+                data_path = spec["action"]
+                action_rows.append((len(results), spec) + get_action_spec_objects(context, spec, index))
+                results.append((line_number, data_path, True, ""))
+                continue
+            data_path = spec["data_path"]
+            objects, driver_obj, bone_name = get_spec_objects(context, spec, index)
+            row_plan = plan_property_drivers([obj.name for obj in objects], data_path, spec["property_type"], driver_obj.name, bone_name, spec)
+            if spec["mirror"]:
+                row_plan += get_mirror_plan(row_plan, index)
+            planned_rows.append((len(results), len(plan), len(row_plan)))
+            plan.extend(row_plan)
+            results.append((line_number, data_path, True, ""))
+        except (ValueError, TypeError, KeyError, AttributeError) as error:
+            results.append((line_number, data_path, False, str(error)))
+
+    curve_counts = apply_driver_plan(context, plan, index, incremental, stats)
+    for result_index, plan_start, plan_length in planned_rows:
+        line_number, data_path = results[result_index][:2]
+        curve_count = sum(curve_counts[plan_start:plan_start + plan_length])
+        if curve_count == 0:
+            results[result_index] = (line_number, data_path, False, "property has not been found")
+        else:
+            results[result_index] = (line_number, data_path, True, "{} driver(s) added".format(curve_count))
+
+    if stats != None:
+        stats.setdefault("action_constraints", 0)
+    for result_index, spec, obj, action, driver_obj, bone_name in action_rows:
+        line_number, data_path = results[result_index][:2]
+        try:
+            count = add_action_constraints(obj, spec["bones"], driver_obj, bone_name, action, spec, incremental)
+        except (TypeError, RuntimeError, AttributeError) as error:
+            results[result_index] = (line_number, data_path, False, str(error))
+            continue
+        if stats != None:
+            stats["action_constraints"] += count
+        if count == 0:
+            results[result_index] = (line_number, data_path, False, "bones have not been found")
+        else:
+            results[result_index] = (line_number, data_path, True, "{} action constraint(s) added".format(count))
+    return results
+
+def execute_batch(op, context):
+    """Runs the Create Driver Constraints from Spec operator op, see tool_operators."""
+    try:
+        stats = {}
+        results = create_drivers_from_spec(context, iter_spec_rows(op.filepath), op.only_update_changed, stats)
+    except (IOError, csv.Error) as error:
+        op.report({'ERROR'}, "Could not read spec file: " + str(error))
+        return {'CANCELLED'}
+
+    failed = [result for result in results if not result[2]]
+    for line_number, data_path, success, message in failed:
+        print("Line {}: {} - {}".format(line_number, data_path, message))
+
+    if len(failed) > 0:
+        msg = "{} of {} rows failed, see console for details.".format(len(failed), len(results))
+        op.report({'WARNING'}, msg)
+    else:
+        msg = "{} rows have been processed: {} drivers created, {} updated, {} unchanged, {} action constraints."
+        op.report({'INFO'}, msg.format(len(results), stats["created"], stats["patched"], stats["unchanged"], stats["action_constraints"]))
+    return {'FINISHED'}
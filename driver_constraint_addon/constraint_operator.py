@@ -19,118 +19,411 @@ Created by Andreas Esau
 '''
 
 import bpy
+import time
 from math import radians,degrees
 from mathutils import Vector,Quaternion,Euler
+from . data_path import parse_data_path
+from . data_cache import LRUCache, get_generation, bump_generation
+from . rig_index import RigIndex, get_shared_rig_index
+from . action_index import get_action_info
+from . fcurve_utils import RESPONSE_CURVES, write_keyframes, read_keyframes, sort_keyframes
+from . driver_plan import plan_property_drivers, order_plan
+from . mirror import mirror_name, build_mirror_index, mirror_plan, MIRROR_FLIP_TYPES
+from . corrective_shape import create_corrective_shape, get_unique_shape_name
+from . animation_limits import sample_transform_ranges, get_animation_limits
+from . edit_session import BulkEditSession, touch
+from . phase_timer import PhaseTimer, get_phase_timer, write_phase_record
+from . driver_map import record_drivers
+from . constraint_registry import tag_constraint, store_registry, get_owner_name, get_tagged_names, iter_tagged_constraints, remove_tagged_constraints, retarget_tagged_constraints
 
-def get_prop_object(self,context,prop_name,obj):
-    wm = context.window_manager
-    
+_prop_object_cache = LRUCache("objects",maxsize=16384)
+
+def get_prop_object(self,context,prop_name,obj,index=None):
+    """
+    Returns a tuple of the struct that holds prop_name and its property type or None if not found.
+    Pass a RigIndex to share its name lookups between several calls, the lookup then goes through that index only.
+    Without an index the result is cached per object and data path together with the shared index,
+    until the object data changes or the addon itself edits it (see edit_session.touch).
+    """
+    if index != None:
+        return find_prop_object(prop_name,obj,index)
+    key = (obj.as_pointer(),prop_name)
+    if key in _prop_object_cache:
+        return _prop_object_cache.get(key)
+    prop_object = find_prop_object(prop_name,obj,get_shared_rig_index())
+    _prop_object_cache.set(key,prop_object)
+    return prop_object
+
+def find_prop_object(prop_name,obj,index):
+    try:
+        path = parse_data_path(prop_name)
+    except ValueError:
+        return None
+    if len(path.segments) == 0:
+        return None
+    return resolve_prop_object(path,obj,index)
+
+def resolve_prop_object(path,obj,index):
+    prop_name = path.path
+    keys = path.keys
     data = obj.data
-    bone = None
     shape_keys = None
     mat = obj.active_material
     tex = None
-    modifier = None
-    scene = context.scene
-    render = scene.render
     
     if obj.type in ["MESH", "CURVE"] and obj.data.shape_keys != None:
         shape_keys = obj.data.shape_keys
                     
     if mat != None:
         tex = mat.active_texture
-        
     
     ### return if property is found in modifier
-    if len(obj.modifiers) > 0 and '"' in prop_name:
-        modifier_name = prop_name.split('"')[1]
-        if modifier_name in obj.modifiers:
-            modifier = obj.modifiers[modifier_name]
+    if len(keys) > 0:
+        modifier = index.modifiers(obj).get(keys[0])
+        if modifier != None:
             return modifier, "MODIFIER_PROPERTY"
         
     ### return if property is found in texture slots    
-    if "texture_slots" in prop_name and "[" in prop_name:
-        index = int ( prop_name[prop_name.find("[")+1:prop_name.find("]")])
-        texture_slot = mat.texture_slots[index]
-        return texture_slot, "TEXTURE_PROPERTY"
-            
+    texture_slot_index = path.collection_key("texture_slots")
+    if mat != None and isinstance(texture_slot_index,int):
+        return mat.texture_slots[texture_slot_index], "TEXTURE_PROPERTY"
     
     ### return if property is found in shapekeys    
-    if shape_keys != None and '"' in prop_name:
-        shape_name = prop_name.split('"')[1]
-        if shape_name in shape_keys.key_blocks:
+    if shape_keys != None:
+        if len(keys) > 0 and keys[0] in index.key_blocks(obj):
+            return shape_keys, "SHAPEKEY_PROPERTY"
+        if path.is_simple and hasattr(shape_keys,prop_name):
             return shape_keys, "SHAPEKEY_PROPERTY"
-    if hasattr(shape_keys,prop_name):
-        return shape_keys, "SHAPEKEY_PROPERTY"
-    
     
     ### return if property is found in bone constraint
-    if '"' in prop_name:
-        if len(prop_name.split('"')) > 3:
-            bone_name = prop_name.split('"')[1]
-            const_name = prop_name.split('"')[3]
-            if hasattr(obj.pose,"bones") and bone_name in obj.pose.bones and const_name in obj.pose.bones[bone_name].constraints:
-                return obj.pose.bones[bone_name].constraints[const_name], "BONE_CONSTRAINT_PROPERTY"
+    if len(keys) > 1 and obj.pose != None:
+        const = index.bone_constraints(obj,keys[0]).get(keys[1])
+        if const != None:
+            return const, "BONE_CONSTRAINT_PROPERTY"
             
     ### return if property is found in bone
-    if obj.type == "ARMATURE" and '"' in prop_name and "bones" in prop_name:
-        
-        if len(prop_name.split('"')) >= 3:
-            bone_name = prop_name.split('"')[1]
-            if bone_name in obj.data.bones:
-                if prop_name.rfind("]") == len(prop_name)-1:
-                    from_idx = prop_name.rfind("[")
-                    to_idx = prop_name.rfind("]")+1
-                    prop = prop_name[from_idx:to_idx]
-                else:
-                    from_idx = prop_name.rfind(".")+1
-                    prop = prop_name[from_idx:]
-                if hasattr(obj.data.bones[bone_name],prop):
-                    bone = obj.data.bones[bone_name]
-                    
-                elif hasattr(obj.pose.bones[bone_name],prop):
-                    bone = obj.pose.bones[bone_name]
+    bone_name = path.collection_key("bones")
+    if obj.type == "ARMATURE" and isinstance(bone_name,str) and bone_name in index.bones(obj):
+        prop = path.last
+        for bone in (index.bones(obj)[bone_name],index.pose_bones(obj)[bone_name]):
+            if prop.kind == "ATTRIBUTE" and hasattr(bone,prop.value):
                 return bone, "BONE_PROPERTY"
-                        
-                    
+            elif prop.kind == "KEY" and prop.value in bone.keys():
+                return bone, "BONE_PROPERTY"
+    
+    if path.is_simple:
+        ### return if property is found in object    
+        if hasattr(obj,prop_name):
+            return obj, "OBJECT_PROPERTY"
         
-    ### return if property is found in object    
-    if hasattr(obj,prop_name):
-        return obj, "OBJECT_PROPERTY"
+        ### return if property is found in object data (armature, mesh)
+        if hasattr(data,prop_name):
+            return data, "OBECT_DATA_PROPERTY"
+        
+        ### return if property is found in material
+        if mat != None and hasattr(mat,prop_name):
+            return mat, "MATERIAL_PROPERTY"
+        
+        ### return if property is found in texture
+        if tex != None and hasattr(tex,prop_name):
+            return tex, "TEXTURE_PROPERTY"
     
-    ### return if property is found in object data (armature, mesh)
-    if hasattr(data,prop_name):
-        return data, "OBECT_DATA_PROPERTY"
+    ### return if property is found in object constraint
+    const_name = path.collection_key("constraints")
+    if len(keys) == 1 and isinstance(const_name,str) and const_name in index.constraints(obj):
+        return index.constraints(obj)[const_name], "OBJECT_CONSTRAINT_PROPERTY"
+    return None
+
+def resolve_driver_path(context,obj,prop_data_path,property_type,index=None):
+    """
+    Resolves prop_data_path on obj and returns the struct that gets the driver and the data path relative to it.
+    Returns (None, None) if the property has not been found.
+    """
+    with get_phase_timer().phase("resolve"):
+        prop_object = get_prop_object(None,context,prop_data_path,obj,index)
+    if prop_object == None:
+        return None, None
+    data, prop_type = prop_object
+    if data == obj and property_type == "OBECT_DATA_PROPERTY":
+        data = data.data
+    if prop_type in ["MODIFIER_PROPERTY","OBJECT_CONSTRAINT_PROPERTY"]:
+        data_path = prop_data_path.split(".")[1]
+    elif prop_type in ["BONE_PROPERTY"]:
+        if prop_data_path.rfind("]") == len(prop_data_path)-1: ### this is used for props of that type: bones["bone_name"]["property_name"]
+            from_idx = prop_data_path.rfind("[")
+            to_idx = prop_data_path.rfind("]")+1
+            data_path = prop_data_path[from_idx:to_idx]
+        else: ### this is used for props of that type: bones["bone_name"].property_name
+            data_path = prop_data_path.split(".")[1]
+    elif prop_type in ["BONE_CONSTRAINT_PROPERTY"]  :  
+        string_elements = prop_data_path.split(".")
+        data_path = string_elements[len(string_elements)-1]
+    elif "texture_slots" in prop_data_path and "[" in prop_data_path:
+        data_path = prop_data_path.split(".")[1]
+    else:    
+        data_path = prop_data_path
+    return data, data_path
+
+def add_property_driver(context,obj,prop_data_path,property_type,index=None):
+    """
+    Resolves prop_data_path on obj and adds a driver to it.
+    Returns a list of the driver fcurves, which is empty if the property has not been found.
+    """
+    data, data_path = resolve_driver_path(context,obj,prop_data_path,property_type,index)
+    if data == None:
+        return []
+    with get_phase_timer().phase("driver_add"):
+        curve = data.driver_add(data_path)
     
-    ### return if property is found in material
-    if mat != None and hasattr(mat,prop_name):
-        return mat, "MATERIAL_PROPERTY"
-        
+    if type(curve) == list:
+        curves = [c for c in curve if c != None]
+    elif curve != None:
+        curves = [curve]
+    else:
+        curves = []
+    ### later find_property_drivers calls of the run read the drivers table of the index
+    if index != None:
+        index.add_drivers(data.id_data,curves)
+    return curves
+
+def find_property_drivers(context,obj,prop_data_path,property_type,index=None):
+    """Returns the existing driver fcurves of prop_data_path on obj without adding or touching any driver."""
+    data, data_path = resolve_driver_path(context,obj,prop_data_path,property_type,index)
+    if data == None:
+        return []
+    if index == None:
+        index = RigIndex()
+    return index.drivers(data.id_data).get(data.path_from_id(data_path),[])
+
+def setup_driver_target(curve,driver_obj,bone_name,space,transform_type):
+    """Turns curve into a SUM driver with one TRANSFORMS variable that reads transform_type of driver_obj/bone_name."""
+    if len(curve.driver.variables) < 1:
+        curve_var = curve.driver.variables.new()
+    else:
+        curve_var = curve.driver.variables[0]
     
-    ### return if property is found in texture
-    if tex != None and hasattr(tex,prop_name):
-        return tex, "TEXTURE_PROPERTY"
+    if len(curve.modifiers) > 0:
+        curve.modifiers.remove(curve.modifiers[0])
+    curve.driver.type = "SUM"
+    curve_var.type = "TRANSFORMS"
+    ### setup driver object/bone
+    curve_var.targets[0].id = driver_obj
+    if driver_obj.type == "ARMATURE" and bone_name != None:
+        curve_var.targets[0].bone_target = bone_name
+    curve_var.targets[0].transform_space = space
+    curve_var.targets[0].transform_type = transform_type
+
+def get_driver_changes(curve,driver_obj,op):
+    """
+    Compares an existing driver fcurve with a DriverOp and returns the set of parts that differ:
+    "DRIVER" (driver/variable type or modifiers), "TARGET" (id, bone, space, transform type) and "KEYFRAMES".
+    """
+    changes = set()
+    driver = curve.driver
+    if driver.type != "SUM" or len(driver.variables) < 1 or driver.variables[0].type != "TRANSFORMS" or len(curve.modifiers) > 0:
+        return {"DRIVER","TARGET","KEYFRAMES"}
     
-    ### return if property is found in object constraint
-    if '"' in prop_name and "constraint" in prop_name:
-        if len(prop_name.split('"')) == 3:
-            const_name = prop_name.split('"')[1]
-            if const_name in obj.constraints:
-                return obj.constraints[const_name], "OBJECT_CONSTRAINT_PROPERTY"
+    target = driver.variables[0].targets[0]
+    bone_name = op.bone if driver_obj.type == "ARMATURE" and op.bone != None else target.bone_target
+    if target.id != driver_obj or target.bone_target != bone_name or target.transform_space != op.space or target.transform_type != op.transform_type:
+        changes.add("TARGET")
+    
+    points,interpolations = sort_keyframes(op.points,op.interpolation)
+    coordinates = read_keyframes(curve)
+    if len(coordinates) != len(points)*2:
+        changes.add("KEYFRAMES")
+    else:
+        expected = [value for point in points for value in point]
+        if any(abs(a-b) > 1e-5 for a,b in zip(coordinates,expected)):
+            changes.add("KEYFRAMES")
+        elif any(point.interpolation != interpolation for point,interpolation in zip(curve.keyframe_points,interpolations)):
+            changes.add("KEYFRAMES")
+    return changes
+
+def get_mirror_plan(plan,index):
+    """Returns the mirrored operations of plan, using name pair indices of the driver and driven objects."""
+    bone_pairs = {}
+    name_pairs_by_object = {}
+    driver_names = set()
+    for op in plan:
+        driver_obj = bpy.data.objects.get(op.driver)
+        if driver_obj != None and op.driver not in driver_names:
+            driver_names.add(op.driver)
+            bone_pairs.update(build_mirror_index(index.pose_bones(driver_obj).keys()))
+        obj = bpy.data.objects.get(op.object)
+        if obj != None and op.object not in name_pairs_by_object:
+            names = list(index.key_blocks(obj).keys()) + list(index.bones(obj).keys()) + list(index.modifiers(obj).keys()) + list(index.constraints(obj).keys())
+            name_pairs_by_object[op.object] = build_mirror_index(names)
+    return mirror_plan(plan,bone_pairs,name_pairs_by_object)
+
+def apply_driver_plan(context,plan,index=None,incremental=False,stats=None):
+    """
+    Applies a list of DriverOp from driver_plan in one pass.
+    All drivers are added first, then their targets are set and at last the keyframes are written,
+    so every stage touches the datablocks in one go.
+    With incremental existing drivers are compared with the plan and only the differing parts are patched,
+    identical drivers are not touched at all. stats is an optional dict that gets the counts of
+    "created", "patched" and "unchanged" drivers.
+    Returns a list with the number of driver fcurves for every op of plan.
+    """
+    if index == None:
+        index = RigIndex()
+    if stats == None:
+        stats = {}
+    for key in ("created","patched","unchanged"):
+        stats.setdefault(key,0)
+    curve_counts = [0] * len(plan)
+    op_curves = []
+    for i,op in order_plan(plan):
+        obj = bpy.data.objects.get(op.object)
+        driver_obj = bpy.data.objects.get(op.driver)
+        if obj == None or driver_obj == None:
+            continue
+        try:
+            curves = []
+            if incremental:
+                curves = find_property_drivers(context,obj,op.data_path,op.property_type,index)
+            if len(curves) > 0:
+                curve_changes = [get_driver_changes(curve,driver_obj,op) for curve in curves]
+                stats["unchanged"] += len([changes for changes in curve_changes if len(changes) == 0])
+                stats["patched"] += len([changes for changes in curve_changes if len(changes) > 0])
+            else:
+                curves = add_property_driver(context,obj,op.data_path,op.property_type,index)
+                curve_changes = [{"DRIVER","TARGET","KEYFRAMES"} for curve in curves]
+                stats["created"] += len(curves)
+        except (TypeError,RuntimeError,AttributeError):
+            ### property can not be animated
+            continue
+        curve_counts[i] = len(curves)
+        op_curves.append((op,obj,driver_obj,list(zip(curves,curve_changes))))
+    
+    with get_phase_timer().phase("target_setup"):
+        for op,obj,driver_obj,curves in op_curves:
+            for curve,changes in curves:
+                patch_driver_target(curve,driver_obj,op,changes)
+    
+    ### unchanged drivers keep their entries, drivers that were never mapped are found by rebuilding the map
+    with get_phase_timer().phase("driver_map"):
+        record_drivers(context.scene,[(obj,curve.id_data,curve) for op,obj,driver_obj,curves in op_curves for curve,changes in curves if len(changes) > 0])
+    
+    ### every fcurve is updated once after all keyframes have been written
+    with BulkEditSession():
+        for op,obj,driver_obj,curves in op_curves:
+            for curve,changes in curves:
+                if "KEYFRAMES" in changes:
+                    write_keyframes(curve,op.points,op.interpolation)
+    return curve_counts
+
+def patch_driver_target(curve,driver_obj,op,changes):
+    """Updates driver and target of curve, only the fields of the parts in changes (see get_driver_changes) are written."""
+    if "DRIVER" in changes:
+        setup_driver_target(curve,driver_obj,op.bone,op.space,op.transform_type)
+    elif "TARGET" in changes:
+        target = curve.driver.variables[0].targets[0]
+        if target.id != driver_obj:
+            target.id = driver_obj
+        if driver_obj.type == "ARMATURE" and op.bone != None and target.bone_target != op.bone:
+            target.bone_target = op.bone
+        if target.transform_space != op.space:
+            target.transform_space = op.space
+        if target.transform_type != op.transform_type:
+            target.transform_type = op.transform_type
+
+_enum_items_cache = {}
+_dialog_session = 0
+
+### transform types of the operator that are named differently in the Action constraint
+ACTION_CHANNELS = {"LOC_X":"LOCATION_X","LOC_Y":"LOCATION_Y","LOC_Z":"LOCATION_Z","ROT_X":"ROTATION_X","ROT_Y":"ROTATION_Y","ROT_Z":"ROTATION_Z"}
+
+def setup_action_constraint(const,target,subtarget,action,settings):
+    """Makes the Action constraint const play action while the subtarget bone of target moves, see add_action_constraints for settings."""
+    if "LOCAL" in settings["space"]:
+        const.target_space = "LOCAL"
+    elif "WORLD" in settings["space"]:
+        const.target_space = "WORLD"
+    const.target = target
+    const.subtarget = subtarget
+    const.transform_channel = ACTION_CHANNELS.get(settings["type"],settings["type"])
+    const.min = settings["min"]
+    const.max = settings["max"]
+    const.frame_start = settings["frame_start"]
+    const.frame_end = settings["frame_end"]
+    const.action = action
+
+def add_action_constraints(obj,bone_names,target,subtarget,action,settings,incremental=False):
+    """
+    Adds an Action constraint driven by the subtarget bone of target to every pose bone of obj in bone_names.
+    settings has the keys "type", "space", "min", "max", "frame_start" and "frame_end" of the operator.
+    With incremental a bone that already has a registered Action constraint of action gets it updated
+    instead of a second one. Returns the number of constraints that have been set up.
+    """
+    existing = {}
+    if incremental:
+        for owner_name,owner,const in iter_tagged_constraints(obj,"ACTION",owner_names=bone_names):
+            if const.action == action:
+                existing[owner_name] = const
+    count = 0
+    for bone_name in bone_names:
+        bone = obj.pose.bones.get(bone_name)
+        if bone == None or (obj == target and bone_name == subtarget):
+            continue
+        const = existing.get(bone_name)
+        if const == None:
+            const = bone.constraints.new("ACTION")
+            tag_constraint(obj,"ACTION",bone_name,const.name)
+        setup_action_constraint(const,target,subtarget,action,settings)
+        count += 1
+    touch(obj)
+    return count
+
+def get_cached_enum_items(name,key,build_items):
+    """
+    Returns the enum items of the dynamic enum name and rebuilds them with build_items only if key changed.
+    The cache also keeps the strong references to the item strings Blender needs for dynamic enums.
+    """
+    entry = _enum_items_cache.get(name)
+    if entry == None or entry[0] != key:
+        entry = (key,build_items())
+        _enum_items_cache[name] = entry
+    return entry[1]
+
+def get_driven_object(context):
+    """Returns the object that gets the driver, the first selected object that is not the active one."""
+    if len(context.selected_objects) > 1:
+        for obj in context.selected_objects:
+            if obj != context.scene.objects.active:
+                return obj
+        return None
+    return context.selected_objects[0]
+
+def build_property_type_items(obj_type):
+    object_data_icon = "MESH_DATA"
+    if obj_type == "ARMATURE":
+        object_data_icon = "ARMATURE_DATA"
+    
+    items = []
+    items.append(("OBJECT_PROPERTY","Object Property","Object Property","OBJECT_DATAMODE",0))
+    if obj_type in ["MESH","CURVE"]:
+        items.append(("SHAPEKEY_PROPERTY","Shapekey Property","Shapekey Property","SHAPEKEY_DATA",1))
+        items.append(("MODIFIER_PROPERTY","Modifier Property","Modifier Property","MODIFIER",5))
+    items.append(("OBECT_DATA_PROPERTY","Data Property","Data Property",object_data_icon,2))
+    items.append(("MATERIAL_PROPERTY","Material Property","Material Property","MATERIAL",3))
+    items.append(("TEXTURE_PROPERTY","Texture Property","Texture Property","TEXTURE",4))
+    items.append(("BONE_PROPERTY","Bone Property","Bone Property","BONE_DATA",6))
+    items.append(("BONE_CONSTRAINT_PROPERTY","Bone Constraint Property","Bone Constraint Property","CONSTRAINT_BONE",7))
+    items.append(("OBJECT_CONSTRAINT_PROPERTY","Object Constraint Property","Object Constraint Property","CONSTRAINT",8))
+    return items
 
 def get_action_length(action):
-    action_length = 0
-    for fcurve in action.fcurves:
-        if len(fcurve.keyframe_points) > 0:
-            length = fcurve.keyframe_points[len(fcurve.keyframe_points)-1].co[0]
-            action_length = max(action_length,length)
-    return action_length
+    return int(max(0,get_action_info(action).frame_end))
 
 class CreateDriverConstraint(bpy.types.Operator):
     #"""This Operator creates a driver for a shape and connects it to a posebone transformation"""
     bl_idname = "object.create_driver_constraint"
     bl_label = "Create Driver Constraint"
     bl_description = "This Operator creates a driver for a shape and connects it to a posebone transformation"
+    ### one undo step per run. REGISTER is left out, the redo panel can't restore the driver that invoke picks
+    bl_options = {'UNDO'}
     
     @classmethod
     def poll(cls, context):
@@ -140,95 +433,88 @@ class CreateDriverConstraint(bpy.types.Operator):
         return True
     
     def get_shapes(self,context):
-        shapes = []
-        i=0
-        
-        if len(context.selected_objects) > 1:
-            obj = None
-            for obj2 in context.selected_objects:
-                if obj2 != context.scene.objects.active:
-                    obj = obj2
-                    break
-        else:
-            obj = context.selected_objects[0]
-        shape_keys = None
-        if obj.type in ["MESH","CURVE"] and obj.data.shape_keys != None:
-            shape_keys = obj.data.shape_keys.key_blocks
-              
-        if shape_keys != None:
-            for shape in shape_keys:
-                if shape.relative_key != shape:
-                    shapes.append((shape.name,shape.name,shape.name,'SHAPEKEY_DATA',i)) 
-                    i+=1
-        shapes.append(("CREATE_NEW_SHAPE","create new shape","create new shape",'NEW',i)) 
+        obj = get_driven_object(context)
+        key = (_dialog_session,obj.as_pointer(),get_generation("shape_keys"))
         
-            
-        return shapes
+        def build_items():
+            shapes = []
+            i=0
+            shape_keys = None
+            if obj.type in ["MESH","CURVE"] and obj.data.shape_keys != None:
+                shape_keys = obj.data.shape_keys.key_blocks
+                  
+            if shape_keys != None:
+                for shape in shape_keys:
+                    if shape.relative_key != shape:
+                        shapes.append((shape.name,shape.name,shape.name,'SHAPEKEY_DATA',i)) 
+                        i+=1
+            shapes.append(("CREATE_NEW_SHAPE","create new shape","create new shape",'NEW',i)) 
+            return shapes
+        return get_cached_enum_items("shapes",key,build_items)
     
     def search_for_prop(self,context):
         wm = context.window_manager
         if hasattr(self,"property_type") and self.prop_data_path != "":
-            if len(context.selected_objects) > 1:
-                obj = None
-                for obj2 in context.selected_objects:
-                    if obj2 != context.scene.objects.active:
-                        obj = obj2
-                        break
-            else:
-                obj = context.selected_objects[0]
+            obj = get_driven_object(context)
             
-            if get_prop_object(self,context,self.prop_data_path,obj) != None:
-                self.property_type = get_prop_object(self,context,self.prop_data_path,obj)[1]
+            prop_object = get_prop_object(self,context,self.prop_data_path,obj)
+            if prop_object != None:
+                self.property_type = prop_object[1]
             else:
                 self.prop_data_path = ""    
+    
+    def set_shape_path(self,context):
+        if self.shape_name != "CREATE_NEW_SHAPE":
+            self.prop_data_path = 'key_blocks["' + self.shape_name.replace('"','\\"') + '"].value'
  
     
     def get_actions(self,context):
-        ACTIONS = []
-        for i,action in enumerate(bpy.data.actions):
-            ACTIONS.append((action.name,action.name,action.name,"ACTION",i))
-        return ACTIONS
+        ### the names are the items, so renaming an action rebuilds them
+        key = tuple(bpy.data.actions.keys())
+        
+        def build_items():
+            ACTIONS = []
+            for i,action in enumerate(bpy.data.actions):
+                ACTIONS.append((action.name,action.name,action.name,"ACTION",i))
+            return ACTIONS
+        return get_cached_enum_items("actions",key,build_items)
+    
+    def get_limit_actions(self,context):
+        key = tuple(bpy.data.actions.keys())
+        
+        def build_items():
+            ACTIONS = [("ACTIVE_ACTION","Active Action","Action of the driver object","ACTION",0)]
+            for i,action in enumerate(bpy.data.actions):
+                ACTIONS.append((action.name,action.name,action.name,"ACTION",i+1))
+            return ACTIONS
+        return get_cached_enum_items("limit_actions",key,build_items)
+    
+    def update_limits(self,context):
+        if self.get_limits_auto:
+            self.driver = None
+            if context.active_object.type == "ARMATURE" and context.active_pose_bone != None:
+                self.driver = context.active_pose_bone
+            elif context.active_object.type in ["MESH","EMPTY"]:
+                self.driver = context.active_object
+            if self.driver != None:
+                self.limit_type = self.set_defaults(context)
     
     def get_action_constraints(self,context):
-        action_names = []
-        ACTIONS = []
-        i = 0
-        for bone in context.selected_pose_bones:
-            for const in bone.constraints:
-                if const.name not in action_names:
-                    action_names.append(const.name)
-                    ACTIONS.append((const.name,const.name,const.name,"ACTION",i))
-                    i += 1
-        ACTIONS.append(("ALL_ACTIONS","All Actions","All Actions","ACTION",i))            
-        return ACTIONS            
-                    
+        ### scripted calls skip invoke and its dialog session, so the selected bones are part of the key too
+        bone_names = tuple(bone.name for bone in context.selected_pose_bones or ())
+        key = (_dialog_session,context.active_object.as_pointer(),bone_names,get_generation("objects"))
+        
+        def build_items():
+            ACTIONS = []
+            for i,name in enumerate(get_tagged_names(context.active_object,"ACTION",bone_names)):
+                ACTIONS.append((name,name,name,"ACTION",i))
+            ACTIONS.append(("ALL_ACTIONS","All Actions","All Actions","ACTION",len(ACTIONS)))
+            return ACTIONS
+        return get_cached_enum_items("action_constraints",key,build_items)
     
     def get_property_type_items(self,context):
-        if len(context.selected_objects) > 1:
-            obj = None
-            for obj2 in context.selected_objects:
-                if obj2 != context.scene.objects.active:
-                    obj = obj2
-                    break
-        else:
-            obj = context.selected_objects[0]
-        
-        object_data_icon = "MESH_DATA"
-        if obj.type == "ARMATURE":
-            object_data_icon = "ARMATURE_DATA"
-        
-        items = []
-        items.append(("OBJECT_PROPERTY","Object Property","Object Property","OBJECT_DATAMODE",0))
-        if obj.type in ["MESH","CURVE"]:
-            items.append(("SHAPEKEY_PROPERTY","Shapekey Property","Shapekey Property","SHAPEKEY_DATA",1))
-            items.append(("MODIFIER_PROPERTY","Modifier Property","Modifier Property","MODIFIER",5))
-        items.append(("OBECT_DATA_PROPERTY","Data Property","Data Property",object_data_icon,2))
-        items.append(("MATERIAL_PROPERTY","Material Property","Material Property","MATERIAL",3))
-        items.append(("TEXTURE_PROPERTY","Texture Property","Texture Property","TEXTURE",4))
-        items.append(("BONE_PROPERTY","Bone Property","Bone Property","BONE_DATA",6))
-        items.append(("BONE_CONSTRAINT_PROPERTY","Bone Constraint Property","Bone Constraint Property","CONSTRAINT_BONE",7))
-        items.append(("OBJECT_CONSTRAINT_PROPERTY","Object Constraint Property","Object Constraint Property","CONSTRAINT",8))
-        return items
+        obj = get_driven_object(context)
+        return get_cached_enum_items("property_types",obj.type,lambda: build_property_type_items(obj.type))
     
     def driver_limits_flip(self,context):
         val1 = float(self.min_value)
@@ -247,8 +533,8 @@ class CreateDriverConstraint(bpy.types.Operator):
     
     
     def get_animation_length(self,context):
-        action = bpy.data.actions[self.action]
-        self.action_frame_end = get_action_length(action)
+        if self.action in bpy.data.actions:
+            self.action_frame_end = get_action_length(bpy.data.actions[self.action])
     
     
     mode = bpy.props.EnumProperty(name="Operator Mode",items=(("DRIVER","Driver","Driver"),("ACTION","Action","Action")))
@@ -257,8 +543,13 @@ class CreateDriverConstraint(bpy.types.Operator):
     
     prop_data_path = bpy.props.StringProperty(name="Property Data Path", default="",update=search_for_prop)
     
-    shape_name = bpy.props.EnumProperty(items = get_shapes, name = "Shape", description="Select the shape you want to add a driver to.")
+    ### not remembered between runs, a remembered create new shape would replace a path taken from the clipboard
+    shape_name = bpy.props.EnumProperty(items = get_shapes, name = "Shape", description="Select the shape you want to add a driver to.",update=set_shape_path,options={'SKIP_SAVE'})
+    new_shape_name = bpy.props.StringProperty(name="New Shape", default="Corrective", description="Name of the corrective shape that will be created.")
+    shape_threshold = bpy.props.FloatProperty(name="Threshold", default=0.0001, min=0.0, precision=5, description="Vertices that moved less than this keep the basis position.")
     get_limits_auto = bpy.props.BoolProperty(name = "Get Limits",default=True,description="This will set the limits based on the bone location/rotation/scale automatically.")
+    limits_source = bpy.props.EnumProperty(name="Limits From",items=(("POSE","Current Pose","Get the limits from the current pose of the bone"),("ACTION","Animation","Get the limits from the whole animation of the bone")),description="Where the limits are taken from.",update=update_limits)
+    limits_action = bpy.props.EnumProperty(name="Limits Action",items=get_limit_actions,description="Action the limits are sampled from.",update=update_limits)
     
     
     int_type_values = []
@@ -266,6 +557,8 @@ class CreateDriverConstraint(bpy.types.Operator):
     int_type_values.append(("CONSTANT","Constant","Constant","IPO_CONSTANT",1))
     int_type_values.append(("BEZIER","Bezier","Bezier","IPO_BEZIER",2))
     interpolation_type = bpy.props.EnumProperty(name = "Interpolation Type",items=int_type_values, description="Defines the transition from one value to another.")
+    response_curve = bpy.props.EnumProperty(name = "Response Curve",items=RESPONSE_CURVES, description="Shape of the curve that maps the driver limits to the property limits.")
+    response_points = bpy.props.IntProperty(name = "Curve Points",default=5,min=3,max=64, description="Number of keyframes used for non linear response curves.")
     
     type_values = []
     type_values.append(("LOC_X","X Location","X Location","None",0))
@@ -280,8 +573,8 @@ class CreateDriverConstraint(bpy.types.Operator):
     type = bpy.props.EnumProperty(name = "Type",items=type_values, description="Set the type you want to be used as input to drive the shapekey.")
     
     action = bpy.props.EnumProperty(name="Action",items=get_actions,description="Choose Action that will be driven by Bone",update=get_animation_length)
-    action_constraint = bpy.props.EnumProperty(name="Action",items=get_action_constraints,description="Choose Action Constraint that will be deleted for selected bones.")
-    action_mode = bpy.props.EnumProperty(name="Action",items=(("ADD_CONSTRAINT","Add Constraints","Add Constraints"),("DELETE_CONSTRAINT","Delete Constraints","Delete Constraints")),description="Delete or Add Action Constraints for selected bones.")
+    action_constraint = bpy.props.EnumProperty(name="Action",items=get_action_constraints,description="Choose Action Constraint that will be deleted or retargeted for selected bones.")
+    action_mode = bpy.props.EnumProperty(name="Action",items=(("ADD_CONSTRAINT","Add Constraints","Add Constraints"),("DELETE_CONSTRAINT","Delete Constraints","Delete Constraints"),("RETARGET_CONSTRAINT","Retarget Constraints","Drive the Action Constraints of the selected bones with the active bone")),description="Add, Delete or Retarget Action Constraints for selected bones.")
     
     space_values = []
     space_values.append(("LOCAL_SPACE","Local Space","Local Space","None",0))
@@ -300,7 +593,11 @@ class CreateDriverConstraint(bpy.types.Operator):
     flip_driver_limits = bpy.props.BoolProperty(name = "Flip Driver Limits",default=False,description="This Bool Property flips the Driver Limits.",update=driver_limits_flip)
     flip_property_limits = bpy.props.BoolProperty(name = "Flip Property Limits",default=False,description="This Bool Property flips the Property Limits.",update=property_limits_flip)
     
+    create_mirrored = bpy.props.BoolProperty(name = "Create Mirrored",default=False,description="Also creates the driver for the other side (.L/.R, _l/_r) with mirrored X axis.")
+    only_update_changed = bpy.props.BoolProperty(name = "Update Changed Only",default=True,description="Existing drivers are compared with the settings and only the differing parts are updated.")
     set_driver_limit_constraint = bpy.props.BoolProperty(name = "Set Driver limit Constraint",default=False,description="Set Driver Limit Constraint with given settings.")
+    record_phases = bpy.props.BoolProperty(name = "Record Phases",default=False,description="Time the phases of the run and append them to the phase log.")
+    phase_log = bpy.props.StringProperty(name = "Phase Log",default="",subtype="FILE_PATH",description="JSON lines file the phase timings are appended to. Printed to the console if empty.")
     driver = None
     limit_type = None   
     
@@ -312,14 +609,43 @@ class CreateDriverConstraint(bpy.types.Operator):
             row.label(text="Property Type")
             row.prop(self,"property_type",text="")
             
+            if self.property_type == "SHAPEKEY_PROPERTY":
+                row = layout.row()
+                row.label(text="Shape")
+                row.prop(self,"shape_name",text="")
+                if self.shape_name == "CREATE_NEW_SHAPE":
+                    row = layout.row()
+                    row.label(text="New Shape")
+                    row.prop(self,"new_shape_name",text="")
+                    
+                    row = layout.row()
+                    row.label(text="Threshold")
+                    row.prop(self,"shape_threshold",text="")
+            
             row = layout.row()
             row.label(text="Get Driver Limits")
             row.prop(self,"get_limits_auto",text="")
+            if self.get_limits_auto:
+                row = layout.row()
+                row.label(text="Limits From")
+                row.prop(self,"limits_source",text="")
+                if self.limits_source == "ACTION":
+                    row = layout.row()
+                    row.label(text="Limits Action")
+                    row.prop(self,"limits_action",text="")
             
             row = layout.row()
             row.label(text="Set Driver Limits")
             row.prop(self,"set_driver_limit_constraint",text="")
             
+            row = layout.row()
+            row.label(text="Create Mirrored")
+            row.prop(self,"create_mirrored",text="")
+            
+            row = layout.row()
+            row.label(text="Update Changed Only")
+            row.prop(self,"only_update_changed",text="")
+            
             row = layout.row()
             row.label(text="Property Data Path")
             row.prop(self,"prop_data_path",text="")
@@ -350,6 +676,12 @@ class CreateDriverConstraint(bpy.types.Operator):
             row.label(text="Interpolation Type")
             row.prop(self,"interpolation_type",text="")
             
+            row = layout.row()
+            row.label(text="Response Curve")
+            row.prop(self,"response_curve",text="")
+            if self.response_curve != "LINEAR":
+                row.prop(self,"response_points",text="")
+            
             row = layout.row()
             col = row.column()
             col.label(text="Property Limits")
@@ -404,67 +736,72 @@ class CreateDriverConstraint(bpy.types.Operator):
                 col1 = row1.column(align=True)
                 col1.prop(self,"action_frame_start",text="Start")
                 col1.prop(self,"action_frame_end",text="End")
-            elif self.action_mode == "DELETE_CONSTRAINT":
+            elif self.action_mode in ["DELETE_CONSTRAINT","RETARGET_CONSTRAINT"]:
                 col = layout.column()
                 row = layout.row()
                 row.label(text="Action")
                 row.prop(self,"action_constraint",text="")  
         
+        ### phase timing is a developer option, only shown with --debug
+        if bpy.app.debug:
+            row = self.layout.row()
+            row.prop(self,"record_phases",text="Record Phases")
+            if self.record_phases:
+                row.prop(self,"phase_log",text="")
     
     def create_actions_constraints(self,context):
         if self.action_mode == "ADD_CONSTRAINT":
-            for bone in context.selected_pose_bones:
-                if context.active_pose_bone != bone:
-#                    const = None
-#                    for c in bone.constraints:
-#                        if c.action.name == self.action:
-#                            const = c
-#                    if const == None:        
-                    const = bone.constraints.new("ACTION")
-                    if "LOCAL" in self.space:
-                        const.target_space = "LOCAL"
-                    elif "WORLD" in self.space:
-                        const.target_space = "WORLD"
-                    const.target = context.active_object
-                    const.subtarget = context.active_pose_bone.name 
-                    
-                    
-                    if self.type == "LOC_X":
-                        const.transform_channel = "LOCATION_X"
-                    elif self.type == "LOC_Y":
-                        const.transform_channel = "LOCATION_Y"
-                    elif self.type == "LOC_Z":
-                        const.transform_channel = "LOCATION_Z"
-                    elif self.type == "ROT_X":
-                        const.transform_channel = "ROTATION_X"
-                    elif self.type == "ROT_Y":
-                        const.transform_channel = "ROTATION_Y"
-                    elif self.type == "ROT_Z":
-                        const.transform_channel = "ROTATION_Z"
-                    else:
-                        const.transform_channel = self.type    
-                    
-                    
-                    const.min = self.min_value
-                    const.max = self.max_value
-                    const.frame_start = self.action_frame_start
-                    const.frame_end = self.action_frame_end
-                    const.action = bpy.data.actions[self.action]
-            bpy.ops.ed.undo_push(message="Action Constraints generated.")
+            if self.action not in bpy.data.actions:
+                self.report({'WARNING'},"Action " + self.action + " has not been found.")
+                return
+            bone_names = [bone.name for bone in context.selected_pose_bones if bone != context.active_pose_bone]
+            settings = {"type":self.type,"space":self.space,"min":self.min_value,"max":self.max_value,
+                        "frame_start":self.action_frame_start,"frame_end":self.action_frame_end}
+            add_action_constraints(context.active_object,bone_names,context.active_object,context.active_pose_bone.name,bpy.data.actions[self.action],settings)
             self.report({'INFO'},"Action constraints generated.")
         elif self.action_mode == "DELETE_CONSTRAINT":
-            for bone in context.selected_pose_bones:
-                for const in bone.constraints:
-                    if (const.name == self.action_constraint):# or (self.action_constraint == "ALL_ACTIONS"):
-                        #bone.constraints.remove(const)
-                        #if self.action_constraint != "ALL_ACTIONS":
-                        #    break
-                        pass
-            bpy.ops.ed.undo_push(message="Action Constraints deleted.")
-            self.report({'INFO'},"Action constraints deleted.")            
+            ### only the registered constraints of the selected bones are visited
+            const_name = None if self.action_constraint == "ALL_ACTIONS" else self.action_constraint
+            bone_names = [bone.name for bone in context.selected_pose_bones]
+            count = remove_tagged_constraints(context.active_object,"ACTION",const_name,bone_names)
+            touch(context.active_object)
+            self.report({'INFO'},str(count) + " Action constraints deleted.")
+        elif self.action_mode == "RETARGET_CONSTRAINT":
+            const_name = None if self.action_constraint == "ALL_ACTIONS" else self.action_constraint
+            bone_names = [bone.name for bone in context.selected_pose_bones if bone != context.active_pose_bone]
+            count = retarget_tagged_constraints(context.active_object,"ACTION",context.active_object,context.active_pose_bone.name,const_name,bone_names)
+            touch(context.active_object)
+            self.report({'INFO'},str(count) + " Action constraints retargeted.")
                
     
+    def get_limits_action(self):
+        if self.limits_action != "ACTIVE_ACTION":
+            return bpy.data.actions.get(self.limits_action)
+        animation_data = self.driver.id_data.animation_data
+        return animation_data.action if animation_data != None else None
+    
+    def set_defaults_from_action(self):
+        """Sets type and limits from the sampled animation of the driver. Returns the limit type or None if it isn't animated."""
+        action = self.get_limits_action()
+        if action == None:
+            return None
+        bone_name = self.driver.name if isinstance(self.driver,bpy.types.PoseBone) else None
+        limits = get_animation_limits(sample_transform_ranges(action,bone_name,self.driver.rotation_mode))
+        if limits == None:
+            return None
+        self.type, min_value, max_value, limit_type = limits
+        if limit_type == "LIMIT_ROTATION":
+            min_value, max_value = degrees(min_value), degrees(max_value)
+        self.min_value = min_value
+        self.max_value = max_value
+        return limit_type
+    
     def set_defaults(self,context):
+        if self.limits_source == "ACTION":
+            limit_type = self.set_defaults_from_action()
+            if limit_type != None:
+                return limit_type
+        
         ### set location
         if self.driver.location != Vector((0,0,0)):
             l = [abs(self.driver.location.x),abs(self.driver.location.y),abs(self.driver.location.z)]
@@ -517,165 +854,170 @@ class CreateDriverConstraint(bpy.types.Operator):
 
     
     def execute(self, context):
+        if not self.record_phases:
+            self.run(context)
+            return {'FINISHED'}
+        
+        with PhaseTimer() as timer:
+            self.run(context)
+        record = timer.to_dict()
+        record.update({"time":time.time(),"mode":self.mode,"property":self.prop_data_path,"objects":len(context.selected_objects)})
+        ### the drivers have been created already, a log that can't be written must not abort the operator
+        try:
+            write_phase_record(bpy.path.abspath(self.phase_log) if self.phase_log != "" else "",record)
+        except (IOError,OSError) as error:
+            self.report({'WARNING'},"Phase log could not be written: " + str(error))
+        self.report({'INFO'},"Phases " + timer.summary())
+        return {'FINISHED'}
+    
+    def run(self,context):
         wm = context.window_manager
         context = bpy.context
         scene = context.scene
         active_object = context.active_object
         
-        if self.mode == "DRIVER":
-            self.create_property_driver(wm,context,scene,active_object)
-        elif self.mode == "ACTION":
-            self.create_actions_constraints(context)
-        
-        return {'FINISHED'}
+        with BulkEditSession():
+            if self.mode == "DRIVER":
+                self.create_property_driver(wm,context,scene,active_object)
+            elif self.mode == "ACTION":
+                with get_phase_timer().phase("action_constraints"):
+                    self.create_actions_constraints(context)
         
+    def get_driver_settings(self):
+        """Returns the operator settings in the form driver_plan and the spec batch use."""
+        return {"type":self.type,"space":self.space,"min":self.min_value,"max":self.max_value,
+                "prop_min":self.prop_min_value,"prop_max":self.prop_max_value,"interpolation":self.interpolation_type,
+                "response_curve":self.response_curve,"response_points":self.response_points}
+    
+    def get_driver_plan(self,context,index,prop_data_path=None,object_names=None):
+        """Plans the drivers of prop_data_path, defaults to the operator's path, on object_names, defaults to the driven selected objects."""
+        if prop_data_path == None:
+            prop_data_path = self.prop_data_path
+        if object_names == None:
+            object_names = []
+            for obj in context.selected_objects:
+                if obj != context.scene.objects.active or len(context.selected_objects) == 1:
+                    object_names.append(obj.name)
+        bone_name = None
+        if context.active_object.type == "ARMATURE" and context.active_pose_bone != None:
+            bone_name = context.active_pose_bone.name
+        plan = plan_property_drivers(object_names,prop_data_path,self.property_type,context.active_object.name,bone_name,self.get_driver_settings())
+        if self.create_mirrored:
+            plan += get_mirror_plan(plan,index)
+        return plan
+    
+    def create_new_shapes(self,context):
+        """
+        Captures a corrective shape on every driven mesh. Returns the data path of the new key blocks and
+        the names of the objects that got one. prop_data_path is left alone, its update would resolve the path
+        before the new key blocks are known.
+        """
+        objects = [obj for obj in context.selected_objects if obj.type == "MESH" and (obj != context.active_object or len(context.selected_objects) == 1)]
+        name = get_unique_shape_name(objects,self.new_shape_name)
+        object_names = []
+        for obj in objects:
+            if create_corrective_shape(obj,context.scene,name,self.shape_threshold)[0] != None:
+                object_names.append(obj.name)
+                touch(obj)
+        bump_generation("shape_keys")
+        return 'key_blocks["' + name.replace('"','\\"') + '"].value', object_names
+    
     def create_property_driver(self,wm,context,scene,active_object):
-        if len(context.selected_objects) > 1:
-            obj = None
-            for obj2 in context.selected_objects:
-                if obj2 != context.scene.objects.active:
-                    obj = obj2
-                    break
-        else:
-            obj = context.selected_objects[0]    
+        prop_data_path = self.prop_data_path
+        object_names = None
+        if self.property_type == "SHAPEKEY_PROPERTY" and self.shape_name == "CREATE_NEW_SHAPE":
+            with get_phase_timer().phase("create_shapes"):
+                prop_data_path,object_names = self.create_new_shapes(context)
+            if len(object_names) == 0:
+                self.report({'WARNING'},"The shape could not be captured, modifiers may change the vertex count.")
+                return
+        index = RigIndex()
+        with get_phase_timer().phase("plan"):
+            plan = self.get_driver_plan(context,index,prop_data_path,object_names)
+        stats = {}
+        driver_found = sum(apply_driver_plan(context,plan,index,self.only_update_changed,stats)) > 0
         
-        driver_found = False
-        for obj in context.selected_objects:
-            if obj != context.scene.objects.active or len(context.selected_objects) == 1:
-                if get_prop_object(self,context,self.prop_data_path,obj) != None:
-                    prop_type = get_prop_object(self,context,self.prop_data_path,obj)[1]
-                    data = get_prop_object(self,context,self.prop_data_path,obj)[0]
-                    if data == obj and self.property_type == "OBECT_DATA_PROPERTY":
-                        data = data.data
-                    if prop_type in ["MODIFIER_PROPERTY","OBJECT_CONSTRAINT_PROPERTY"]:
-                        data_path = self.prop_data_path.split(".")[1]
-                        curve = data.driver_add(data_path)    
-                    elif prop_type in ["BONE_PROPERTY"]:
-                        if self.prop_data_path.rfind("]") == len(self.prop_data_path)-1: ### this is used for props of that type: bones["bone_name"]["property_name"]
-                            from_idx = self.prop_data_path.rfind("[")
-                            to_idx = self.prop_data_path.rfind("]")+1
-                            data_path = self.prop_data_path[from_idx:to_idx]
-                        else: ### this is used for props of that type: bones["bone_name"].property_name
-                            data_path = self.prop_data_path.split(".")[1]
-                        curve = data.driver_add(data_path)        
-                    elif prop_type in ["BONE_CONSTRAINT_PROPERTY"]  :  
-                        string_elements = self.prop_data_path.split(".")
-                        data_path = string_elements[len(string_elements)-1]
-                        
-                        curve = data.driver_add(data_path)
-                    elif "texture_slots" in self.prop_data_path and "[" in self.prop_data_path:
-                        data_path = self.prop_data_path.split(".")[1]
-                        curve = data.driver_add(data_path)
-                    else:    
-                        curve = data.driver_add(self.prop_data_path)
-                else:
-                    curve = None
-                
-                curves = [curve]
-                if type(curve) == list:
-                    curves = curve
-                
-                ### create driver fcurve which defines how the value is driven
-                for curve in curves:
-                    if curve != None:
-                        driver_found = True
-                        if len(curve.driver.variables) < 1:
-                            curve_var = curve.driver.variables.new()
-                        else:
-                            curve_var = curve.driver.variables[0]
-                        
-                        if len(curve.modifiers) > 0:
-                            curve.modifiers.remove(curve.modifiers[0])
-                        curve.driver.type = "SUM"
-                        curve_var.type = "TRANSFORMS"
-                        ### setup driver object/bone
-                        driver_obj = context.active_object
-                        curve_var.targets[0].id = driver_obj
-                        if driver_obj.type == "ARMATURE":
-                            curve_var.targets[0].bone_target = bpy.context.active_pose_bone.name
-                        curve_var.targets[0].transform_space = self.space
-                        curve_var.targets[0].transform_type = self.type
-                        
-                        if self.type in ["ROT_X","ROT_Y","ROT_Z"]:
-                            min_value = radians(self.min_value)
-                            max_value = radians(self.max_value)
-                        else:
-                            min_value = self.min_value
-                            max_value = self.max_value
-                        
-                        delete_len = 0
-                        for point in curve.keyframe_points:
-                            delete_len += 1
-                        for i in range(delete_len):    
-                            curve.keyframe_points.remove(curve.keyframe_points[0])
-                        
-                        point_a = curve.keyframe_points.insert(min_value,self.prop_min_value)
-                        point_a.interpolation = self.interpolation_type
-                        
-                        point_b = curve.keyframe_points.insert(max_value,self.prop_max_value)
-                        point_b.interpolation = self.interpolation_type
-        
-
-        self.set_limit_constraint(context)        
+        with get_phase_timer().phase("limit_constraint"):
+            self.set_limit_constraint(context)
         
-        if driver_found:
-            msg = self.prop_data_path +" Driver has been added."
+        if driver_found and self.only_update_changed and stats["created"] == 0:
+            msg = prop_data_path +" Driver has been updated ({} changed, {} unchanged).".format(stats["patched"],stats["unchanged"])
+            self.report({'INFO'},msg)
+        elif driver_found:
+            msg = prop_data_path +" Driver has been added."
             self.report({'INFO'},msg)
         else:
-            msg = self.prop_data_path +" Property has not been found."
+            msg = prop_data_path +" Property has not been found."
             self.report({'WARNING'},msg)
 
     def set_limit_constraint(self,context):
         if self.set_driver_limit_constraint:
             if self.limit_type != None:
-                if "Driver Limit" in self.driver.constraints:
-                    self.driver.constraints.remove(self.driver.constraints["Driver Limit"])    
-                const = self.driver.constraints.new(self.limit_type)
-                const.name = "Driver Limit"
-                if "LOCAL" in self.space:
-                    const.owner_space = "LOCAL"
-                elif "WORLD" in self.space:
-                    const_owner_space = "WORLD"    
+                self.add_limit_constraint(self.driver,self.min_value,self.max_value)
+                
+                ### the mirrored bone gets the limits of the other side
+                if self.create_mirrored and isinstance(self.driver,bpy.types.PoseBone):
+                    mirrored_name = mirror_name(self.driver.name)
+                    if mirrored_name != None and mirrored_name in self.driver.id_data.pose.bones:
+                        sign = -1.0 if self.type in MIRROR_FLIP_TYPES else 1.0
+                        self.add_limit_constraint(self.driver.id_data.pose.bones[mirrored_name],self.min_value*sign,self.max_value*sign)
+    
+    def add_limit_constraint(self,driver,min_value,max_value):
+        if "Driver Limit" in driver.constraints:
+            driver.constraints.remove(driver.constraints["Driver Limit"])    
+        const = driver.constraints.new(self.limit_type)
+        const.name = "Driver Limit"
+        tag_constraint(driver.id_data,"LIMIT",get_owner_name(driver),const.name)
+        touch(driver.id_data)
+        if "LOCAL" in self.space:
+            const.owner_space = "LOCAL"
+        elif "WORLD" in self.space:
+            const_owner_space = "WORLD"    
+        
+        if min_value > max_value:
+            min_value, max_value = max_value, min_value
+        if self.limit_type in ["LIMIT_LOCATION","LIMIT_SCALE"]:
+                            
+            if "X" in self.type:
+                const.use_min_x = True
+                const.use_max_x = True 
+                const.min_x = min_value
+                const.max_x = max_value
+            elif "Y" in self.type:
+                const.use_min_y = True
+                const.use_max_y = True 
+                const.min_y = min_value
+                const.max_y = max_value
+            elif "Z" in self.type:
+                const.use_min_z = True
+                const.use_max_z = True
+                const.min_z = min_value
+                const.max_z = max_value
+        elif self.limit_type == "LIMIT_ROTATION":
+            if "X" in self.type:
+                const.use_limit_x = True
+                const.min_x = radians(min_value)
+                const.max_x = radians(max_value)
+            elif "Y" in self.type:
+                const.use_limit_y = True
+                const.min_y = radians(min_value)
+                const.max_y = radians(max_value)
+            elif "Z" in self.type:
+                const.use_limit_z = True
+                const.min_z = radians(min_value)
+                const.max_z = radians(max_value)
                 
-                if self.min_value < self.max_value:
-                    min_value = self.min_value
-                    max_value = self.max_value
-                else:
-                    min_value = self.max_value
-                    max_value = self.min_value
-                if self.limit_type in ["LIMIT_LOCATION","LIMIT_SCALE"]:
-                                    
-                    if "X" in self.type:
-                        const.use_min_x = True
-                        const.use_max_x = True 
-                        const.min_x = min_value
-                        const.max_x = max_value
-                    elif "Y" in self.type:
-                        const.use_min_y = True
-                        const.use_max_y = True 
-                        const.min_y = min_value
-                        const.max_y = max_value
-                    elif "Z" in self.type:
-                        const.use_min_z = True
-                        const.use_max_z = True
-                        const.min_z = min_value
-                        const.max_z = max_value
-                elif self.limit_type == "LIMIT_ROTATION":
-                    if "X" in self.type:
-                        const.use_limit_x = True
-                        const.min_x = radians(min_value)
-                        const.max_x = radians(max_value)
-                    elif "Y" in self.type:
-                        const.use_limit_y = True
-                        const.min_y = radians(min_value)
-                        const.max_y = radians(max_value)
-                    elif "Z" in self.type:
-                        const.use_limit_z = True
-                        const.min_z = radians(min_value)
-                        const.max_z = radians(max_value)
-                        
         
     def invoke(self, context, event):
+        global _dialog_session
+        ### the menus show the entries without counting the selection, so it is checked here
+        if len(context.selected_objects) == 0:
+            self.report({'WARNING'},"Select the objects that get the driver.")
+            return {'CANCELLED'}
+        if self.mode == "ACTION" and (context.active_object.type != "ARMATURE" or len(context.selected_pose_bones or []) < 2):
+            self.report({'WARNING'},"Select the bones that get the action constraint and the driver bone last.")
+            return {'CANCELLED'}
+        _dialog_session += 1
         wm = context.window_manager 
         
         self.driver = None
@@ -685,19 +1027,13 @@ class CreateDriverConstraint(bpy.types.Operator):
             self.driver = context.active_object
             
         
-        if len(context.selected_objects) > 1:
-            obj = None
-            for obj2 in context.selected_objects:
-                if obj2 != context.scene.objects.active:
-                    obj = obj2
-                    break
-        else:
-            obj = context.selected_objects[0]
+        obj = get_driven_object(context)
         
         if wm.clipboard != "":
-            if get_prop_object(self,context,wm.clipboard,obj) != None:
+            prop_object = get_prop_object(self,context,wm.clipboard,obj)
+            if prop_object != None:
                 self.prop_data_path = wm.clipboard
-                self.property_type = get_prop_object(self,context,wm.clipboard,obj)[1]
+                self.property_type = prop_object[1]
             else:
                 self.property_type = "OBJECT_PROPERTY"
         
@@ -708,5 +1044,10 @@ class CreateDriverConstraint(bpy.types.Operator):
         if self.action in bpy.data.actions:
             action = bpy.data.actions[self.action]
             self.action_frame_end = get_action_length(action)
+        
+        ### rigs from older files get their constraint registry here, so the action constraint enum doesn't scan them on every rebuild
+        store_registry(context.active_object)
                 
         return wm.invoke_props_dialog(self)
+
+classes = (CreateDriverConstraint,)
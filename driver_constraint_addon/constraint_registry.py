@@ -0,0 +1,169 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Registry of the Action and Driver Limit constraints the addon created. Constraints can't
+### hold ID properties, so the registry lives on the object that owns them:
+###     obj["driver_constraints"][kind][constraint name][owner name] = 1
+### where the owner name is a pose bone name or OBJECT_OWNER for constraints of the object itself.
+### Listing, removing and retargeting only visit the registered constraints. Objects from older
+### files have no registry, reading them scans their constraints without storing the result, so
+### menus, reports and exports don't change the file. Reads for a few owners only scan those owners.
+### Tagging, untagging and store_registry, which the operator calls from invoke, store it.
+
+from . rig_index import RigIndex
+from . driver_utils import LIMIT_CONSTRAINT_NAME
+
+__reload_order_index__ = -1
+
+REGISTRY_PROPERTY = "driver_constraints"
+CONSTRAINT_KINDS = ("ACTION", "LIMIT")
+OBJECT_OWNER = "#object"
+
+def get_constraint_kind(const):
+    """Returns the registry kind of a constraint the addon could have created, None for others."""
+    if const.type == "ACTION":
+        return "ACTION"
+    if const.name == LIMIT_CONSTRAINT_NAME:
+        return "LIMIT"
+    return None
+
+def iter_constraint_owners(obj, owner_names=None):
+    """Yields (owner name, owner) for obj and its pose bones, only those of owner_names if given."""
+    if owner_names == None:
+        yield OBJECT_OWNER, obj
+        if obj.pose != None:
+            for bone in obj.pose.bones:
+                yield bone.name, bone
+        return
+    for owner_name in owner_names:
+        owner = obj if owner_name == OBJECT_OWNER else (obj.pose.bones.get(owner_name) if obj.pose != None else None)
+        if owner != None:
+            yield owner_name, owner
+
+def scan_registry(obj, owner_names=None):
+    """
+    Returns the registry entries of all constraints of obj that look like the addon's, without storing them.
+    With owner_names only those owners are scanned.
+    """
+    entries = dict((kind, {}) for kind in CONSTRAINT_KINDS)
+    for owner_name, owner in iter_constraint_owners(obj, owner_names):
+        for const in owner.constraints:
+            kind = get_constraint_kind(const)
+            if kind != None:
+                entries[kind].setdefault(const.name, {})[owner_name] = 1
+    return entries
+
+def rebuild_registry(obj):
+    """Stores the scanned registry on obj. Used for files from older versions."""
+    obj[REGISTRY_PROPERTY] = scan_registry(obj)
+
+def get_registry(obj, write=False, owner_names=None):
+    """
+    Returns the registry of obj. Without a stored registry it is scanned, and only stored if write is set.
+    An unstored registry read for owner_names only holds the entries of those owners.
+    """
+    if REGISTRY_PROPERTY in obj:
+        return obj[REGISTRY_PROPERTY]
+    if not write:
+        return scan_registry(obj, owner_names)
+    rebuild_registry(obj)
+    return obj[REGISTRY_PROPERTY]
+
+def store_registry(obj):
+    """Stores the registry of obj if it has none yet, so later reads don't have to scan. Call it from write paths only."""
+    if obj.type == "ARMATURE" and REGISTRY_PROPERTY not in obj:
+        rebuild_registry(obj)
+
+def get_owner_name(owner):
+    """Returns the registry owner name of an object or pose bone."""
+    return OBJECT_OWNER if owner == owner.id_data else owner.name
+
+def tag_constraint(obj, kind, owner_name, const_name):
+    entries = get_registry(obj, write=True)[kind]
+    if const_name not in entries:
+        entries[const_name] = {}
+    entries[const_name][owner_name] = 1
+
+def untag_constraint(obj, kind, owner_name, const_name):
+    entries = get_registry(obj, write=True)[kind]
+    if const_name in entries:
+        owners = entries[const_name]
+        if owner_name in owners:
+            del owners[owner_name]
+        if len(owners) == 0:
+            del entries[const_name]
+
+def get_tagged_names(obj, kind, owner_names=None):
+    """Returns the sorted names of the registered constraints, only those of owner_names if given."""
+    entries = get_registry(obj, owner_names=owner_names)[kind]
+    if owner_names == None:
+        return sorted(entries.keys())
+    return sorted(name for name, owners in entries.items() if any(owner_name in owners for owner_name in owner_names))
+
+def iter_tagged_constraints(obj, kind, const_name=None, owner_names=None, index=None, prune=False):
+    """
+    Yields (owner name, owner, constraint) for the registered constraints of obj, optionally only
+    the ones called const_name or owned by owner_names. Entries whose constraint has been removed
+    or renamed by hand are skipped, and dropped from the registry with prune.
+    """
+    if index == None:
+        index = RigIndex()
+    entries = get_registry(obj)[kind]
+    if const_name == None:
+        names = list(entries.keys())
+    else:
+        names = [const_name] if const_name in entries else []
+
+    stale = []
+    for name in names:
+        owners = entries[name]
+        if owner_names == None:
+            selected_owners = list(owners.keys())
+        else:
+            selected_owners = [owner_name for owner_name in owner_names if owner_name in owners]
+        for owner_name in selected_owners:
+            owner = obj if owner_name == OBJECT_OWNER else index.pose_bones(obj).get(owner_name)
+            const = owner.constraints.get(name) if owner != None else None
+            if const == None:
+                stale.append((owner_name, name))
+                continue
+            yield owner_name, owner, const
+    if prune:
+        for owner_name, name in stale:
+            untag_constraint(obj, kind, owner_name, name)
+
+def remove_tagged_constraints(obj, kind, const_name=None, owner_names=None):
+    """Removes the registered constraints and returns how many have been removed."""
+    found = [(owner_name, owner, const, const.name) for owner_name, owner, const in iter_tagged_constraints(obj, kind, const_name, owner_names, prune=True)]
+    for owner_name, owner, const, name in found:
+        owner.constraints.remove(const)
+        untag_constraint(obj, kind, owner_name, name)
+    return len(found)
+
+def retarget_tagged_constraints(obj, kind, target, subtarget, const_name=None, owner_names=None):
+    """Points the registered constraints to a new target and returns how many have been changed."""
+    count = 0
+    for owner_name, owner, const in iter_tagged_constraints(obj, kind, const_name, owner_names, prune=True):
+        if owner_name == subtarget and target == obj:
+            continue
+        const.target = target
+        const.subtarget = subtarget
+        count += 1
+    return count
@@ -0,0 +1,102 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Captures the current shape key mix of a mesh as a new key block relative to the basis.
+### All vertex data is moved with foreach_get/foreach_set, there is no per vertex python code.
+
+import bpy
+from . lazy_import import numpy as np
+
+__reload_order_index__ = -2
+
+def read_coordinates(vertices):
+    """Returns the coordinates of a vertex or key block point collection as an (n, 3) array."""
+    coordinates = np.empty(len(vertices) * 3, dtype=np.float32)
+    vertices.foreach_get("co", coordinates)
+    return coordinates.reshape(-1, 3)
+
+def get_corrective_offsets(basis, shape, threshold):
+    """Returns shape - basis with every offset shorter than threshold set to zero, and the number of kept offsets."""
+    offsets = shape - basis
+    moved = np.einsum("ij,ij->i", offsets, offsets) > threshold * threshold
+    offsets[~moved] = 0.0
+    return offsets, int(np.count_nonzero(moved))
+
+def get_evaluated_coordinates(obj, scene):
+    """
+    Returns the vertex coordinates of obj with its shape key mix applied. The modifiers are hidden while
+    the mesh is evaluated, a key block is deformed by them again, so it can't hold their result.
+    """
+    hidden = []
+    for modifier in obj.modifiers:
+        if modifier.show_viewport:
+            modifier.show_viewport = False
+            hidden.append(modifier)
+    try:
+        mesh = obj.to_mesh(scene, True, "PREVIEW")
+    finally:
+        for modifier in hidden:
+            modifier.show_viewport = True
+    try:
+        return read_coordinates(mesh.vertices)
+    finally:
+        bpy.data.meshes.remove(mesh)
+
+def get_unique_shape_name(objects, name):
+    """Returns name, or name with a number suffix, so that none of the objects has a key block called like that."""
+    used = set()
+    for obj in objects:
+        if obj.data.shape_keys != None:
+            used.update(obj.data.shape_keys.key_blocks.keys())
+    unique_name = name
+    i = 1
+    while unique_name in used:
+        unique_name = "{}.{:03d}".format(name, i)
+        i += 1
+    return unique_name
+
+def create_corrective_shape(obj, scene, name, threshold=0.0001):
+    """
+    Adds a key block called name to the mesh obj that holds the current shape key mix relative to the basis.
+    Returns (key block, number of moved vertices), the key block is None if the shape can't be captured.
+    Nothing is added to the mesh in that case, the basis is only created once the capture succeeded.
+    """
+    if obj.type != "MESH":
+        return None, 0
+    if obj.data.shape_keys != None:
+        basis = read_coordinates(obj.data.shape_keys.reference_key.data)
+    else:
+        basis = read_coordinates(obj.data.vertices)
+
+    shape = get_evaluated_coordinates(obj, scene)
+    if shape.shape != basis.shape:
+        return None, 0
+    offsets, moved = get_corrective_offsets(basis, shape, threshold)
+
+    if obj.data.shape_keys == None:
+        obj.shape_key_add(name="Basis", from_mix=False)
+    basis_block = obj.data.shape_keys.reference_key
+
+    key_block = obj.shape_key_add(name=name, from_mix=False)
+    key_block.relative_key = basis_block
+    key_block.value = 0.0
+    key_block.data.foreach_set("co", (basis + offsets).ravel())
+    obj.data.update()
+    return key_block, moved
@@ -0,0 +1,116 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import bpy
+from collections import OrderedDict
+from bpy.app.handlers import persistent
+
+__reload_order_index__ = -2
+
+### every category is bumped when one of its bpy.data collections reports an update
+WATCHED_DATA = {
+    "objects": ("objects", "meshes", "curves", "armatures", "shape_keys", "materials", "textures"),
+    "shape_keys": ("shape_keys",),
+    "actions": ("actions",),
+    ### only bumped by the functions of driver_map that edit the map, and on undo and load
+    "driver_map": ()}
+
+_generations = dict((category, 0) for category in WATCHED_DATA)
+
+def get_generation(category):
+    """Returns a counter that changes whenever data of the given category changes."""
+    return _generations[category]
+
+def bump_generation(category=None):
+    """Marks a category as changed, all categories if category is None."""
+    for key in _generations:
+        if category == None or key == category:
+            _generations[key] += 1
+
+class LRUCache(object):
+    """
+    Small least recently used cache. Entries are stored together with the generation
+    of their category, so bumping the generation invalidates all of them at once.
+    """
+    def __init__(self, category, maxsize=1024):
+        self.category = category
+        self.maxsize = maxsize
+        self.generation = get_generation(category)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _validate(self):
+        generation = get_generation(self.category)
+        if generation != self.generation:
+            self.entries.clear()
+            self.generation = generation
+
+    def get(self, key, default=None):
+        self._validate()
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self._validate()
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        self._validate()
+        return key in self.entries
+
+    def clear(self):
+        self.entries.clear()
+
+@persistent
+def data_update_handler(scene):
+    updated = {}
+    for category, collections in WATCHED_DATA.items():
+        for collection_name in collections:
+            if collection_name not in updated:
+                updated[collection_name] = getattr(bpy.data, collection_name).is_updated
+            if updated[collection_name]:
+                bump_generation(category)
+                break
+
+@persistent
+def data_reset_handler(dummy):
+    bump_generation()
+
+def register():
+    bpy.app.handlers.scene_update_post.append(data_update_handler)
+    bpy.app.handlers.undo_post.append(data_reset_handler)
+    bpy.app.handlers.redo_post.append(data_reset_handler)
+    bpy.app.handlers.load_post.append(data_reset_handler)
+
+def unregister():
+    for handlers, handler in ((bpy.app.handlers.scene_update_post, data_update_handler),
+                              (bpy.app.handlers.undo_post, data_reset_handler),
+                              (bpy.app.handlers.redo_post, data_reset_handler),
+                              (bpy.app.handlers.load_post, data_reset_handler)):
+        if handler in handlers:
+            handlers.remove(handler)
@@ -0,0 +1,111 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from collections import namedtuple
+from functools import lru_cache
+
+__reload_order_index__ = -2
+
+### kind is one of "ATTRIBUTE", "KEY" or "INDEX"
+### an ATTRIBUTE followed by a KEY or INDEX is a collection lookup like bones["Bone"] or texture_slots[0]
+Segment = namedtuple("Segment", ["kind", "value"])
+
+class ParsedPath(namedtuple("ParsedPath", ["path", "segments"])):
+    """A data path split into its segments once, see parse_data_path."""
+    __slots__ = ()
+
+    @property
+    def keys(self):
+        """All string keys in order, e.g. ('Bone', 'IK') for pose.bones["Bone"].constraints["IK"]"""
+        return tuple(segment.value for segment in self.segments if segment.kind == "KEY")
+
+    @property
+    def last(self):
+        if len(self.segments) > 0:
+            return self.segments[-1]
+        return None
+
+    @property
+    def is_simple(self):
+        """True for paths that are a single attribute name like "location"."""
+        return len(self.segments) == 1 and self.segments[0].kind == "ATTRIBUTE"
+
+    def collection_key(self, collection):
+        """Returns the key that follows the attribute collection, e.g. "Bone" for bones["Bone"]."""
+        for i, segment in enumerate(self.segments[:-1]):
+            if segment.kind == "ATTRIBUTE" and segment.value == collection and self.segments[i+1].kind in ("KEY", "INDEX"):
+                return self.segments[i+1].value
+        return None
+
+def join_segments(segments):
+    path = ""
+    for segment in segments:
+        if segment.kind == "ATTRIBUTE":
+            path += segment.value if path == "" else "." + segment.value
+        elif segment.kind == "KEY":
+            path += '["' + segment.value.replace('"', '\\"') + '"]'
+        else:
+            path += "[" + str(segment.value) + "]"
+    return path
+
+@lru_cache(maxsize=4096)
+def parse_data_path(path):
+    """
+    Tokenizes an RNA data path like pose.bones["Bone"].constraints["IK"].influence into
+    a ParsedPath. Parsing is cached, so repeated calls with the same path are free.
+    Raises ValueError for malformed paths.
+    """
+    segments = []
+    i = 0
+    length = len(path)
+    while i < length:
+        char = path[i]
+        if char == ".":
+            i += 1
+        elif char == "[":
+            if i+1 < length and path[i+1] in "\"'":
+                quote = path[i+1]
+                j = i + 2
+                key = ""
+                while j < length and path[j] != quote:
+                    if path[j] == "\\" and j+1 < length:
+                        j += 1
+                    key += path[j]
+                    j += 1
+                if j+1 >= length or path[j+1] != "]":
+                    raise ValueError("unterminated key in data path " + path)
+                segments.append(Segment("KEY", key))
+                i = j + 2
+            else:
+                j = path.find("]", i)
+                if j == -1:
+                    raise ValueError("unterminated index in data path " + path)
+                try:
+                    segments.append(Segment("INDEX", int(path[i+1:j])))
+                except ValueError:
+                    raise ValueError("invalid index in data path " + path)
+                i = j + 1
+        else:
+            j = i
+            while j < length and path[j] not in ".[":
+                j += 1
+            segments.append(Segment("ATTRIBUTE", path[i:j].strip()))
+            i = j
+    return ParsedPath(path, tuple(segments))
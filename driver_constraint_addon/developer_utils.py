@@ -2,13 +2,37 @@ import os
 import sys
 import pkgutil
 import importlib
+import time
 
-def setup_addon_modules(path, package_name, reload):
+### seconds spent per module in the startup phases "import", "reload" and "register".
+### The import time of a module includes the modules it imports first.
+startup_timings = {}
+
+def add_startup_timing(phase, name, seconds, timings = None):
+    if timings is None:
+        timings = startup_timings
+    timings.setdefault(phase, {})[name] = seconds
+
+def format_startup_report(count = 5):
+    """Returns the total time of every startup phase and its slowest modules as text."""
+    lines = []
+    for phase in ("import", "reload", "register"):
+        timings = startup_timings.get(phase, {})
+        if len(timings) == 0:
+            continue
+        slowest = sorted(timings.items(), key = lambda item: -item[1])[:count]
+        details = ", ".join("{} {:.1f} ms".format(name, seconds * 1000) for name, seconds in slowest)
+        lines.append("{:<9} {:8.1f} ms  ({})".format(phase, sum(timings.values()) * 1000, details))
+    return "\n".join(lines)
+
+def setup_addon_modules(path, package_name, reload, deferred = ()):
     """
     Imports and reloads all modules in this addon.
 
     path -- __path__ from __init__.py
     package_name -- __name__ from __init__.py
+    deferred -- names of modules that are imported on first use instead, they are
+                dropped on reload so their next use imports the new code
 
     Individual modules can define a __reload_order_index__ property which
     will be used to reload the modules in a specific order. The default is 0.
@@ -27,16 +51,26 @@ def setup_addon_modules(path, package_name, reload):
     def import_submodules(names):
         modules = []
         for name in names:
+            start = time.perf_counter()
             modules.append(importlib.import_module("." + name, package_name))
+            add_startup_timing("import", name, time.perf_counter() - start, timings)
         return modules
 
     def reload_modules(modules):
         modules.sort(key = lambda module: getattr(module, "__reload_order_index__", 0))
         for module in modules:
+            start = time.perf_counter()
             importlib.reload(module)
+            add_startup_timing("reload", module.__name__.rsplit(".", 1)[-1], time.perf_counter() - start, timings)
 
-    names = get_submodule_names()
+    ### collected locally, reloading this module replaces startup_timings
+    timings = {}
+    names = [name for name in get_submodule_names() if name not in deferred]
     modules = import_submodules(names)
     if reload:
+        for name in deferred:
+            sys.modules.pop(package_name + "." + name, None)
         reload_modules(modules)
+    startup_timings.clear()
+    startup_timings.update(timings)
     return modules
@@ -0,0 +1,203 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import bpy
+from . lazy_import import numpy as np
+from . fcurve_utils import write_keyframe_array
+from . driver_utils import TRANSFORM_CHANNELS, get_driver_owners, iter_addon_drivers, get_channel_path
+from . driver_map import forget_drivers
+
+### value of a channel that has no fcurve
+CHANNEL_DEFAULTS = {"location": 0.0, "rotation_euler": 0.0, "rotation_quaternion": (1.0, 0.0, 0.0, 0.0), "scale": 1.0}
+
+def get_keyframe_arrays(curve):
+    """Returns the keyframe coordinates, left and right handles of curve as (n, 2) arrays."""
+    count = len(curve.keyframe_points)
+    arrays = []
+    for attribute in ("co", "handle_left", "handle_right"):
+        array = np.zeros(count * 2, dtype=np.float32)
+        curve.keyframe_points.foreach_get(attribute, array)
+        arrays.append(array.reshape(count, 2).astype(np.float64))
+    return arrays
+
+def solve_bezier(x, p0, p1, p2, p3, iterations=30):
+    """Evaluates the bezier segments p0..p3 (arrays of (n, 2) points) at x by bisecting the curve parameter."""
+    low = np.zeros(len(x))
+    high = np.ones(len(x))
+    for i in range(iterations):
+        t = (low + high) * 0.5
+        u = 1.0 - t
+        bezier_x = u*u*u*p0[:,0] + 3*u*u*t*p1[:,0] + 3*u*t*t*p2[:,0] + t*t*t*p3[:,0]
+        greater = bezier_x > x
+        high = np.where(greater, t, high)
+        low = np.where(greater, low, t)
+    t = (low + high) * 0.5
+    u = 1.0 - t
+    return u*u*u*p0[:,1] + 3*u*u*t*p1[:,1] + 3*u*t*t*p2[:,1] + t*t*t*p3[:,1]
+
+def evaluate_fcurve(curve, x):
+    """
+    Evaluates curve at all values of the array x. Keyframed curves with constant extrapolation and
+    no modifiers are evaluated with NumPy, everything else falls back to FCurve.evaluate.
+    """
+    if len(curve.keyframe_points) == 0 or len(curve.modifiers) > 0 or curve.extrapolation != "CONSTANT":
+        return np.array([curve.evaluate(value) for value in x], dtype=np.float64)
+
+    co, handle_left, handle_right = get_keyframe_arrays(curve)
+    if len(co) == 1:
+        return np.full(len(x), co[0,1])
+    interpolations = np.array([point.interpolation for point in curve.keyframe_points])
+    supported = ("CONSTANT", "LINEAR", "BEZIER")
+    if not np.all(np.isin(interpolations[:-1], supported)):
+        return np.array([curve.evaluate(value) for value in x], dtype=np.float64)
+
+    x = np.clip(x, co[0,0], co[-1,0])
+    segment = np.clip(np.searchsorted(co[:,0], x, side="right") - 1, 0, len(co) - 2)
+    result = np.empty(len(x))
+    segment_interpolation = interpolations[segment]
+
+    mask = segment_interpolation == "CONSTANT"
+    result[mask] = co[segment[mask],1]
+    ### the last keyframe holds its own value
+    result[x >= co[-1,0]] = co[-1,1]
+
+    mask = (segment_interpolation == "LINEAR") & (x < co[-1,0])
+    if np.any(mask):
+        start = co[segment[mask]]
+        end = co[segment[mask]+1]
+        width = np.where(end[:,0] - start[:,0] == 0.0, 1.0, end[:,0] - start[:,0])
+        result[mask] = start[:,1] + (x[mask] - start[:,0]) / width * (end[:,1] - start[:,1])
+
+    mask = (segment_interpolation == "BEZIER") & (x < co[-1,0])
+    if np.any(mask):
+        index = segment[mask]
+        result[mask] = solve_bezier(x[mask], co[index], handle_right[index], handle_left[index+1], co[index+1])
+    return result
+
+def quaternions_to_euler(w, x, y, z):
+    """Converts arrays of quaternion components to XYZ euler angles like Quaternion.to_euler("XYZ")."""
+    length = np.sqrt(w*w + x*x + y*y + z*z)
+    length[length == 0.0] = 1.0
+    w, x, y, z = w/length, x/length, y/length, z/length
+    euler_x = np.arctan2(2.0*(y*z + w*x), 1.0 - 2.0*(x*x + y*y))
+    euler_y = np.arcsin(np.clip(2.0*(w*y - x*z), -1.0, 1.0))
+    euler_z = np.arctan2(2.0*(x*y + w*z), 1.0 - 2.0*(y*y + z*z))
+    return euler_x, euler_y, euler_z
+
+class ChannelSampler(object):
+    """Samples transform channels of actions at a fixed set of frames. Every channel is only sampled once."""
+    def __init__(self, frames):
+        self.frames = frames
+        self.samples = {}
+
+    def sample_path(self, action, data_path, array_index, default):
+        key = (action.as_pointer() if action != None else 0, data_path, array_index)
+        if key not in self.samples:
+            curve = None
+            if action != None:
+                for fcurve in action.fcurves:
+                    if fcurve.data_path == data_path and fcurve.array_index == array_index:
+                        curve = fcurve
+                        break
+            if curve == None:
+                self.samples[key] = np.full(len(self.frames), default)
+            else:
+                self.samples[key] = evaluate_fcurve(curve, self.frames)
+        return self.samples[key]
+
+    def sample_target(self, target):
+        """Returns the values a TRANSFORMS driver target reads on every frame in local space."""
+        target_obj = target.id
+        action = target_obj.animation_data.action if target_obj.animation_data != None else None
+        data_path, array_index = get_channel_path(target, target.transform_type)
+        transform_owner = target_obj
+        if target.bone_target != "" and target_obj.type == "ARMATURE":
+            transform_owner = target_obj.pose.bones[target.bone_target]
+
+        if data_path.endswith("rotation_euler") and transform_owner.rotation_mode == "QUATERNION":
+            quaternion_path = data_path.replace("rotation_euler", "rotation_quaternion")
+            components = [self.sample_path(action, quaternion_path, i, CHANNEL_DEFAULTS["rotation_quaternion"][i]) for i in range(4)]
+            return quaternions_to_euler(*components)[array_index]
+        channel = TRANSFORM_CHANNELS[target.transform_type][0]
+        return self.sample_path(action, data_path, array_index, CHANNEL_DEFAULTS[channel])
+
+def get_bake_fcurve(owner, data_path, array_index):
+    """Returns the fcurve of data_path in the action of owner, creating action and fcurve if needed."""
+    animation_data = owner.animation_data
+    if animation_data.action == None:
+        animation_data.action = bpy.data.actions.new(name=owner.name + "Bake")
+    action = animation_data.action
+    for fcurve in action.fcurves:
+        if fcurve.data_path == data_path and fcurve.array_index == array_index:
+            return fcurve
+    return action.fcurves.new(data_path, index=array_index)
+
+def bake_drivers(owners, frame_start, frame_end, frame_step=1, driver_handling="MUTE"):
+    """
+    Bakes all addon drivers of owners into keyframes of their owner's action.
+    Drivers are evaluated from the actions of their target bones, no frames are set.
+    Returns (baked, skipped) lists of (owner, data_path, array_index) tuples.
+    """
+    frames = np.arange(frame_start, frame_end + 1, max(1, frame_step), dtype=np.float64)
+    sampler = ChannelSampler(frames)
+    baked = []
+    skipped = []
+
+    for owner, curve in list(iter_addon_drivers(owners)):
+        target = curve.driver.variables[0].targets[0]
+        if target.id == None or target.transform_space != "LOCAL_SPACE" or target.transform_type not in TRANSFORM_CHANNELS:
+            skipped.append((owner, curve.data_path, curve.array_index))
+            continue
+        if target.bone_target != "" and (target.id.type != "ARMATURE" or target.bone_target not in target.id.pose.bones):
+            skipped.append((owner, curve.data_path, curve.array_index))
+            continue
+
+        driver_values = sampler.sample_target(target)
+        values = evaluate_fcurve(curve, driver_values)
+        coordinates = np.empty(len(frames) * 2, dtype=np.float32)
+        coordinates[0::2] = frames
+        coordinates[1::2] = values
+
+        data_path, array_index = curve.data_path, curve.array_index
+        write_keyframe_array(get_bake_fcurve(owner, data_path, array_index), coordinates, "LINEAR")
+        if driver_handling == "MUTE":
+            curve.mute = True
+        elif driver_handling == "REMOVE":
+            owner.driver_remove(data_path, array_index)
+        baked.append((owner, data_path, array_index))
+    if driver_handling == "REMOVE":
+        forget_drivers(baked)
+    return baked, skipped
+
+def execute_bake(op, context):
+    """Runs the Bake Driver Constraints operator op, see tool_operators."""
+    owners = []
+    for obj in context.selected_objects:
+        owners.extend(owner for owner in get_driver_owners(obj) if owner not in owners)
+    baked, skipped = bake_drivers(owners, op.frame_start, op.frame_end, op.frame_step, op.driver_handling)
+
+    for owner, data_path, array_index in skipped:
+        print("Skipped {} {}[{}]: only drivers with a local space transform target can be baked.".format(owner.name, data_path, array_index))
+    msg = "{} drivers have been baked.".format(len(baked))
+    if len(skipped) > 0:
+        op.report({'WARNING'}, msg + " {} skipped, see console for details.".format(len(skipped)))
+    else:
+        op.report({'INFO'}, msg)
+    return {'FINISHED'}
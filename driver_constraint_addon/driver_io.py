@@ -0,0 +1,323 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Driver constraint files are JSON lines. The first line is a header with format and version,
+### every other line is one "driver" or "limit" record:
+###
+### {"format": "driver_constraint", "version": 2}
+### {"kind": "driver", "object": "Face", "owner": "SHAPE_KEYS", "material": "", "data_path": "key_blocks[\"smile\"].value",
+###  "index": 0, "target": "Rig", "bone": "jaw", "space": "LOCAL_SPACE", "transform_type": "ROT_X",
+###  "points": [[0.0, 0.0], [0.35, 1.0]], "interpolation": ["BEZIER", "LINEAR"]}
+### {"kind": "limit", "object": "Rig", "bone": "jaw", "type": "LIMIT_ROTATION", "owner_space": "LOCAL", "values": {...}}
+###
+### "interpolation" holds one value per keyframe. Version 1 files stored a single value for all keyframes.
+
+import bpy
+import json
+from . driver_plan import DriverOp
+from . fcurve_utils import read_keyframes, write_keyframes, INTERPOLATION_INDEX
+from . driver_utils import get_driver_owners, iter_addon_drivers, get_owner_relation, get_relation_owner, LIMIT_CONSTRAINT_NAME
+from . constraint_operator import CreateDriverConstraint, get_driver_changes, patch_driver_target
+from . edit_session import BulkEditSession, touch
+from . constraint_registry import iter_tagged_constraints, tag_constraint, get_owner_name
+from . driver_map import record_drivers
+
+FORMAT_NAME = "driver_constraint"
+FORMAT_VERSION = 2
+
+### records are applied in chunks, so big files never have to be held in memory completely
+CHUNK_SIZE = 1000
+
+LIMIT_ATTRIBUTES = {
+    "LIMIT_LOCATION": ("use_min_x", "use_min_y", "use_min_z", "use_max_x", "use_max_y", "use_max_z",
+                       "min_x", "min_y", "min_z", "max_x", "max_y", "max_z"),
+    "LIMIT_SCALE": ("use_min_x", "use_min_y", "use_min_z", "use_max_x", "use_max_y", "use_max_z",
+                    "min_x", "min_y", "min_z", "max_x", "max_y", "max_z"),
+    "LIMIT_ROTATION": ("use_limit_x", "use_limit_y", "use_limit_z",
+                       "min_x", "min_y", "min_z", "max_x", "max_y", "max_z")}
+
+### keys every record of a kind needs, "material" is optional
+RECORD_KEYS = {
+    "driver": ("object", "owner", "data_path", "index", "target", "bone", "space", "transform_type", "points", "interpolation"),
+    "limit": ("object", "bone", "type", "owner_space", "values")}
+
+OWNER_RELATIONS = ("OBJECT", "DATA", "SHAPE_KEYS", "MATERIAL")
+TRANSFORM_TYPES = [item[0] for item in CreateDriverConstraint.type_values]
+SPACES = [item[0] for item in CreateDriverConstraint.space_values]
+OWNER_SPACES = ("WORLD", "POSE", "LOCAL_WITH_PARENT", "LOCAL")
+
+def driver_record(obj, owner, curve):
+    target = curve.driver.variables[0].targets[0]
+    coordinates = read_keyframes(curve)
+    return {"kind": "driver",
+            "object": obj.name,
+            "owner": get_owner_relation(obj, owner),
+            "material": owner.name if get_owner_relation(obj, owner) == "MATERIAL" else "",
+            "data_path": curve.data_path,
+            "index": curve.array_index,
+            "target": target.id.name if target.id != None else "",
+            "bone": target.bone_target,
+            "space": target.transform_space,
+            "transform_type": target.transform_type,
+            "points": [[coordinates[i], coordinates[i+1]] for i in range(0, len(coordinates), 2)],
+            "interpolation": [point.interpolation for point in curve.keyframe_points]}
+
+def limit_record(obj, bone_name, const):
+    values = dict((attribute, getattr(const, attribute)) for attribute in LIMIT_ATTRIBUTES.get(const.type, ()))
+    return {"kind": "limit",
+            "object": obj.name,
+            "bone": bone_name,
+            "type": const.type,
+            "owner_space": const.owner_space,
+            "values": values}
+
+def iter_export_records(objects):
+    """Yields the records of all addon drivers and Driver Limit constraints of objects. Shared datablocks are exported once."""
+    exported = set()
+    for obj in objects:
+        owners = [owner for owner in get_driver_owners(obj) if owner.as_pointer() not in exported]
+        exported.update(owner.as_pointer() for owner in owners)
+        for owner, curve in iter_addon_drivers(owners):
+            yield driver_record(obj, owner, curve)
+        for owner_name, owner, const in iter_tagged_constraints(obj, "LIMIT"):
+            if const.type in LIMIT_ATTRIBUTES:
+                yield limit_record(obj, "" if owner == obj else owner_name, const)
+
+def export_driver_constraints(filepath, objects):
+    """Streams all records of objects into filepath and returns the number of written records."""
+    count = 0
+    with open(filepath, "w") as export_file:
+        export_file.write(json.dumps({"format": FORMAT_NAME, "version": FORMAT_VERSION}) + "\n")
+        for record in iter_export_records(objects):
+            export_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+def iter_import_records(filepath):
+    """
+    Streams the lines of a driver constraint file as (line_number, line) tuples, the records are
+    decoded in parse_record. Raises ValueError for unknown formats or versions before the first line is yielded.
+    """
+    with open(filepath) as import_file:
+        try:
+            header = json.loads(import_file.readline() or "{}")
+        except ValueError:
+            header = {}
+        if not isinstance(header, dict) or header.get("format") != FORMAT_NAME:
+            raise ValueError("not a driver constraint file")
+        if header.get("version", 0) > FORMAT_VERSION:
+            raise ValueError("file version {} is not supported".format(header.get("version")))
+        for line_number, line in enumerate(import_file, 2):
+            line = line.strip()
+            if line != "":
+                yield line_number, line
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def check_driver_record(record):
+    for key in ("object", "owner", "data_path", "target", "bone", "space", "transform_type"):
+        if not isinstance(record[key], str):
+            raise ValueError(key + " is not a string")
+    if record["owner"] not in OWNER_RELATIONS:
+        raise ValueError("unknown owner " + record["owner"])
+    if not isinstance(record["index"], int) or isinstance(record["index"], bool):
+        raise ValueError("index is not an integer")
+    if record["space"] not in SPACES:
+        raise ValueError("unknown space " + record["space"])
+    if record["transform_type"] not in TRANSFORM_TYPES:
+        raise ValueError("unknown transform type " + record["transform_type"])
+    points = record["points"]
+    if not isinstance(points, list) or any(not isinstance(point, list) or len(point) != 2 or not all(is_number(value) for value in point) for point in points):
+        raise ValueError("points is not a list of [x, y] pairs")
+    interpolation = record["interpolation"]
+    if isinstance(interpolation, list):
+        if len(interpolation) != len(points):
+            raise ValueError("interpolation needs one value per point")
+    else:
+        interpolation = [interpolation]
+    for value in interpolation:
+        if value not in INTERPOLATION_INDEX:
+            raise ValueError("unknown interpolation " + str(value))
+
+def check_limit_record(record):
+    for key in ("object", "bone", "owner_space"):
+        if not isinstance(record[key], str):
+            raise ValueError(key + " is not a string")
+    if record["type"] not in LIMIT_ATTRIBUTES:
+        raise ValueError("unknown limit type " + str(record["type"]))
+    if record["owner_space"] not in OWNER_SPACES:
+        raise ValueError("unknown owner space " + record["owner_space"])
+    if not isinstance(record["values"], dict):
+        raise ValueError("values is not an object")
+    for attribute, value in record["values"].items():
+        if attribute not in LIMIT_ATTRIBUTES[record["type"]]:
+            raise ValueError("unknown limit value " + str(attribute))
+        if attribute.startswith("use_") and not isinstance(value, bool):
+            raise ValueError(attribute + " is not a boolean")
+        if not attribute.startswith("use_") and not is_number(value):
+            raise ValueError(attribute + " is not a number")
+
+def parse_record(line):
+    """Decodes one record line and checks all of its values. Raises ValueError for malformed records."""
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    kind = record.get("kind")
+    if kind not in RECORD_KEYS:
+        raise ValueError("unknown record kind " + str(kind))
+    missing = [key for key in RECORD_KEYS[kind] if key not in record]
+    if len(missing) > 0:
+        raise ValueError("missing " + ", ".join(missing))
+    if not isinstance(record.get("material", ""), str):
+        raise ValueError("material is not a string")
+    if kind == "driver":
+        check_driver_record(record)
+    else:
+        check_limit_record(record)
+    return record
+
+def add_failure(stats, line_number, message):
+    stats["failed"] += 1
+    stats["errors"].append((line_number, message))
+
+def apply_driver_records(records, incremental, stats):
+    """
+    Reapplies a chunk of (line_number, record) tuples of checked driver records.
+    Existing drivers of an owner are looked up in one dict per owner.
+    """
+    existing_drivers = {}
+    applied = []
+    for line_number, record in records:
+        obj = bpy.data.objects.get(record["object"])
+        driver_obj = bpy.data.objects.get(record["target"])
+        owner = get_relation_owner(obj, record["owner"], record.get("material", "")) if obj != None else None
+        if obj == None or driver_obj == None:
+            add_failure(stats, line_number, "object " + (record["target"] if obj != None else record["object"]) + " not found")
+            continue
+        if owner == None:
+            add_failure(stats, line_number, "{} has no {} datablock".format(obj.name, record["owner"].lower().replace("_", " ")))
+            continue
+
+        interpolation = record["interpolation"]
+        if isinstance(interpolation, list):
+            interpolation = tuple(interpolation)
+        op = DriverOp(record["object"], record["data_path"], None, record["target"], record["bone"] or None,
+                      record["space"], record["transform_type"], tuple(tuple(point) for point in record["points"]), interpolation)
+        curve = None
+        if incremental and owner.animation_data != None:
+            if owner.as_pointer() not in existing_drivers:
+                existing_drivers[owner.as_pointer()] = dict(((curve.data_path, curve.array_index), curve) for curve in owner.animation_data.drivers)
+            curve = existing_drivers[owner.as_pointer()].get((record["data_path"], record["index"]))
+
+        try:
+            if curve != None:
+                changes = get_driver_changes(curve, driver_obj, op)
+                stats["unchanged" if len(changes) == 0 else "patched"] += 1
+            else:
+                try:
+                    curve = owner.driver_add(record["data_path"], record["index"])
+                except TypeError:
+                    ### property is not an array
+                    curve = owner.driver_add(record["data_path"])
+                changes = {"DRIVER", "TARGET", "KEYFRAMES"}
+                stats["created"] += 1
+            patch_driver_target(curve, driver_obj, op, changes)
+            if "KEYFRAMES" in changes:
+                write_keyframes(curve, op.points, op.interpolation)
+            applied.append((obj, owner, curve))
+        except (TypeError, RuntimeError, AttributeError) as error:
+            add_failure(stats, line_number, "{} could not be driven: {}".format(record["data_path"], error))
+    record_drivers(bpy.context.scene, applied)
+
+def apply_limit_record(line_number, record, stats):
+    obj = bpy.data.objects.get(record["object"])
+    owner = obj
+    if obj != None and record["bone"] != "":
+        owner = obj.pose.bones.get(record["bone"]) if obj.pose != None else None
+    if owner == None:
+        add_failure(stats, line_number, "{} {} not found".format("bone" if obj != None else "object", record["bone"] if obj != None else record["object"]))
+        return
+    if owner == obj and record["owner_space"] in ("POSE", "LOCAL_WITH_PARENT"):
+        add_failure(stats, line_number, "owner space " + record["owner_space"] + " needs a bone")
+        return
+    if LIMIT_CONSTRAINT_NAME in owner.constraints:
+        owner.constraints.remove(owner.constraints[LIMIT_CONSTRAINT_NAME])
+    const = owner.constraints.new(record["type"])
+    const.name = LIMIT_CONSTRAINT_NAME
+    tag_constraint(obj, "LIMIT", get_owner_name(owner), const.name)
+    touch(obj)
+    const.owner_space = record["owner_space"]
+    for attribute, value in record["values"].items():
+        setattr(const, attribute, value)
+    stats["limits"] += 1
+
+def import_driver_constraints(filepath, incremental=True):
+    """
+    Reapplies all records of filepath in chunks and returns a dict with the counts of the import.
+    Every record is checked before it is applied, malformed records are counted as failed and listed
+    as (line_number, message) tuples in stats["errors"], like records that could not be applied.
+    """
+    stats = {"created": 0, "patched": 0, "unchanged": 0, "limits": 0, "failed": 0, "errors": []}
+    chunk = []
+    with BulkEditSession():
+        for line_number, line in iter_import_records(filepath):
+            try:
+                record = parse_record(line)
+            except ValueError as error:
+                add_failure(stats, line_number, str(error))
+                continue
+            if record["kind"] == "driver":
+                chunk.append((line_number, record))
+                if len(chunk) >= CHUNK_SIZE:
+                    apply_driver_records(chunk, incremental, stats)
+                    chunk = []
+            else:
+                apply_limit_record(line_number, record, stats)
+        apply_driver_records(chunk, incremental, stats)
+    ### driver records fail when their chunk is applied, after the limit records read in between
+    stats["errors"].sort()
+    return stats
+
+def execute_export(op, context):
+    """Runs the Export Driver Constraints operator op, see tool_operators."""
+    objects = context.selected_objects if op.selected_only else bpy.data.objects
+    count = export_driver_constraints(op.filepath, objects)
+    op.report({'INFO'}, "{} driver constraints have been exported.".format(count))
+    return {'FINISHED'}
+
+def execute_import(op, context):
+    """Runs the Import Driver Constraints operator op, see tool_operators."""
+    try:
+        stats = import_driver_constraints(op.filepath, op.only_update_changed)
+    except (IOError, ValueError) as error:
+        ### only raised for files that can't be opened or have no valid header, nothing has been applied yet
+        op.report({'ERROR'}, "Could not import driver constraints: " + str(error))
+        return {'CANCELLED'}
+
+    for line_number, message in stats["errors"]:
+        print("Line {}: {}".format(line_number, message))
+
+    msg = "Drivers: {} created, {} updated, {} unchanged. {} limit constraints.".format(stats["created"], stats["patched"], stats["unchanged"], stats["limits"])
+    if stats["failed"] > 0:
+        op.report({'WARNING'}, msg + " {} records could not be applied, see console for details.".format(stats["failed"]))
+    else:
+        op.report({'INFO'}, msg)
+    return {'FINISHED'}
@@ -0,0 +1,219 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Driver linter. All drivers of the file are visited once, name lookups go through a RigIndex
+### and a key block table per shape key datablock, so the cost grows linearly with the drivers.
+
+import bpy
+from collections import namedtuple
+from . data_path import parse_data_path
+from . rig_index import RigIndex
+from . driver_utils import LIMIT_CONSTRAINT_NAME
+from . constraint_registry import iter_tagged_constraints, untag_constraint, get_owner_name, OBJECT_OWNER, REGISTRY_PROPERTY
+from . edit_session import BulkEditSession, touch
+from . driver_map import forget_drivers
+
+### bpy.data collections whose datablocks can have drivers
+DRIVER_COLLECTIONS = ("objects", "meshes", "curves", "lattices", "armatures", "shape_keys", "materials",
+                      "textures", "lamps", "cameras", "worlds", "scenes", "node_groups")
+
+SEVERITIES = ("ERROR", "WARNING")
+
+### number of targets a driver variable of each type reads
+VARIABLE_TARGET_COUNTS = {"SINGLE_PROP": 1, "TRANSFORMS": 1, "ROTATION_DIFF": 2, "LOC_DIFF": 2}
+
+### code -> (severity, message)
+LINT_CODES = {
+    "INVALID_PATH": ("ERROR", "Driven property does not exist"),
+    "INVALID_TARGET": ("ERROR", "Driver variable reads an object, bone or property that does not exist"),
+    "DUPLICATE": ("WARNING", "Another driver drives the same property"),
+    "MUTED_KEY_BLOCK": ("WARNING", "Driver drives a muted key block"),
+    "ORPHANED_LIMIT": ("WARNING", "Driver Limit constraint on a bone or object no addon driver reads"),
+}
+
+LintFinding = namedtuple("LintFinding", ["severity", "code", "owner", "curve", "constraint", "message"])
+
+def iter_all_drivers():
+    """Yields (owner, fcurve) for every driver of the file."""
+    for collection_name in DRIVER_COLLECTIONS:
+        for owner in getattr(bpy.data, collection_name, ()):
+            animation_data = getattr(owner, "animation_data", None)
+            if animation_data == None:
+                continue
+            for curve in animation_data.drivers:
+                yield owner, curve
+
+class DriverLinter(object):
+    """Collects the findings of one lint run."""
+    def __init__(self):
+        self.index = RigIndex()
+        self.key_block_tables = {}
+        self.findings = []
+        ### (object pointer, bone name or "") of every transform target, to find orphaned Driver Limits
+        self.read_transforms = set()
+
+    def add(self, code, owner, curve=None, constraint=None, detail=""):
+        severity, message = LINT_CODES[code]
+        self.findings.append(LintFinding(severity, code, owner, curve, constraint, message + (": " + detail if detail != "" else "")))
+
+    def get_key_blocks(self, key):
+        table = self.key_block_tables.get(key.as_pointer())
+        if table == None:
+            table = dict(key.key_blocks.items())
+            self.key_block_tables[key.as_pointer()] = table
+        return table
+
+    def check_driven_path(self, owner, curve):
+        try:
+            path = parse_data_path(curve.data_path)
+        except ValueError:
+            self.add("INVALID_PATH", owner, curve, detail=curve.data_path)
+            return
+        if isinstance(owner, bpy.types.Key) and path.collection_key("key_blocks") != None:
+            key_block = self.get_key_blocks(owner).get(path.collection_key("key_blocks"))
+            if key_block == None:
+                self.add("INVALID_PATH", owner, curve, detail=curve.data_path)
+            elif key_block.mute and not curve.mute:
+                self.add("MUTED_KEY_BLOCK", owner, curve, detail=key_block.name)
+            return
+        try:
+            owner.path_resolve(curve.data_path)
+        except ValueError:
+            self.add("INVALID_PATH", owner, curve, detail=curve.data_path)
+
+    def check_targets(self, owner, curve):
+        for variable in curve.driver.variables:
+            for target in variable.targets[:VARIABLE_TARGET_COUNTS.get(variable.type, 1)]:
+                target_id = target.id
+                if target_id == None:
+                    self.add("INVALID_TARGET", owner, curve, detail=variable.name + " has no target")
+                    continue
+                if variable.type == "SINGLE_PROP":
+                    try:
+                        target_id.path_resolve(target.data_path)
+                    except ValueError:
+                        self.add("INVALID_TARGET", owner, curve, detail=variable.name + " reads " + target.data_path)
+                    continue
+                bone_name = target.bone_target if isinstance(target_id, bpy.types.Object) and target_id.type == "ARMATURE" else ""
+                if bone_name != "" and bone_name not in self.index.pose_bones(target_id):
+                    self.add("INVALID_TARGET", owner, curve, detail=variable.name + " reads bone " + bone_name)
+                    continue
+                self.read_transforms.add((target_id.as_pointer(), bone_name))
+
+    def lint_drivers(self):
+        """Checks every driver of the file, all drivers on one property except the first are duplicates."""
+        driven = set()
+        for owner, curve in iter_all_drivers():
+            key = (owner.as_pointer(), curve.data_path, curve.array_index)
+            if key in driven:
+                if not curve.mute:
+                    self.add("DUPLICATE", owner, curve, detail=curve.data_path)
+            driven.add(key)
+            self.check_driven_path(owner, curve)
+            self.check_targets(owner, curve)
+
+    def lint_limits(self):
+        """
+        Finds registered Driver Limit constraints whose bone or object isn't read by any driver. Needs lint_drivers first.
+        Objects without a stored registry are scanned and stale entries kept, so a report doesn't write to the file.
+        """
+        for obj in bpy.data.objects:
+            ### objects without a registry only get one if they can have Driver Limits
+            if REGISTRY_PROPERTY not in obj and obj.type != "ARMATURE" and LIMIT_CONSTRAINT_NAME not in obj.constraints:
+                continue
+            for owner_name, owner, const in iter_tagged_constraints(obj, "LIMIT", index=self.index, prune=False):
+                bone_name = "" if owner_name == OBJECT_OWNER else owner_name
+                if (obj.as_pointer(), bone_name) not in self.read_transforms and not const.mute:
+                    self.add("ORPHANED_LIMIT", owner, constraint=const, detail=obj.name + (":" + bone_name if bone_name != "" else ""))
+
+def lint_file():
+    """Returns the findings of all drivers and Driver Limit constraints of the file, errors first."""
+    linter = DriverLinter()
+    linter.lint_drivers()
+    linter.lint_limits()
+    return sorted(linter.findings, key=lambda finding: SEVERITIES.index(finding.severity))
+
+def group_findings(findings):
+    """Returns {severity: {code: [findings]}}."""
+    groups = {}
+    for finding in findings:
+        groups.setdefault(finding.severity, {}).setdefault(finding.code, []).append(finding)
+    return groups
+
+def fix_findings(findings, fix="MUTE"):
+    """
+    MUTE mutes the drivers and constraints of the findings, REMOVE removes them.
+    Duplicates are always only muted, removing a driver path would remove the first driver too.
+    Returns the number of fixed findings.
+    """
+    ### paths are read before anything is removed, a driver can have more than one finding
+    keys = [(finding.owner.as_pointer(), finding.curve.data_path, finding.curve.array_index) if finding.curve != None else None for finding in findings]
+    removed_paths = set()
+    removed_drivers = []
+    count = 0
+    with BulkEditSession():
+        for finding, key in zip(findings, keys):
+            if finding.constraint != None:
+                ### the owner of a constraint finding is the object or pose bone that holds it
+                obj = finding.owner.id_data
+                if fix == "REMOVE":
+                    name = finding.constraint.name
+                    finding.owner.constraints.remove(finding.constraint)
+                    untag_constraint(obj, "LIMIT", get_owner_name(finding.owner), name)
+                else:
+                    finding.constraint.mute = True
+                touch(obj)
+                count += 1
+                continue
+
+            if key in removed_paths:
+                continue
+            if fix == "REMOVE" and finding.code != "DUPLICATE":
+                removed_paths.add(key)
+                removed_drivers.append((finding.owner, key[1], key[2]))
+                finding.owner.driver_remove(key[1], key[2])
+            else:
+                finding.curve.mute = True
+            touch(finding.owner)
+            count += 1
+    forget_drivers(removed_drivers)
+    return count
+
+def execute_lint(op, context):
+    """Runs the Lint Drivers operator op, see tool_operators."""
+    findings = lint_file()
+    groups = group_findings(findings)
+    for severity in SEVERITIES:
+        for code, code_findings in sorted(groups.get(severity, {}).items()):
+            print("{} {} ({})".format(severity, code, len(code_findings)))
+            for finding in code_findings:
+                name = finding.owner.name if finding.owner != None else ""
+                print("    {}: {}".format(name, finding.message))
+
+    summary = ", ".join("{} {}".format(sum(len(f) for f in groups.get(severity, {}).values()), severity.lower() + "s") for severity in SEVERITIES)
+    if op.fix == "REPORT":
+        level = 'WARNING' if len(findings) > 0 else 'INFO'
+        op.report({level}, "Driver lint: " + summary + ". See console for details.")
+        return {'FINISHED'}
+
+    selected = [finding for finding in findings if SEVERITIES.index(finding.severity) <= SEVERITIES.index(op.severity)]
+    count = fix_findings(selected, op.fix)
+    op.report({'INFO'}, "Driver lint: {}. {} problems fixed.".format(summary, count))
+    return {'FINISHED'}
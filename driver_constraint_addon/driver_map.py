@@ -0,0 +1,258 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Driver map. Every bone -> property mapping of an addon driver has an entry in scene.driver_map,
+### which is saved with the .blend. Entries are added and updated by the functions that create
+### drivers and removed by the ones that remove them, so the panel never scans the drivers itself.
+### The map can be rebuilt from the drivers of the file if it got out of sync, e.g. after renames.
+
+import bpy
+from . data_cache import LRUCache, get_generation, bump_generation
+from . driver_utils import get_driver_owners, iter_addon_drivers, get_owner_relation, TRANSFORM_CHANNELS
+
+__reload_order_index__ = -1
+
+MAP_PROPERTY = "driver_map"
+
+PROPERTY_TYPES = (("OBJECT_PROPERTY", "Object Property"),
+                  ("SHAPEKEY_PROPERTY", "Shapekey Property"),
+                  ("MODIFIER_PROPERTY", "Modifier Property"),
+                  ("OBECT_DATA_PROPERTY", "Data Property"),
+                  ("MATERIAL_PROPERTY", "Material Property"),
+                  ("TEXTURE_PROPERTY", "Texture Property"),
+                  ("BONE_PROPERTY", "Bone Property"),
+                  ("BONE_CONSTRAINT_PROPERTY", "Bone Constraint Property"),
+                  ("OBJECT_CONSTRAINT_PROPERTY", "Object Constraint Property"))
+
+### scene pointer -> (generation, {entry key: index})
+_lookups = {}
+### filter settings -> (flags, order) of the list, dropped when the map changes
+_filter_cache = LRUCache("driver_map", maxsize=8)
+
+def get_property_type(obj, owner, data_path):
+    """Property type of a driven property from its owner and data path, see build_property_type_items."""
+    relation = get_owner_relation(obj, owner)
+    if relation == "SHAPE_KEYS":
+        return "SHAPEKEY_PROPERTY"
+    if relation == "MATERIAL":
+        return "TEXTURE_PROPERTY" if data_path.startswith("texture_slots") else "MATERIAL_PROPERTY"
+    if relation == "DATA":
+        return "BONE_PROPERTY" if data_path.startswith("bones[") else "OBECT_DATA_PROPERTY"
+    if data_path.startswith("pose.bones["):
+        return "BONE_CONSTRAINT_PROPERTY" if ".constraints[" in data_path else "BONE_PROPERTY"
+    if data_path.startswith("modifiers["):
+        return "MODIFIER_PROPERTY"
+    if data_path.startswith("constraints["):
+        return "OBJECT_CONSTRAINT_PROPERTY"
+    return "OBJECT_PROPERTY"
+
+def get_entry_key(owner, data_path, array_index):
+    return (type(owner).__name__, owner.name, data_path, array_index)
+
+def get_map_lookup(scene):
+    """Returns {entry key: index} of the map of scene, built once per change of the map."""
+    generation = get_generation("driver_map")
+    lookup = _lookups.get(scene.as_pointer())
+    if lookup == None or lookup[0] != generation:
+        entries = getattr(scene, MAP_PROPERTY)
+        lookup = (generation, dict(((entry.id_type, entry.id_name, entry.data_path, entry.array_index), i) for i, entry in enumerate(entries)))
+        _lookups[scene.as_pointer()] = lookup
+    return lookup[1]
+
+def iter_object_drivers(objects):
+    """Yields (obj, owner, fcurve) for the addon drivers of objects. Shared datablocks are visited once."""
+    visited = set()
+    for obj in objects:
+        owners = [owner for owner in get_driver_owners(obj) if owner.as_pointer() not in visited]
+        visited.update(owner.as_pointer() for owner in owners)
+        for owner, curve in iter_addon_drivers(owners):
+            yield obj, owner, curve
+
+def get_owner_objects():
+    """Returns {datablock pointer: object} for all datablocks that can hold addon drivers."""
+    owner_objects = {}
+    for obj in bpy.data.objects:
+        for owner in get_driver_owners(obj):
+            owner_objects.setdefault(owner.as_pointer(), obj)
+    return owner_objects
+
+def record_drivers(scene, drivers):
+    """
+    Adds or updates the map entries of drivers, an iterable of (obj, owner, fcurve) of addon drivers.
+    Fields are only written if they changed. Does nothing while the map property isn't registered.
+    """
+    entries = getattr(scene, MAP_PROPERTY, None)
+    if entries == None:
+        return
+    lookup = get_map_lookup(scene)
+    changed = False
+    for obj, owner, curve in drivers:
+        key = get_entry_key(owner, curve.data_path, curve.array_index)
+        index = lookup.get(key)
+        if index == None:
+            entry = entries.add()
+            entry.name = curve.data_path
+            entry.id_type, entry.id_name, entry.data_path, entry.array_index = key
+            lookup[key] = len(entries) - 1
+            changed = True
+        else:
+            entry = entries[index]
+
+        target = curve.driver.variables[0].targets[0]
+        values = (("object", obj.name),
+                  ("driver_object", target.id.name if target.id != None else ""),
+                  ("bone", target.bone_target),
+                  ("transform_type", target.transform_type),
+                  ("property_type", get_property_type(obj, owner, curve.data_path)))
+        for attribute, value in values:
+            if getattr(entry, attribute) != value:
+                setattr(entry, attribute, value)
+                changed = True
+    if changed:
+        bump_generation("driver_map")
+        ### the lookup has been kept up to date while adding
+        _lookups[scene.as_pointer()] = (get_generation("driver_map"), lookup)
+
+def forget_drivers(drivers):
+    """Removes the entries of drivers, an iterable of (owner, data_path, array_index), from the maps of all scenes."""
+    keys = set(get_entry_key(owner, data_path, array_index) for owner, data_path, array_index in drivers)
+    if len(keys) == 0:
+        return
+    for scene in bpy.data.scenes:
+        entries = getattr(scene, MAP_PROPERTY, None)
+        if entries == None:
+            continue
+        lookup = get_map_lookup(scene)
+        indices = sorted((lookup[key] for key in keys if key in lookup), reverse=True)
+        for index in indices:
+            entries.remove(index)
+        if len(indices) > 0:
+            bump_generation("driver_map")
+
+def rebuild_driver_map(scene):
+    """Refills the map of scene from the addon drivers of all objects and returns the number of entries."""
+    entries = getattr(scene, MAP_PROPERTY)
+    entries.clear()
+    bump_generation("driver_map")
+    record_drivers(scene, iter_object_drivers(bpy.data.objects))
+    return len(entries)
+
+class DriverMapEntry(bpy.types.PropertyGroup):
+    """One bone -> property mapping. name is the driven data path."""
+    id_type = bpy.props.StringProperty(name="Datablock Type", description="Type of the datablock that holds the driver")
+    id_name = bpy.props.StringProperty(name="Datablock", description="Name of the datablock that holds the driver")
+    data_path = bpy.props.StringProperty(name="Data Path")
+    array_index = bpy.props.IntProperty(name="Index")
+    object = bpy.props.StringProperty(name="Object", description="Object of the driven property")
+    driver_object = bpy.props.StringProperty(name="Driver", description="Object the driver reads")
+    bone = bpy.props.StringProperty(name="Bone", description="Bone the driver reads")
+    transform_type = bpy.props.StringProperty(name="Transform Type")
+    property_type = bpy.props.StringProperty(name="Property Type")
+
+class DriverMapList(bpy.types.UIList):
+    """Lists the driver map. The filter result is cached until the filters or the map change."""
+    bl_idname = "DRIVER_UL_driver_map"
+
+    filter_bone = bpy.props.StringProperty(name="Bone", description="Only show drivers of bones whose name contains this text")
+    filter_object = bpy.props.StringProperty(name="Object", description="Only show drivers of objects whose name contains this text")
+    filter_property_type = bpy.props.EnumProperty(name="Property Type", items=(("ALL", "All Properties", "Show all property types"),) +
+                                                  tuple((key, name, name) for key, name in PROPERTY_TYPES))
+    filter_transform_type = bpy.props.EnumProperty(name="Transform Type", items=(("ALL", "All Transforms", "Show all transform types"),) +
+                                                   tuple((key, key.replace("_", " ").title(), key) for key in sorted(TRANSFORM_CHANNELS)))
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        if item.bone != "":
+            row.label(text=item.bone, icon="BONE_DATA")
+        else:
+            row.label(text=item.driver_object, icon="OBJECT_DATA")
+        row.label(text=item.transform_type)
+        index_text = "[{}]".format(item.array_index) if item.array_index > 0 else ""
+        row.label(text=item.object + ": " + item.data_path + index_text, icon="DRIVER")
+
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_invert", text="", icon="ARROW_LEFTRIGHT")
+        row.prop(self, "use_filter_sort_alpha", text="", icon="SORTALPHA")
+        row = layout.row(align=True)
+        row.prop(self, "filter_bone", text="", icon="BONE_DATA")
+        row.prop(self, "filter_object", text="", icon="OBJECT_DATA")
+        row = layout.row(align=True)
+        row.prop(self, "filter_property_type", text="")
+        row.prop(self, "filter_transform_type", text="")
+
+    def filter_items(self, context, data, propname):
+        key = (data.as_pointer(), self.filter_name.lower(), self.filter_bone.lower(), self.filter_object.lower(),
+               self.filter_property_type, self.filter_transform_type, self.use_filter_sort_alpha)
+        cached = _filter_cache.get(key)
+        if cached != None:
+            return cached
+
+        name, bone, obj, property_type, transform_type = key[1:6]
+        flags = []
+        for entry in getattr(data, propname):
+            visible = ((name == "" or name in entry.data_path.lower()) and
+                       (bone == "" or bone in (entry.bone or entry.driver_object).lower()) and
+                       (obj == "" or obj in entry.object.lower()) and
+                       (property_type == "ALL" or entry.property_type == property_type) and
+                       (transform_type == "ALL" or entry.transform_type == transform_type))
+            flags.append(self.bitflag_filter_item if visible else 0)
+        order = []
+        if self.use_filter_sort_alpha:
+            order = bpy.types.UI_UL_list.sort_items_by_name(getattr(data, propname), "data_path")
+        _filter_cache.set(key, (flags, order))
+        return flags, order
+
+class DriverMapPanel(bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_driver_map"
+    bl_label = "Driver Map"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+
+    def draw(self, context):
+        scene = context.scene
+        layout = self.layout
+        layout.template_list("DRIVER_UL_driver_map", "", scene, MAP_PROPERTY, scene, "driver_map_index", rows=8)
+        row = layout.row(align=True)
+        row.label(text="{} drivers".format(len(getattr(scene, MAP_PROPERTY))))
+        row.operator("object.rebuild_driver_map", text="Rebuild", icon="FILE_REFRESH")
+
+class RebuildDriverMap(bpy.types.Operator):
+    """Rebuilds the driver map from the drivers of the file"""
+    bl_idname = "object.rebuild_driver_map"
+    bl_label = "Rebuild Driver Map"
+    bl_description = "Rebuilds the driver map from the addon drivers of all objects, e.g. after renaming objects or removing drivers by hand"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        count = rebuild_driver_map(context.scene)
+        self.report({'INFO'}, "Driver map has {} drivers.".format(count))
+        return {'FINISHED'}
+
+classes = (DriverMapEntry, DriverMapList, DriverMapPanel, RebuildDriverMap)
+
+def register():
+    bpy.types.Scene.driver_map = bpy.props.CollectionProperty(type=DriverMapEntry)
+    bpy.types.Scene.driver_map_index = bpy.props.IntProperty(name="Active Driver", default=0, min=0)
+
+def unregister():
+    del bpy.types.Scene.driver_map
+    del bpy.types.Scene.driver_map_index
@@ -0,0 +1,64 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Pure Python planning stage for driver creation. Nothing in here touches bpy,
+### the plan is applied by apply_driver_plan in constraint_operator.
+
+from collections import namedtuple
+from math import radians
+from . fcurve_utils import response_curve_points
+
+__reload_order_index__ = -1
+
+ROTATION_TYPES = ("ROT_X", "ROT_Y", "ROT_Z")
+
+### one driver that has to be created. Objects are referenced by name,
+### points are the (driver value, property value) keyframes in Blender units.
+DriverOp = namedtuple("DriverOp", ["object", "data_path", "property_type", "driver", "bone",
+                                   "space", "transform_type", "points", "interpolation"])
+
+def plan_driver_points(settings):
+    """Returns the keyframes of a driver fcurve, rotation limits in settings are given in degrees."""
+    min_value = settings["min"]
+    max_value = settings["max"]
+    if settings["type"] in ROTATION_TYPES:
+        min_value = radians(min_value)
+        max_value = radians(max_value)
+    points = response_curve_points(min_value, max_value, settings["prop_min"], settings["prop_max"],
+                                   settings.get("response_curve", "LINEAR"), settings.get("response_points", 2))
+    return tuple((float(x), float(y)) for x, y in points)
+
+def plan_property_drivers(object_names, data_path, property_type, driver_name, bone_name, settings):
+    """
+    Returns a list of DriverOp, one for every object in object_names.
+    settings is a dict with the keys of batch_driver.SPEC_DEFAULTS (type, space, min, max, ...).
+    The keyframes are computed once and shared by all objects.
+    """
+    points = plan_driver_points(settings)
+    return [DriverOp(object_name, data_path, property_type, driver_name, bone_name,
+                     settings["space"], settings["type"], points, settings["interpolation"])
+            for object_name in object_names]
+
+def order_plan(plan):
+    """
+    Returns (index in plan, op) pairs grouped by driven object, so every datablock gets all its drivers in one go.
+    Operations on the same property keep the order of plan.
+    """
+    return sorted(enumerate(plan), key=lambda item: (item[1].object or "", item[1].data_path))
@@ -0,0 +1,131 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Playback profiler for the addon's drivers and Driver Limit constraints. The frame range is
+### played once with everything active and once per group with the drivers of the group muted,
+### the difference is the time the group costs.
+
+import bpy
+import os
+import json
+import time
+from . driver_utils import get_driver_owners, iter_addon_drivers
+from . constraint_registry import iter_tagged_constraints
+from . constraint_operator import get_prop_object
+
+REPORT_FORMAT = "driver_constraint_profile"
+REPORT_VERSION = 1
+
+def get_property_type(context, obj, owner, curve):
+    """Property type of a driven property like get_prop_object finds it, the owner type if it can't be resolved."""
+    prop_object = get_prop_object(None, context, curve.data_path, obj)
+    if prop_object != None:
+        return prop_object[1]
+    return type(owner).__name__.upper() + "_PROPERTY"
+
+def collect_profile_groups(context, objects, kinds):
+    """
+    Returns {(kind, name): [items]} where items are the driver fcurves and Driver Limit constraints
+    that are muted together. Shared datablocks are only visited once.
+    """
+    groups = {}
+    visited = set()
+    for obj in objects:
+        owners = [owner for owner in get_driver_owners(obj) if owner.as_pointer() not in visited]
+        visited.update(owner.as_pointer() for owner in owners)
+        for owner, curve in iter_addon_drivers(owners):
+            target = curve.driver.variables[0].targets[0]
+            if "OBJECT" in kinds:
+                groups.setdefault(("OBJECT", obj.name), []).append(curve)
+            if "BONE" in kinds and target.id != None:
+                bone_name = target.id.name + (":" + target.bone_target if target.bone_target != "" else "")
+                groups.setdefault(("BONE", bone_name), []).append(curve)
+            if "PROPERTY_TYPE" in kinds:
+                groups.setdefault(("PROPERTY_TYPE", get_property_type(context, obj, owner, curve)), []).append(curve)
+        if "LIMIT" in kinds:
+            for owner_name, owner, const in iter_tagged_constraints(obj, "LIMIT"):
+                groups.setdefault(("LIMIT", obj.name), []).append(const)
+    return groups
+
+def time_playback(scene, frame_start, frame_end, repeat=1):
+    """Best wall time of repeat plays of the frame range."""
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        for frame in range(frame_start, frame_end + 1):
+            scene.frame_set(frame)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best == None else min(best, elapsed)
+    return best
+
+def profile_driver_groups(context, objects, frame_start, frame_end, kinds=("OBJECT", "BONE", "PROPERTY_TYPE", "LIMIT"), repeat=1, max_groups=50):
+    """
+    Plays the frame range with every group muted in turn and returns the report as a dict.
+    Only the max_groups groups with the most items are profiled. Mute states and the current frame are restored.
+    """
+    scene = context.scene
+    frame_current = scene.frame_current
+    groups = collect_profile_groups(context, objects, kinds)
+    ordered = sorted(groups.items(), key=lambda item: (-len(item[1]), item[0]))
+    profiled = ordered[:max_groups]
+
+    results = []
+    try:
+        baseline = time_playback(scene, frame_start, frame_end, repeat)
+        for (kind, name), items in profiled:
+            mute_states = [item.mute for item in items]
+            try:
+                for item in items:
+                    item.mute = True
+                muted = time_playback(scene, frame_start, frame_end, repeat)
+            finally:
+                for item, mute in zip(items, mute_states):
+                    item.mute = mute
+            results.append({"kind": kind, "name": name, "count": len(items), "seconds": muted,
+                            "cost_seconds": max(0.0, baseline - muted)})
+    finally:
+        scene.frame_set(frame_current)
+
+    frames = frame_end - frame_start + 1
+    results.sort(key=lambda result: (-result["cost_seconds"], result["kind"], result["name"]))
+    for result in results:
+        result["share"] = result["cost_seconds"] / baseline if baseline > 0 else 0.0
+    return {"format": REPORT_FORMAT, "version": REPORT_VERSION,
+            "file": os.path.basename(bpy.data.filepath), "frame_start": frame_start, "frame_end": frame_end, "repeat": repeat,
+            "baseline_seconds": baseline, "fps": frames / baseline if baseline > 0 else 0.0,
+            "skipped_groups": len(ordered) - len(profiled), "groups": results}
+
+def write_profile_report(filepath, report):
+    """Writes the report with sorted keys, so reports of two rig versions can be diffed."""
+    with open(filepath, "w") as report_file:
+        json.dump(report, report_file, indent=1, sort_keys=True)
+
+def execute_profile(op, context):
+    """Runs the Profile Driver Constraints operator op, see tool_operators."""
+    report = profile_driver_groups(context, context.selected_objects, op.frame_start, op.frame_end,
+                                   op.group_kinds, op.repeat, op.max_groups)
+    write_profile_report(op.filepath, report)
+
+    for result in report["groups"]:
+        print("{:>8.1f} ms {:>5.1f}%  {:<14} {} ({})".format(result["cost_seconds"] * 1000, result["share"] * 100,
+                                                           result["kind"], result["name"], result["count"]))
+    top = ", ".join("{} {:.0f}%".format(result["name"], result["share"] * 100) for result in report["groups"][:3])
+    op.report({'INFO'}, "Playback at {:.1f} fps. Most expensive: {}".format(report["fps"], top or "-"))
+    return {'FINISHED'}
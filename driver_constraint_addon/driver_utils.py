@@ -0,0 +1,97 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+__reload_order_index__ = -2
+
+### data path and array index of the channel a TRANSFORMS variable reads
+TRANSFORM_CHANNELS = {
+    "LOC_X": ("location", 0),
+    "LOC_Y": ("location", 1),
+    "LOC_Z": ("location", 2),
+    "ROT_X": ("rotation_euler", 0),
+    "ROT_Y": ("rotation_euler", 1),
+    "ROT_Z": ("rotation_euler", 2),
+    "SCALE_X": ("scale", 0),
+    "SCALE_Y": ("scale", 1),
+    "SCALE_Z": ("scale", 2)}
+
+def get_driver_owners(obj):
+    """Returns all ID datablocks of obj that can hold drivers created by the addon."""
+    owners = [obj]
+    data = obj.data
+    if data != None:
+        owners.append(data)
+        if getattr(data, "shape_keys", None) != None:
+            owners.append(data.shape_keys)
+    for slot in obj.material_slots:
+        if slot.material != None and slot.material not in owners:
+            owners.append(slot.material)
+    return owners
+
+def is_addon_driver(curve):
+    """True for drivers built like the ones of create_property_driver: a SUM driver with one TRANSFORMS variable."""
+    driver = curve.driver
+    if driver.type != "SUM" or len(driver.variables) != 1:
+        return False
+    return driver.variables[0].type == "TRANSFORMS"
+
+def iter_addon_drivers(owners):
+    """Yields (owner, fcurve) for every addon driver of the given ID datablocks."""
+    for owner in owners:
+        animation_data = owner.animation_data
+        if animation_data == None:
+            continue
+        for curve in animation_data.drivers:
+            if is_addon_driver(curve):
+                yield owner, curve
+
+def get_channel_path(target, transform_type):
+    """Returns the (data_path, array_index) of the channel a driver target reads in its owner's action."""
+    path, array_index = TRANSFORM_CHANNELS[transform_type]
+    if target.bone_target != "" and target.id != None and target.id.type == "ARMATURE":
+        bone_path = 'pose.bones["' + target.bone_target.replace('"', '\\"') + '"].'
+        return bone_path + path, array_index
+    return path, array_index
+
+### name of the limit constraints set_limit_constraint creates
+LIMIT_CONSTRAINT_NAME = "Driver Limit"
+
+def get_owner_relation(obj, owner):
+    """Returns how owner belongs to obj: "OBJECT", "DATA", "SHAPE_KEYS" or "MATERIAL"."""
+    if owner == obj:
+        return "OBJECT"
+    if owner == obj.data:
+        return "DATA"
+    if getattr(obj.data, "shape_keys", None) == owner:
+        return "SHAPE_KEYS"
+    return "MATERIAL"
+
+def get_relation_owner(obj, relation, material_name=""):
+    """Inverse of get_owner_relation, returns None if obj has no such datablock."""
+    if relation == "OBJECT":
+        return obj
+    if relation == "DATA":
+        return obj.data
+    if relation == "SHAPE_KEYS":
+        return getattr(obj.data, "shape_keys", None)
+    for slot in obj.material_slots:
+        if slot.material != None and slot.material.name == material_name:
+            return slot.material
+    return None
@@ -0,0 +1,118 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Bulk edits. Inside a session fcurve updates and update tags of changed datablocks are collected
+### and run once per fcurve and datablock when the outermost session ends, followed by one scene update
+### that rebuilds the relations and evaluates the new drivers and constraints. The undo step of a batch
+### comes from the operator's UNDO option, so the operators don't push undo steps themselves.
+### Touching a datablock bumps the objects generation right away, so cached lookups like the shared
+### RigIndex see the addon's own edits without waiting for the scene update handler, which doesn't
+### run inside an operator or a background script.
+
+import bpy
+from . phase_timer import get_phase_timer
+from . data_cache import bump_generation
+
+__reload_order_index__ = -2
+
+_sessions = []
+
+class BulkEditSession(object):
+    """
+    Context manager around a batch of edits:
+
+        with BulkEditSession() as session:
+            session.touch(obj)
+            write_keyframes(curve, points)
+
+    Nested sessions hand their updates to the outer session.
+
+    Blender still tags the relations of the scene for every driver and constraint that is added, Python
+    can't hold that back. The session only makes sure the graph is rebuilt and evaluated once, at its end,
+    instead of whenever something reads the scene during the batch.
+    """
+    def __init__(self):
+        self.curves = {}
+        self.ids = {}
+
+    def __enter__(self):
+        _sessions.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _sessions.remove(self)
+        if len(_sessions) > 0:
+            _sessions[-1].curves.update(self.curves)
+            _sessions[-1].ids.update(self.ids)
+        else:
+            self.flush()
+        return False
+
+    def touch(self, id_data):
+        """Marks a datablock as changed, it gets one update tag when the session ends."""
+        self.ids[id_data.as_pointer()] = id_data
+        bump_generation("objects")
+
+    def update_curve(self, curve):
+        self.curves[curve.as_pointer()] = curve
+        self.touch(curve.id_data)
+
+    def flush(self):
+        """
+        Runs the collected updates and one scene update if anything changed.
+        Fcurves and datablocks removed during the session are skipped.
+        """
+        changed = len(self.ids) > 0
+        with get_phase_timer().phase("update"):
+            for curve in self.curves.values():
+                try:
+                    curve.update()
+                except ReferenceError:
+                    pass
+            for id_data in self.ids.values():
+                try:
+                    id_data.update_tag()
+                except ReferenceError:
+                    pass
+            scene = getattr(bpy.context, "scene", None)
+            if changed and scene != None:
+                scene.update()
+        self.curves.clear()
+        self.ids.clear()
+
+def get_active_session():
+    return _sessions[-1] if len(_sessions) > 0 else None
+
+def update_curve(curve):
+    """Updates curve now, or once at the end of the active session."""
+    session = get_active_session()
+    if session == None:
+        curve.update()
+    else:
+        session.update_curve(curve)
+
+def touch(id_data):
+    """Tags id_data for an update now, or once at the end of the active session."""
+    session = get_active_session()
+    if session == None:
+        id_data.update_tag()
+        bump_generation("objects")
+    else:
+        session.touch(id_data)
@@ -0,0 +1,301 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Converts scripted expression drivers into SUM drivers. Scripted expressions run through the
+### Python interpreter on every evaluation. Expressions of one variable that are piecewise linear,
+### like "var*2-0.5" or "min(1, max(0, var))", are the same as a SUM driver whose fcurve has linear
+### keyframes at the kinks, so the expression is replaced by keyframes and linear extrapolation.
+
+import bpy
+import ast
+import math
+from . driver_utils import get_driver_owners, is_addon_driver
+from . driver_lint import iter_all_drivers
+from . fcurve_utils import write_keyframes
+from . edit_session import BulkEditSession, touch
+from . driver_map import record_drivers, get_owner_objects
+
+### names of the driver namespace that are constants and the linear functions of it
+EXPRESSION_CONSTANTS = {"pi": math.pi, "e": math.e}
+LINEAR_FUNCTIONS = {"radians": math.pi / 180.0, "degrees": 180.0 / math.pi}
+
+EPSILON = 1e-9
+
+def is_close(a, b):
+    return abs(a - b) <= EPSILON * max(1.0, abs(a), abs(b))
+
+class PiecewiseLinear(object):
+    """
+    Continuous piecewise linear function, given by knots [(x, y), ...] sorted by x and the slopes
+    it continues with left of the first and right of the last knot.
+    """
+    def __init__(self, knots, left_slope, right_slope):
+        self.knots = knots
+        self.left_slope = left_slope
+        self.right_slope = right_slope
+
+    @classmethod
+    def constant(cls, value):
+        return cls([(0.0, value)], 0.0, 0.0)
+
+    @classmethod
+    def linear(cls, slope=1.0, offset=0.0):
+        return cls([(0.0, offset)], slope, slope)
+
+    def is_constant(self):
+        return self.left_slope == 0.0 and self.right_slope == 0.0 and all(is_close(y, self.knots[0][1]) for x, y in self.knots)
+
+    def value(self, x):
+        knots = self.knots
+        if x <= knots[0][0]:
+            return knots[0][1] + (x - knots[0][0]) * self.left_slope
+        if x >= knots[-1][0]:
+            return knots[-1][1] + (x - knots[-1][0]) * self.right_slope
+        for (x0, y0), (x1, y1) in zip(knots, knots[1:]):
+            if x <= x1:
+                return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+    def map(self, factor, offset=0.0):
+        """Returns factor * f + offset."""
+        return PiecewiseLinear([(x, y * factor + offset) for x, y in self.knots], self.left_slope * factor, self.right_slope * factor)
+
+    def add(self, other, sign=1.0):
+        """Returns f + sign * other."""
+        xs = sorted(set(x for x, y in self.knots + other.knots))
+        return PiecewiseLinear([(x, self.value(x) + sign * other.value(x)) for x in xs],
+                               self.left_slope + sign * other.left_slope, self.right_slope + sign * other.right_slope)
+
+    def envelope(self, other, pick):
+        """Returns pick(f, other) for pick min or max, with knots where the two functions cross."""
+        xs = sorted(set(x for x, y in self.knots + other.knots))
+        difference = self.add(other, -1.0)
+        crossings = []
+        for x0, x1 in zip(xs, xs[1:]):
+            d0, d1 = difference.value(x0), difference.value(x1)
+            if d0 * d1 < 0.0:
+                crossings.append(x0 + d0 / (d0 - d1) * (x1 - x0))
+        if difference.left_slope != 0.0 and difference.value(xs[0]) * difference.left_slope > 0.0:
+            crossings.append(xs[0] - difference.value(xs[0]) / difference.left_slope)
+        if difference.right_slope != 0.0 and difference.value(xs[-1]) * difference.right_slope < 0.0:
+            crossings.append(xs[-1] - difference.value(xs[-1]) / difference.right_slope)
+        xs = sorted(set(xs + crossings))
+
+        ### beyond the outer knots the functions don't cross anymore
+        left = self if pick(self.value(xs[0] - 1.0), other.value(xs[0] - 1.0)) == self.value(xs[0] - 1.0) else other
+        right = self if pick(self.value(xs[-1] + 1.0), other.value(xs[-1] + 1.0)) == self.value(xs[-1] + 1.0) else other
+        return PiecewiseLinear([(x, pick(self.value(x), other.value(x))) for x in xs], left.left_slope, right.right_slope)
+
+    def simplify(self):
+        """Removes the knots that lie on a straight line with their neighbours, keeps at least one knot."""
+        knots = list(self.knots)
+        i = 0
+        while i < len(knots) and len(knots) > 1:
+            x, y = knots[i]
+            slope_in = self.left_slope if i == 0 else (y - knots[i-1][1]) / (x - knots[i-1][0])
+            slope_out = self.right_slope if i == len(knots) - 1 else (knots[i+1][1] - y) / (knots[i+1][0] - x)
+            if is_close(slope_in, slope_out):
+                del knots[i]
+                i = max(0, i - 1)
+            else:
+                i += 1
+        return PiecewiseLinear(knots, self.left_slope, self.right_slope)
+
+    def to_keyframes(self):
+        """Returns (points, extrapolation) of an fcurve with linear keyframes that maps x to f(x)."""
+        function = self.simplify()
+        knots = list(function.knots)
+        if function.left_slope == 0.0 and function.right_slope == 0.0:
+            if len(knots) == 1:
+                knots.append((knots[0][0] + 1.0, knots[0][1]))
+            return knots, "CONSTANT"
+        ### linear extrapolation continues the outer segments, they get the slopes of the function
+        x0, y0 = knots[0]
+        if len(knots) == 1 or not is_close((knots[1][1] - y0) / (knots[1][0] - x0), function.left_slope):
+            knots.insert(0, (x0 - 1.0, y0 - function.left_slope))
+        x1, y1 = knots[-1]
+        if not is_close((y1 - knots[-2][1]) / (x1 - knots[-2][0]), function.right_slope):
+            knots.append((x1 + 1.0, y1 + function.right_slope))
+        return knots, "LINEAR"
+
+def get_number(node):
+    """Returns the value of a number literal node, None for other nodes. Covers ast.Num and ast.Constant."""
+    if type(node).__name__ not in ("Num", "Constant"):
+        return None
+    value = getattr(node, "value", getattr(node, "n", None))
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+def get_constant(function, what):
+    if not function.is_constant():
+        raise ValueError(what + " is not linear in the variable")
+    return function.knots[0][1]
+
+def analyze_node(node, variable_name):
+    number = get_number(node)
+    if number != None:
+        return PiecewiseLinear.constant(number)
+
+    if isinstance(node, ast.Name):
+        if node.id == variable_name:
+            return PiecewiseLinear.linear()
+        if node.id in EXPRESSION_CONSTANTS:
+            return PiecewiseLinear.constant(EXPRESSION_CONSTANTS[node.id])
+        raise ValueError("unknown name " + node.id)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = analyze_node(node.operand, variable_name)
+        return operand.map(-1.0) if isinstance(node.op, ast.USub) else operand
+
+    if isinstance(node, ast.BinOp):
+        left = analyze_node(node.left, variable_name)
+        right = analyze_node(node.right, variable_name)
+        if isinstance(node.op, ast.Add):
+            return left.add(right)
+        if isinstance(node.op, ast.Sub):
+            return left.add(right, -1.0)
+        if isinstance(node.op, ast.Mult):
+            if right.is_constant():
+                return left.map(right.knots[0][1])
+            return right.map(get_constant(left, "product"))
+        if isinstance(node.op, ast.Div):
+            divisor = get_constant(right, "division")
+            if divisor == 0.0:
+                raise ValueError("division by zero")
+            return left.map(1.0 / divisor)
+        if isinstance(node.op, ast.Pow):
+            return PiecewiseLinear.constant(get_constant(left, "power") ** get_constant(right, "power"))
+        raise ValueError(type(node.op).__name__ + " operator is not supported")
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        name = node.func.id
+        if len(node.keywords) > 0 or any(isinstance(arg, getattr(ast, "Starred", ())) for arg in node.args):
+            raise ValueError(name + "() with keyword or star arguments")
+        args = [analyze_node(arg, variable_name) for arg in node.args]
+        if name in ("min", "max") and len(args) > 0:
+            pick = min if name == "min" else max
+            result = args[0]
+            for arg in args[1:]:
+                result = result.envelope(arg, pick)
+            return result
+        if name == "abs" and len(args) == 1:
+            return args[0].envelope(args[0].map(-1.0), max)
+        if name in LINEAR_FUNCTIONS and len(args) == 1:
+            return args[0].map(LINEAR_FUNCTIONS[name])
+        raise ValueError(name + "() is not piecewise linear")
+
+    raise ValueError(type(node).__name__ + " is not supported")
+
+def analyze_expression(expression, variable_name):
+    """
+    Returns the PiecewiseLinear function of variable_name that expression computes.
+    Raises ValueError with the reason if the expression is not piecewise linear in the variable.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        raise ValueError("invalid expression")
+    return analyze_node(tree.body, variable_name)
+
+def apply_modifier(function, modifier):
+    """Applies a first order polynomial generator, the modifier scripted drivers get by default."""
+    if modifier.type != "GENERATOR" or modifier.mode != "POLYNOMIAL" or modifier.poly_order != 1:
+        raise ValueError("curve has a " + modifier.type.lower() + " modifier")
+    if modifier.use_additive or modifier.use_restricted_range or modifier.use_influence:
+        raise ValueError("curve has an additive or restricted generator modifier")
+    return function.map(modifier.coefficients[1], modifier.coefficients[0])
+
+def get_conversion(curve):
+    """
+    Returns (points, extrapolation) of the keyframes that replace the expression of a scripted driver.
+    Raises ValueError with the reason if the driver can't be converted.
+    """
+    driver = curve.driver
+    if driver.use_self:
+        raise ValueError("expression uses self")
+    if len(driver.variables) != 1:
+        raise ValueError("expression reads {} variables".format(len(driver.variables)))
+    if len(curve.keyframe_points) > 0:
+        raise ValueError("curve has keyframes")
+    function = analyze_expression(driver.expression, driver.variables[0].name)
+    for modifier in curve.modifiers:
+        if not modifier.mute:
+            function = apply_modifier(function, modifier)
+    return function.to_keyframes()
+
+def convert_driver(curve, points, extrapolation):
+    """Turns a scripted driver into a SUM driver of its variable with the given keyframes."""
+    for modifier in list(curve.modifiers):
+        curve.modifiers.remove(modifier)
+    curve.driver.type = "SUM"
+    write_keyframes(curve, points, "LINEAR")
+    curve.extrapolation = extrapolation
+
+def convert_scripted_drivers(drivers, report_only=False, scene=None):
+    """
+    Converts the scripted drivers of drivers, an iterable of (owner, fcurve).
+    Returns (converted, skipped) lists of (owner, fcurve, message) tuples, the message of a converted
+    driver is its expression, the one of a skipped driver the reason it was kept.
+    Converted drivers that read a transform channel are added to the driver map of scene.
+    """
+    converted = []
+    skipped = []
+    with BulkEditSession():
+        for owner, curve in list(drivers):
+            if curve.driver.type != "SCRIPTED":
+                continue
+            expression = curve.driver.expression
+            try:
+                points, extrapolation = get_conversion(curve)
+            except ValueError as error:
+                skipped.append((owner, curve, str(error)))
+                continue
+            if not report_only:
+                convert_driver(curve, points, extrapolation)
+                touch(owner)
+            converted.append((owner, curve, expression))
+
+    mapped = [(owner, curve) for owner, curve, expression in converted if is_addon_driver(curve)]
+    if scene != None and not report_only and len(mapped) > 0:
+        owner_objects = get_owner_objects()
+        record_drivers(scene, [(owner_objects[owner.as_pointer()], owner, curve) for owner, curve in mapped if owner.as_pointer() in owner_objects])
+    return converted, skipped
+
+def execute_convert(op, context):
+    """Runs the Convert Scripted Drivers operator op, see tool_operators."""
+    if op.scope == "FILE":
+        drivers = iter_all_drivers()
+    else:
+        owners = []
+        for obj in context.selected_objects:
+            owners.extend(owner for owner in get_driver_owners(obj) if owner not in owners)
+        drivers = [(owner, curve) for owner in owners if owner.animation_data != None for curve in owner.animation_data.drivers]
+    converted, skipped = convert_scripted_drivers(drivers, op.report_only, context.scene)
+
+    for owner, curve, expression in converted:
+        print("{} {} {}[{}]: {}".format("Convertible" if op.report_only else "Converted", owner.name, curve.data_path, curve.array_index, expression))
+    for owner, curve, message in skipped:
+        print("Kept {} {}[{}] \"{}\": {}".format(owner.name, curve.data_path, curve.array_index, curve.driver.expression, message))
+    msg = "{} scripted drivers {}, {} kept.".format(len(converted), "can be converted" if op.report_only else "converted", len(skipped))
+    if len(skipped) > 0:
+        op.report({'WARNING'}, msg + " See console for details.")
+    else:
+        op.report({'INFO'}, msg)
+    return {'FINISHED'}
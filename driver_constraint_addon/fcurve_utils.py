@@ -0,0 +1,112 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from . edit_session import update_curve
+from . phase_timer import get_phase_timer
+
+__reload_order_index__ = -2
+
+### enum values of FCurveKeyframePoint.interpolation as stored in the keyframes
+INTERPOLATION_INDEX = {"CONSTANT": 0, "LINEAR": 1, "BEZIER": 2}
+
+RESPONSE_CURVES = (
+    ("LINEAR", "Linear", "Two keyframes, the property follows the driver linearly"),
+    ("EASE_IN", "Ease In", "Slow start, fast end. Good for corrective shapes"),
+    ("EASE_OUT", "Ease Out", "Fast start, slow end"),
+    ("SMOOTH", "Smooth", "Slow start and slow end"))
+
+def response_curve_points(min_value, max_value, prop_min_value, prop_max_value, response_curve="LINEAR", count=2):
+    """Returns a list of (driver value, property value) points of the given response curve."""
+    if response_curve == "LINEAR" or count < 3:
+        return [(min_value, prop_min_value), (max_value, prop_max_value)]
+
+    points = []
+    for i in range(count):
+        t = i / (count - 1)
+        if response_curve == "EASE_IN":
+            factor = t * t
+        elif response_curve == "EASE_OUT":
+            factor = 1.0 - (1.0 - t) * (1.0 - t)
+        else:
+            factor = t * t * (3.0 - 2.0 * t)
+        points.append((min_value + (max_value - min_value) * t, prop_min_value + (prop_max_value - prop_min_value) * factor))
+    return points
+
+def clear_keyframes(curve):
+    """Removes all keyframes of curve without recalculating the curve after every removal."""
+    keyframe_points = curve.keyframe_points
+    if hasattr(keyframe_points, "clear"):
+        keyframe_points.clear()
+        return
+    for i in range(len(keyframe_points) - 1, -1, -1):
+        keyframe_points.remove(keyframe_points[i], fast=True)
+
+def sort_keyframes(points, interpolation="LINEAR"):
+    """
+    Returns points sorted by x and a list with the interpolation of every point. interpolation
+    is either one enum value for all points or a sequence with one value per point.
+    """
+    if isinstance(interpolation, str):
+        return sorted(points), [interpolation] * len(points)
+    pairs = sorted(zip(points, interpolation), key=lambda pair: pair[0])
+    return [point for point, point_interpolation in pairs], [point_interpolation for point, point_interpolation in pairs]
+
+def write_keyframes(curve, points, interpolation="LINEAR"):
+    """
+    Replaces all keyframes of curve with points, a list of (x, y) tuples, see sort_keyframes for interpolation.
+    Keyframes are allocated with one add call and filled with foreach_set.
+    """
+    points, interpolations = sort_keyframes(points, interpolation)
+    write_keyframe_array(curve, [value for point in points for value in point], interpolations)
+
+def write_keyframe_array(curve, coordinates, interpolation="LINEAR"):
+    """
+    Like write_keyframes, but takes a flat sequence [x0, y0, x1, y1, ...] sorted by x, e.g. a numpy array.
+    interpolation is one enum value for all keyframes or a sequence with one value per keyframe.
+    """
+    timer = get_phase_timer()
+    with timer.phase("keyframe_clear"):
+        clear_keyframes(curve)
+    count = len(coordinates) // 2
+    if count == 0:
+        update_curve(curve)
+        return
+
+    with timer.phase("keyframe_insert"):
+        keyframe_points = curve.keyframe_points
+        keyframe_points.add(count)
+        keyframe_points.foreach_set("co", coordinates)
+        keyframe_points.foreach_set("handle_left", coordinates)
+        keyframe_points.foreach_set("handle_right", coordinates)
+        interpolations = [interpolation] * count if isinstance(interpolation, str) else interpolation
+        try:
+            keyframe_points.foreach_set("interpolation", [INTERPOLATION_INDEX[value] for value in interpolations])
+        except (TypeError, RuntimeError):
+            ### older Blender versions do not support raw access to enum properties
+            for point, value in zip(keyframe_points, interpolations):
+                point.interpolation = value
+    ### recalculates the handles of the new keyframes, once per batch inside a bulk edit session
+    update_curve(curve)
+
+def read_keyframes(curve, attribute="co"):
+    """Returns the keyframe coordinates (or handles) of curve as a flat list [x0, y0, x1, y1, ...]."""
+    coordinates = [0.0] * (len(curve.keyframe_points) * 2)
+    curve.keyframe_points.foreach_get(attribute, coordinates)
+    return coordinates
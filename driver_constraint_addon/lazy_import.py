@@ -0,0 +1,41 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import importlib
+
+__reload_order_index__ = -2
+
+class LazyModule(object):
+    """
+    Stands in for a module that is imported the first time one of its attributes is used.
+    Keeps expensive imports like numpy out of the addon startup.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module == None:
+            self._module = importlib.import_module(self._name)
+            ### later lookups find the attributes directly and don't come here anymore
+            self.__dict__.update(self._module.__dict__)
+        return getattr(self._module, attribute)
+
+numpy = LazyModule("numpy")
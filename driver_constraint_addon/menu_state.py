@@ -0,0 +1,79 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Visibility of the addon's menu and panel entries. The draw callbacks run on every redraw, so the
+### state only depends on O(1) values: the active object and bone and the mode. Nothing is counted
+### while drawing, the selection the entries need is checked by the operators when they are invoked.
+
+import bpy
+import time
+
+__reload_order_index__ = -1
+
+### counters of the draw callbacks, reported by the draw stats operator
+draw_stats = {"calls": 0, "rebuilds": 0, "seconds": 0.0}
+
+_menu_state = [None, None]
+
+def get_menu_state(context):
+    """Returns a dict that tells which entries the menus and tool panels show."""
+    active_object = context.active_object
+    active_bone = context.active_pose_bone
+    key = (active_object.as_pointer() if active_object != None else 0,
+           active_bone.as_pointer() if active_bone != None else 0,
+           context.mode)
+    if _menu_state[0] != key:
+        draw_stats["rebuilds"] += 1
+        is_armature = active_object != None and active_object.type == "ARMATURE"
+        _menu_state[0] = key
+        _menu_state[1] = {"driver": active_object != None,
+                          "action": context.mode == "POSE" and is_armature,
+                          "rbf": is_armature and active_bone != None}
+    return _menu_state[1]
+
+def timed_draw(draw):
+    """Decorator for draw callbacks that adds their calls and time to draw_stats."""
+    def timed(self, context):
+        start = time.perf_counter()
+        try:
+            draw(self, context)
+        finally:
+            draw_stats["calls"] += 1
+            draw_stats["seconds"] += time.perf_counter() - start
+    return timed
+
+class ReportDrawStats(bpy.types.Operator):
+    """Reports how much redraw time the menu and panel entries of the addon take"""
+    bl_idname = "object.driver_constraint_draw_stats"
+    bl_label = "Driver Constraint Draw Stats"
+    bl_description = "Reports how much redraw time the menu and panel entries of the addon take"
+
+    reset = bpy.props.BoolProperty(name="Reset", default=False, description="Reset the counters after reporting them")
+
+    def execute(self, context):
+        calls = draw_stats["calls"]
+        average = draw_stats["seconds"] / calls * 1000000 if calls > 0 else 0.0
+        msg = "{} draws, {:.1f} ms in total, {:.1f} us per draw, state rebuilt {} times."
+        self.report({'INFO'}, msg.format(calls, draw_stats["seconds"] * 1000, average, draw_stats["rebuilds"]))
+        if self.reset:
+            draw_stats.update({"calls": 0, "rebuilds": 0, "seconds": 0.0})
+        return {'FINISHED'}
+
+classes = (ReportDrawStats,)
@@ -0,0 +1,111 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import re
+from . data_path import parse_data_path, join_segments, Segment
+
+__reload_order_index__ = -1
+
+### transform types that change their sign when mirrored along the X axis
+MIRROR_FLIP_TYPES = ("LOC_X", "ROT_Y", "ROT_Z")
+
+_SIDES = {"L": "R", "R": "L", "l": "r", "r": "l",
+          "Left": "Right", "Right": "Left", "left": "right", "right": "left",
+          "LEFT": "RIGHT", "RIGHT": "LEFT"}
+
+### name.L, name_L, name-L, name.left ... with an optional .001 number at the end
+_SUFFIX = re.compile(r"^(.*[._\- ])(L|R|l|r|Left|Right|left|right|LEFT|RIGHT)(\.\d+)?$")
+### L_name, Left.name ...
+_PREFIX = re.compile(r"^(L|R|l|r|Left|Right|left|right|LEFT|RIGHT)([._\- ].*)$")
+### nameLeft, nameRight
+_CAMEL = re.compile(r"^(.*[a-z0-9])(Left|Right)(\.\d+)?$")
+
+def mirror_name(name):
+    """Returns the name of the other side, e.g. "hand.R" for "hand.L", or None for names without side."""
+    match = _SUFFIX.match(name)
+    if match:
+        return match.group(1) + _SIDES[match.group(2)] + (match.group(3) or "")
+    match = _PREFIX.match(name)
+    if match:
+        return _SIDES[match.group(1)] + match.group(2)
+    match = _CAMEL.match(name)
+    if match:
+        return match.group(1) + _SIDES[match.group(2)] + (match.group(3) or "")
+    return None
+
+def build_mirror_index(names):
+    """Returns a dict name -> counterpart for every name whose counterpart is in names as well."""
+    names = set(names)
+    pairs = {}
+    for name in names:
+        counterpart = mirror_name(name)
+        if counterpart != None and counterpart in names:
+            pairs[name] = counterpart
+    return pairs
+
+def mirror_data_path(data_path, name_pairs):
+    """Replaces every key of data_path that has a counterpart in name_pairs. Returns None if nothing changed."""
+    try:
+        path = parse_data_path(data_path)
+    except ValueError:
+        return None
+    changed = False
+    segments = []
+    for segment in path.segments:
+        if segment.kind == "KEY" and segment.value in name_pairs:
+            segment = Segment("KEY", name_pairs[segment.value])
+            changed = True
+        segments.append(segment)
+    if not changed:
+        return None
+    return join_segments(segments)
+
+def mirror_op(op, bone_pairs, name_pairs):
+    """
+    Returns the mirrored DriverOp of op or None if neither its bone nor its data path have a counterpart.
+    The driver values of channels that flip along the X axis are negated.
+    """
+    bone = bone_pairs.get(op.bone) if op.bone != None else None
+    data_path = mirror_data_path(op.data_path, name_pairs)
+    if bone == None and data_path == None:
+        return None
+
+    points = op.points
+    if op.transform_type in MIRROR_FLIP_TYPES:
+        points = tuple((-x, y) for x, y in points)
+    return op._replace(bone=bone or op.bone, data_path=data_path or op.data_path, points=points)
+
+def mirror_plan(plan, bone_pairs, name_pairs_by_object):
+    """
+    Returns the mirrored operations of plan. bone_pairs maps driver bone names, name_pairs_by_object
+    maps object names to the name pairs of their key blocks, bones, modifiers and constraints.
+    Operations that are already part of plan are not added twice.
+    """
+    existing = set((op.object, op.data_path, op.bone) for op in plan)
+    mirrored = []
+    for op in plan:
+        mirrored_op = mirror_op(op, bone_pairs, name_pairs_by_object.get(op.object, {}))
+        if mirrored_op == None:
+            continue
+        key = (mirrored_op.object, mirrored_op.data_path, mirrored_op.bone)
+        if key not in existing:
+            existing.add(key)
+            mirrored.append(mirrored_op)
+    return mirrored
@@ -0,0 +1,118 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Phase timing of operator runs. The instrumented functions time their phases with the active
+### timer, which is a NullTimer whose phases do nothing unless a PhaseTimer has been started:
+###
+###     timer = get_phase_timer()
+###     with timer.phase("driver_add"):
+###         curve = data.driver_add(data_path)
+
+import json
+import time
+
+__reload_order_index__ = -3
+
+class NullPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+class NullTimer(object):
+    """Timer that records nothing, active while no PhaseTimer runs."""
+    enabled = False
+    _phase = NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+class TimedPhase(object):
+    def __init__(self, phases, name):
+        self.phases = phases
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record = self.phases.get(self.name)
+        if record == None:
+            record = self.phases[self.name] = [0.0, 0]
+        record[0] += time.perf_counter() - self.start
+        record[1] += 1
+        return False
+
+class PhaseTimer(object):
+    """
+    Records the wall time and number of calls of every phase while it is active:
+
+        with PhaseTimer() as timer:
+            operator.execute(context)
+        print(timer.summary())
+
+    Nested phases are counted in both phases.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.phases = {}
+        self.seconds = 0.0
+
+    def __enter__(self):
+        _active_timers.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.seconds = time.perf_counter() - self.start
+        _active_timers.remove(self)
+        return False
+
+    def phase(self, name):
+        return TimedPhase(self.phases, name)
+
+    def to_dict(self):
+        return {"seconds": self.seconds,
+                "phases": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.phases.items()}}
+
+    def summary(self, count=3):
+        """Short text with the total time and the count slowest phases."""
+        slowest = sorted(self.phases.items(), key=lambda item: -item[1][0])[:count]
+        phases = ", ".join("{} {:.2f} ms ({}x)".format(name, seconds * 1000, calls) for name, (seconds, calls) in slowest)
+        return "{:.1f} ms: {}".format(self.seconds * 1000, phases or "-")
+
+_null_timer = NullTimer()
+_active_timers = []
+
+def get_phase_timer():
+    """Returns the innermost active PhaseTimer or the NullTimer."""
+    return _active_timers[-1] if len(_active_timers) > 0 else _null_timer
+
+def write_phase_record(filepath, record):
+    """Appends record as one JSON line to filepath, prints it to the console if filepath is empty."""
+    line = json.dumps(record, sort_keys=True)
+    if filepath == "":
+        print(line)
+        return
+    with open(filepath, "a") as log_file:
+        log_file.write(line + "\n")
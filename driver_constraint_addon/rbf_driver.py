@@ -0,0 +1,222 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Pose space drivers. Example poses of some bones are stored together with the wanted
+### property value in the armature object's "rbf_setups" ID property. Solving computes
+### radial basis function weights, the driver then calls rbf_pose() from the driver namespace
+### with the euler rotations of the bones. The expression names the rig by the id in its "rbf_id"
+### ID property, so renaming the rig doesn't break the drivers. Drivers of older versions name
+### the rig itself.
+
+import bpy
+import uuid
+from . lazy_import import numpy as np
+from . data_cache import get_generation
+from . constraint_operator import get_driven_object, add_property_driver
+from . fcurve_utils import clear_keyframes
+from . tool_operators import RBF_NAMESPACE_FUNCTION
+
+SETUPS_PROPERTY = "rbf_setups"
+RIG_ID_PROPERTY = "rbf_id"
+ROTATION_TYPES = ("ROT_X", "ROT_Y", "ROT_Z")
+### ID property arrays can't hold strings, so the bone names of a setup are stored as one string
+BONE_SEPARATOR = "\n"
+
+### setup key -> (poses, weights, sigma) as numpy arrays
+_solved_setups = {}
+### [objects generation, {rig id: object name}]
+_rig_names = [None, {}]
+
+def clear_solved_setups():
+    _solved_setups.clear()
+    _rig_names[0] = None
+
+def get_rig_id(rig):
+    """Returns the id of rig, a new one if it has none or shares it with a copy of itself."""
+    rig_id = rig.get(RIG_ID_PROPERTY)
+    if rig_id == None or find_rig(rig_id) != rig:
+        rig_id = uuid.uuid4().hex
+        rig[RIG_ID_PROPERTY] = rig_id
+        _rig_names[0] = None
+    return rig_id
+
+def find_rig(rig_key):
+    """
+    Returns the rig with the id rig_key, or the object called rig_key for drivers of older versions.
+    The ids are scanned once per objects generation, and again if the rig of an id has been renamed since.
+    """
+    generation = get_generation("objects")
+    name = _rig_names[1].get(rig_key) if _rig_names[0] == generation else None
+    rig = bpy.data.objects.get(name) if name != None else None
+    if rig == None or rig.get(RIG_ID_PROPERTY) != rig_key:
+        if _rig_names[0] != generation or name != None:
+            _rig_names[0] = generation
+            _rig_names[1] = {}
+            for obj in bpy.data.objects:
+                if RIG_ID_PROPERTY in obj:
+                    _rig_names[1].setdefault(obj[RIG_ID_PROPERTY], obj.name)
+        rig = bpy.data.objects.get(_rig_names[1].get(rig_key, rig_key))
+    return rig
+
+def get_setup_key(rig_id, setup_name):
+    return rig_id + "|" + setup_name
+
+def get_bone_rotation(pose_bone):
+    """Returns the local euler rotation a ROT_X/Y/Z driver variable reads from the bone."""
+    if pose_bone.rotation_mode == "QUATERNION":
+        return list(pose_bone.rotation_quaternion.to_euler("XYZ"))
+    return list(pose_bone.rotation_euler)
+
+def get_pose_distances(inputs, poses):
+    """Euclidean distances between every row of inputs and every row of poses."""
+    difference = inputs[:, np.newaxis, :] - poses[np.newaxis, :, :]
+    return np.sqrt(np.sum(difference * difference, axis=2))
+
+def gaussian_kernel(distances, sigma):
+    return np.exp(-(distances / sigma) ** 2)
+
+def get_default_sigma(poses):
+    """Mean distance between the example poses, a good default width of the kernel."""
+    if len(poses) < 2:
+        return 1.0
+    distances = get_pose_distances(poses, poses)
+    mean = distances.sum() / (len(poses) * (len(poses) - 1))
+    return float(mean) if mean > 0.0 else 1.0
+
+def solve_rbf_weights(poses, values, sigma=0.0, regularization=1e-6):
+    """
+    Solves the weights of a gaussian RBF that interpolates values at poses.
+    poses is an (n, d) array, values an (n,) array. Returns (weights, sigma).
+    """
+    poses = np.asarray(poses, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if sigma <= 0.0:
+        sigma = get_default_sigma(poses)
+    kernel = gaussian_kernel(get_pose_distances(poses, poses), sigma)
+    kernel += np.eye(len(poses)) * regularization
+    weights = np.linalg.solve(kernel, values)
+    return weights, sigma
+
+def evaluate_rbf(inputs, poses, weights, sigma):
+    """Evaluates the RBF at inputs, an (m, d) array, and returns m values."""
+    inputs = np.atleast_2d(np.asarray(inputs, dtype=np.float64))
+    return gaussian_kernel(get_pose_distances(inputs, poses), sigma).dot(weights)
+
+def load_setup(setup_key):
+    """Returns the solved (poses, weights, sigma) of a setup, read from the ID property once and cached."""
+    solved = _solved_setups.get(setup_key)
+    if solved == None:
+        rig_key, setup_name = setup_key.split("|", 1)
+        rig = find_rig(rig_key)
+        if rig == None or SETUPS_PROPERTY not in rig or setup_name not in rig[SETUPS_PROPERTY]:
+            return None
+        setup = rig[SETUPS_PROPERTY][setup_name]
+        if "weights" not in setup:
+            return None
+        solved = (np.array([list(pose) for pose in setup["poses"]], dtype=np.float64),
+                  np.array(list(setup["weights"]), dtype=np.float64),
+                  float(setup["sigma"]))
+        _solved_setups[setup_key] = solved
+    return solved
+
+def rbf_pose(setup_key, *inputs):
+    """Driver namespace function, evaluates a solved setup for the current bone rotations."""
+    solved = load_setup(setup_key)
+    if solved == None:
+        return 0.0
+    poses, weights, sigma = solved
+    return float(evaluate_rbf([inputs], poses, weights, sigma)[0])
+
+def get_setups(rig):
+    if SETUPS_PROPERTY not in rig:
+        rig[SETUPS_PROPERTY] = {}
+    return rig[SETUPS_PROPERTY]
+
+def create_rbf_driver(context, obj, prop_data_path, rig, setup_name, bone_names):
+    """Adds the scripted driver that evaluates the setup on prop_data_path of obj. Returns the number of drivers."""
+    curves = add_property_driver(context, obj, prop_data_path, "")
+    setup_key = get_setup_key(get_rig_id(rig), setup_name)
+    for curve in curves:
+        driver = curve.driver
+        driver.type = "SCRIPTED"
+        while len(driver.variables) > 0:
+            driver.variables.remove(driver.variables[0])
+        variable_names = []
+        for bone_name in bone_names:
+            for transform_type in ROTATION_TYPES:
+                variable = driver.variables.new()
+                variable.name = "v{}".format(len(variable_names))
+                variable.type = "TRANSFORMS"
+                variable.targets[0].id = rig
+                variable.targets[0].bone_target = bone_name
+                variable.targets[0].transform_space = "LOCAL_SPACE"
+                variable.targets[0].transform_type = transform_type
+                variable_names.append(variable.name)
+        driver.expression = '{}("{}", {})'.format(RBF_NAMESPACE_FUNCTION, setup_key.replace('"', '\\"'), ", ".join(variable_names))
+        clear_keyframes(curve)
+        while len(curve.modifiers) > 0:
+            curve.modifiers.remove(curve.modifiers[0])
+    return len(curves)
+
+def execute_rbf(op, context):
+    """Runs the RBF Pose Driver operator op, see tool_operators."""
+    rig = context.active_object
+    setups = get_setups(rig)
+    ### the setup may be cached under the id of the rig and under its name
+    clear_solved_setups()
+
+    if op.action == "CLEAR":
+        if op.setup_name in setups:
+            del setups[op.setup_name]
+        op.report({'INFO'}, "Setup {} has been cleared.".format(op.setup_name))
+        return {'FINISHED'}
+
+    if op.action == "ADD_POSE":
+        bone_names = sorted(bone.name for bone in context.selected_pose_bones)
+        if op.setup_name not in setups:
+            setups[op.setup_name] = {"bones": BONE_SEPARATOR.join(bone_names), "poses": [], "values": []}
+        setup = setups[op.setup_name]
+        if setup["bones"].split(BONE_SEPARATOR) != bone_names:
+            op.report({'ERROR'}, "Select the bones of the setup: " + setup["bones"].replace(BONE_SEPARATOR, ", "))
+            return {'CANCELLED'}
+        pose = [value for bone_name in bone_names for value in get_bone_rotation(rig.pose.bones[bone_name])]
+        setup["poses"] = [list(p) for p in setup["poses"]] + [pose]
+        setup["values"] = list(setup["values"]) + [op.target_value]
+        op.report({'INFO'}, "Pose {} has been added to {}.".format(len(setup["poses"]), op.setup_name))
+        return {'FINISHED'}
+
+    if op.setup_name not in setups or len(setups[op.setup_name]["poses"]) < 2:
+        op.report({'ERROR'}, "Add at least two poses to the setup first.")
+        return {'CANCELLED'}
+    setup = setups[op.setup_name]
+    try:
+        weights, sigma = solve_rbf_weights([list(pose) for pose in setup["poses"]], list(setup["values"]), op.sigma)
+    except np.linalg.LinAlgError:
+        op.report({'ERROR'}, "The poses can not be interpolated, remove duplicate poses.")
+        return {'CANCELLED'}
+    setup["weights"] = [float(weight) for weight in weights]
+    setup["sigma"] = sigma
+
+    obj = get_driven_object(context)
+    if obj == None or obj == rig or create_rbf_driver(context, obj, op.prop_data_path, rig, op.setup_name, setup["bones"].split(BONE_SEPARATOR)) == 0:
+        op.report({'WARNING'}, op.prop_data_path + " Property has not been found.")
+        return {'CANCELLED'}
+    op.report({'INFO'}, "Pose driver {} has been created. Python scripts have to be allowed to auto run.".format(op.setup_name))
+    return {'FINISHED'}
@@ -0,0 +1,102 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+from . data_cache import get_generation
+
+__reload_order_index__ = -1
+
+class RigIndex(object):
+    """
+    Name -> item lookup tables for the RNA collections that are searched while resolving
+    data paths. Every table is built with a single pass over its collection the first
+    time it is needed and then shared by all lookups of one operator run.
+    Create a new index for every run, it does not notice renamed or removed items.
+    """
+    def __init__(self):
+        self.tables = {}
+
+    def _table(self, owner, name, collection):
+        key = (owner.as_pointer(), name)
+        table = self.tables.get(key)
+        if table == None:
+            table = dict(collection.items()) if collection != None else {}
+            self.tables[key] = table
+        return table
+
+    def bones(self, obj):
+        if obj.type != "ARMATURE":
+            return {}
+        return self._table(obj, "bones", obj.data.bones)
+
+    def pose_bones(self, obj):
+        if obj.pose == None:
+            return {}
+        return self._table(obj, "pose_bones", obj.pose.bones)
+
+    def key_blocks(self, obj):
+        if obj.type not in ["MESH", "CURVE", "LATTICE"] or obj.data.shape_keys == None:
+            return {}
+        return self._table(obj, "key_blocks", obj.data.shape_keys.key_blocks)
+
+    def modifiers(self, obj):
+        return self._table(obj, "modifiers", obj.modifiers)
+
+    def constraints(self, owner):
+        """Constraints of an object or a pose bone."""
+        return self._table(owner, "constraints", owner.constraints)
+
+    def drivers(self, owner):
+        """Driver fcurves of an ID datablock grouped by data path."""
+        key = (owner.as_pointer(), "drivers")
+        table = self.tables.get(key)
+        if table == None:
+            table = {}
+            if owner.animation_data != None:
+                for curve in owner.animation_data.drivers:
+                    table.setdefault(curve.data_path, []).append(curve)
+            self.tables[key] = table
+        return table
+
+    def add_drivers(self, owner, curves):
+        """Adds driver fcurves created during the run to the drivers table of owner, if it has been built."""
+        table = self.tables.get((owner.as_pointer(), "drivers"))
+        if table != None:
+            for curve in curves:
+                if curve not in table.setdefault(curve.data_path, []):
+                    table[curve.data_path].append(curve)
+
+    def bone_constraints(self, obj, bone_name):
+        pose_bone = self.pose_bones(obj).get(bone_name)
+        if pose_bone == None:
+            return {}
+        return self.constraints(pose_bone)
+
+_shared_index = [None, None]
+
+def get_shared_rig_index():
+    """
+    Returns a RigIndex that is shared by all callers until object data changes.
+    Used for single lookups, so they don't have to build a new index each time.
+    """
+    generation = get_generation("objects")
+    if _shared_index[0] != generation:
+        _shared_index[0] = generation
+        _shared_index[1] = RigIndex()
+    return _shared_index[1]
@@ -0,0 +1,244 @@
+'''
+Copyright (C) 2016 Andreas Esau
+andreasesau@gmail.com
+
+Created by Andreas Esau
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+### Operators of the tools that aren't needed to start the addon. Their classes are registered
+### with the addon, so they show up in the search and menus right away, but the modules that do
+### the work are only imported the first time one of them runs. Every execute hands the operator
+### to a function of its module, e.g. driver_bake.execute_bake. The modules are listed in
+### deferred_modules of __init__, so setup_addon_modules doesn't import them at startup.
+
+import bpy
+import sys
+from bpy.app.handlers import persistent
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+from . lazy_import import LazyModule
+
+__reload_order_index__ = -1
+
+driver_bake = LazyModule(__package__ + ".driver_bake")
+driver_lint = LazyModule(__package__ + ".driver_lint")
+expression_convert = LazyModule(__package__ + ".expression_convert")
+driver_profiler = LazyModule(__package__ + ".driver_profiler")
+rbf_driver = LazyModule(__package__ + ".rbf_driver")
+driver_io = LazyModule(__package__ + ".driver_io")
+batch_driver = LazyModule(__package__ + ".batch_driver")
+
+### name of the RBF function in the driver namespace, part of the expressions of saved RBF drivers
+RBF_NAMESPACE_FUNCTION = "rbf_pose"
+
+PROFILE_GROUP_KINDS = (("OBJECT", "Object", "Group the drivers by the object they drive"),
+                       ("BONE", "Target Bone", "Group the drivers by the bone or object they read"),
+                       ("PROPERTY_TYPE", "Property Type", "Group the drivers by the type of the driven property"),
+                       ("LIMIT", "Driver Limits", "Group the Driver Limit constraints by object"))
+
+class BakeDriverConstraints(bpy.types.Operator):
+    """Bakes the driver constraints of the selected objects into keyframes"""
+    bl_idname = "object.bake_driver_constraints"
+    bl_label = "Bake Driver Constraints"
+    bl_description = "Bakes the driver constraints of the selected objects into keyframes without stepping through the frames"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    frame_start = bpy.props.IntProperty(name="Start Frame", default=1)
+    frame_end = bpy.props.IntProperty(name="End Frame", default=250)
+    frame_step = bpy.props.IntProperty(name="Frame Step", default=1, min=1)
+    driver_handling = bpy.props.EnumProperty(name="Drivers", items=(("KEEP", "Keep", "Keep the drivers, they override the baked keyframes"),
+                                                                    ("MUTE", "Mute", "Mute the baked drivers"),
+                                                                    ("REMOVE", "Remove", "Remove the baked drivers")), default="MUTE")
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) > 0
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        return driver_bake.execute_bake(self, context)
+
+class LintDriverConstraints(bpy.types.Operator):
+    """Checks all drivers of the file for broken targets, duplicates, muted key blocks and orphaned Driver Limits"""
+    bl_idname = "object.lint_driver_constraints"
+    bl_label = "Lint Drivers"
+    bl_description = "Checks all drivers of the file for broken targets, duplicates, muted key blocks and orphaned Driver Limit constraints"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    fix = bpy.props.EnumProperty(name="Fix", items=(("REPORT", "Report Only", "Only report the problems"),
+                                                    ("MUTE", "Mute", "Mute the broken drivers and constraints"),
+                                                    ("REMOVE", "Remove", "Remove the broken drivers and constraints")), default="REPORT")
+    severity = bpy.props.EnumProperty(name="Severity", items=(("ERROR", "Errors", "Only fix errors"),
+                                                              ("WARNING", "Errors and Warnings", "Fix errors and warnings")), default="ERROR")
+
+    def execute(self, context):
+        return driver_lint.execute_lint(self, context)
+
+class ConvertScriptedDrivers(bpy.types.Operator):
+    """Replaces scripted expression drivers that map one variable linearly or clamped by SUM drivers with keyframes"""
+    bl_idname = "object.convert_scripted_drivers"
+    bl_label = "Convert Scripted Drivers"
+    bl_description = "Replaces scripted expressions like var*2-0.5 or max(0, var) with SUM drivers and keyframes, which evaluate without Python"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    scope = bpy.props.EnumProperty(name="Drivers", items=(("SELECTED", "Selected Objects", "Drivers of the selected objects and their data"),
+                                                          ("FILE", "Whole File", "All drivers of the file")), default="SELECTED")
+    report_only = bpy.props.BoolProperty(name="Report Only", default=False, description="Only report which drivers can be converted")
+
+    def execute(self, context):
+        return expression_convert.execute_convert(self, context)
+
+class ProfileDriverConstraints(bpy.types.Operator, ExportHelper):
+    """Times playback with the driver constraints muted in groups and ranks the groups by their cost"""
+    bl_idname = "object.profile_driver_constraints"
+    bl_label = "Profile Driver Constraints"
+    bl_description = "Times playback with the driver constraints of the selected objects muted in groups and writes a report"
+
+    filename_ext = ".json"
+    filter_glob = bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+    frame_start = bpy.props.IntProperty(name="Start Frame", default=1)
+    frame_end = bpy.props.IntProperty(name="End Frame", default=100)
+    repeat = bpy.props.IntProperty(name="Repeat", default=1, min=1, description="Plays every range this often and keeps the best time")
+    max_groups = bpy.props.IntProperty(name="Max Groups", default=50, min=1, description="Only the groups with the most drivers are profiled")
+    group_kinds = bpy.props.EnumProperty(name="Groups", items=PROFILE_GROUP_KINDS, options={'ENUM_FLAG'}, default={"OBJECT", "BONE", "PROPERTY_TYPE", "LIMIT"})
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) > 0
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return ExportHelper.invoke(self, context, event)
+
+    def execute(self, context):
+        return driver_profiler.execute_profile(self, context)
+
+class RBFPoseDriver(bpy.types.Operator):
+    """Creates a pose space driver that interpolates a property between example poses of the selected bones"""
+    bl_idname = "object.rbf_pose_driver"
+    bl_label = "RBF Pose Driver"
+    bl_description = "Records example poses of the selected bones and drives a property with a radial basis function of them"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    action = bpy.props.EnumProperty(name="Action", items=(("ADD_POSE", "Add Pose", "Store the current pose of the selected bones with the target value"),
+                                                          ("CREATE_DRIVER", "Create Driver", "Solve the setup and drive the property with it"),
+                                                          ("CLEAR", "Clear", "Remove all poses of the setup")))
+    setup_name = bpy.props.StringProperty(name="Setup", default="Corrective")
+    prop_data_path = bpy.props.StringProperty(name="Property Data Path", default="")
+    target_value = bpy.props.FloatProperty(name="Target Value", default=1.0, description="Property value of the current pose")
+    sigma = bpy.props.FloatProperty(name="Radius", default=0.0, min=0.0, description="Width of the interpolation kernel. 0 uses the mean distance between the poses")
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object != None and context.active_object.type == "ARMATURE" and context.active_pose_bone != None
+
+    def invoke(self, context, event):
+        if self.prop_data_path == "" and context.window_manager.clipboard != "":
+            self.prop_data_path = context.window_manager.clipboard
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.row().prop(self, "action", expand=True)
+        layout.prop(self, "setup_name")
+        if self.action == "ADD_POSE":
+            layout.prop(self, "target_value")
+        elif self.action == "CREATE_DRIVER":
+            layout.prop(self, "prop_data_path")
+            layout.prop(self, "sigma")
+
+    def execute(self, context):
+        return rbf_driver.execute_rbf(self, context)
+
+class ExportDriverConstraints(bpy.types.Operator, ExportHelper):
+    """Exports the driver constraints of the scene into a driver constraint file"""
+    bl_idname = "object.export_driver_constraints"
+    bl_label = "Export Driver Constraints"
+    bl_description = "Exports all drivers and Driver Limit constraints created by the Driver Constraint operator"
+
+    filename_ext = ".dcjson"
+    filter_glob = bpy.props.StringProperty(default="*.dcjson", options={'HIDDEN'})
+    selected_only = bpy.props.BoolProperty(name="Selected Only", default=False, description="Only export the drivers of the selected objects")
+
+    def execute(self, context):
+        return driver_io.execute_export(self, context)
+
+class ImportDriverConstraints(bpy.types.Operator, ImportHelper):
+    """Reapplies the driver constraints of a driver constraint file"""
+    bl_idname = "object.import_driver_constraints"
+    bl_label = "Import Driver Constraints"
+    bl_description = "Reapplies drivers and Driver Limit constraints of a driver constraint file onto objects with the same names"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".dcjson"
+    filter_glob = bpy.props.StringProperty(default="*.dcjson", options={'HIDDEN'})
+    only_update_changed = bpy.props.BoolProperty(name="Update Changed Only", default=True, description="Existing drivers are compared with the file and only the differing parts are updated")
+
+    def execute(self, context):
+        return driver_io.execute_import(self, context)
+
+class CreateDriverConstraintBatch(bpy.types.Operator, ImportHelper):
+    """Creates driver constraints and Action constraints for every row of a JSON lines or CSV spec file"""
+    bl_idname = "object.create_driver_constraint_batch"
+    bl_label = "Create Driver Constraints from Spec"
+    bl_description = "Creates driver constraints and Action constraints for every row of a JSON lines or CSV spec file"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".jsonl"
+    filter_glob = bpy.props.StringProperty(default="*.jsonl;*.json;*.csv", options={'HIDDEN'})
+    only_update_changed = bpy.props.BoolProperty(name="Update Changed Only", default=True, description="Existing drivers are compared with the spec and only the differing parts are updated, existing Action constraints of an action are reused")
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        return batch_driver.execute_batch(self, context)
+
+classes = (BakeDriverConstraints, LintDriverConstraints, ConvertScriptedDrivers, ProfileDriverConstraints,
+           RBFPoseDriver, ExportDriverConstraints, ImportDriverConstraints, CreateDriverConstraintBatch)
+
+def rbf_pose(setup_key, *inputs):
+    """Driver namespace function of the RBF drivers. Saved files call it on load, rbf_driver is imported then."""
+    return rbf_driver.rbf_pose(setup_key, *inputs)
+
+def get_loaded_module(name):
+    """Returns a deferred module if it has been imported already, None otherwise."""
+    return sys.modules.get(__package__ + "." + name)
+
+@persistent
+def rbf_reset_handler(dummy):
+    """Drops the solved RBF setups, undo and load replace the ID properties they were read from."""
+    module = get_loaded_module("rbf_driver")
+    if module != None:
+        module.clear_solved_setups()
+    bpy.app.driver_namespace[RBF_NAMESPACE_FUNCTION] = rbf_pose
+
+def register():
+    bpy.app.driver_namespace[RBF_NAMESPACE_FUNCTION] = rbf_pose
+    bpy.app.handlers.undo_post.append(rbf_reset_handler)
+    bpy.app.handlers.redo_post.append(rbf_reset_handler)
+    bpy.app.handlers.load_post.append(rbf_reset_handler)
+
+def unregister():
+    bpy.app.driver_namespace.pop(RBF_NAMESPACE_FUNCTION, None)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        if rbf_reset_handler in handlers:
+            handlers.remove(rbf_reset_handler)
@@ -0,0 +1,275 @@
+"""
+Applies a driver setup to many .blend files headlessly.
+
+    python tools/batch_runner.py --spec face_rig.jsonl --files variants/*.blend --workers 8 --save
+    python tools/batch_runner.py --spec face_rig.dcjson --file-list variants.txt --summary summary.json
+
+Every worker is a `blender -b` process that opens its files one after another, applies a driver
+spec (.jsonl/.csv, see batch_driver, with driver and action constraint rows) or a driver constraint
+file (.dcjson, see driver_io) and writes one result line per file. If Blender crashes on a file, the worker is restarted with the
+files it has not finished yet, and a worker that spends longer than --timeout on one file is killed
+and the file reported as timed out. The results and timings of all workers end up in one summary.
+
+With --standin the workers are plain Python processes that run against the bpy stand-in of the
+benchmarks and build a synthetic rig instead of opening the files, to test the orchestration
+without Blender.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import concurrent.futures
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+BENCHMARK_DIR = os.path.join(REPO_DIR, "benchmarks")
+
+
+### worker, runs inside Blender or against the stand-in
+
+def open_file(bpy, filepath, standin_size):
+    """Opens filepath and returns the context to work in."""
+    if standin_size > 0:
+        import synthetic
+        return synthetic.build_scene(bpy, standin_size)
+    bpy.ops.wm.open_mainfile(filepath=filepath)
+    return bpy.context
+
+
+def apply_setup(context, setup_path, incremental):
+    """Applies a driver spec or driver constraint file and returns the counts of the run."""
+    from driver_constraint_addon import data_cache, action_index
+    from driver_constraint_addon.batch_driver import create_drivers_from_spec, iter_spec_rows
+    from driver_constraint_addon.driver_io import import_driver_constraints
+    ### the caches are keyed on pointers, which a newly loaded file can reuse
+    data_cache.bump_generation()
+    action_index.invalidate_action()
+
+    if setup_path.lower().endswith(".dcjson"):
+        stats = import_driver_constraints(setup_path, incremental)
+        stats["failed_rows"] = [{"line": line, "message": message} for line, message in stats.pop("errors")[:20]]
+        return stats
+    stats = {}
+    results = create_drivers_from_spec(context, iter_spec_rows(setup_path), incremental, stats)
+    failed = [{"line": line, "data_path": data_path, "message": message} for line, data_path, ok, message in results if not ok]
+    stats["rows"] = len(results)
+    stats["failed"] = len(failed)
+    stats["failed_rows"] = failed[:20]
+    return stats
+
+
+def run_worker(args):
+    if args.standin_size > 0:
+        sys.path.insert(0, BENCHMARK_DIR)
+        import bpy_standin
+        bpy = bpy_standin.install()
+    else:
+        import bpy
+    sys.path.insert(0, REPO_DIR)
+    ### the driver map of the saved files is only updated while its scene property is registered
+    import driver_constraint_addon
+    if args.standin_size > 0:
+        driver_constraint_addon.driver_map.register()
+    else:
+        driver_constraint_addon.register()
+
+    with open(args.result, "a") as result_file:
+        for filepath in args.files:
+            result = {"file": filepath, "ok": False, "pid": os.getpid()}
+            start = time.perf_counter()
+            try:
+                context = open_file(bpy, filepath, args.standin_size)
+                result["load_seconds"] = time.perf_counter() - start
+                result["stats"] = apply_setup(context, args.setup, args.incremental)
+                if args.save and args.standin_size == 0:
+                    bpy.ops.wm.save_mainfile()
+                result["ok"] = result["stats"].get("failed", 0) == 0
+            except Exception as error:
+                result["error"] = "{}: {}".format(type(error).__name__, error)
+            result["seconds"] = time.perf_counter() - start
+            ### one line per file, so the results of finished files survive a crash
+            result_file.write(json.dumps(result) + "\n")
+            result_file.flush()
+    return 0
+
+
+### orchestration
+
+def read_results(result_path):
+    results = {}
+    if os.path.exists(result_path):
+        with open(result_path) as result_file:
+            for line in result_file:
+                if line.strip() != "":
+                    result = json.loads(line)
+                    results[result["file"]] = result
+    return results
+
+
+def worker_command(args, files, result_path):
+    script_args = ["--worker", "--setup", args.setup, "--result", result_path]
+    if args.incremental:
+        script_args.append("--incremental")
+    if args.save:
+        script_args.append("--save")
+    if args.standin:
+        return [sys.executable, os.path.abspath(__file__)] + script_args + ["--standin-size", str(args.standin_size)] + ["--"] + files
+    return [args.blender, "-b", "--factory-startup", "--python", os.path.abspath(__file__), "--"] + script_args + ["--"] + files
+
+
+def get_file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def run_worker_command(command, result_path, log_path, timeout):
+    """
+    Runs a worker process with its output in log_path. The process is killed if it hasn't written
+    a result line for timeout seconds. Returns (exit code, timed out), exit code is None if the
+    process could not be started.
+    """
+    with open(log_path, "w") as log_file:
+        try:
+            process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT)
+        except OSError as error:
+            log_file.write("{}: {}\n".format(type(error).__name__, error))
+            return None, False
+        result_size = get_file_size(result_path)
+        last_result = time.perf_counter()
+        while process.poll() == None:
+            time.sleep(0.05)
+            if timeout <= 0:
+                continue
+            size = get_file_size(result_path)
+            if size != result_size:
+                result_size, last_result = size, time.perf_counter()
+            elif time.perf_counter() - last_result > timeout:
+                process.kill()
+                process.wait()
+                return process.returncode, True
+    return process.returncode, False
+
+
+def get_last_line(path):
+    with open(path) as log_file:
+        lines = log_file.read().strip().splitlines()
+    return lines[-1] if len(lines) > 0 else ""
+
+
+def run_worker_process(args, worker_index, files):
+    """
+    Runs one worker process over files and returns their results. A file that made the process
+    exit without a result, or that took longer than the timeout, is reported as crashed or timed
+    out and the rest is handed to a new process.
+    """
+    result_path = os.path.join(args.work_dir, "worker_{:03d}.jsonl".format(worker_index))
+    log_path = os.path.join(args.work_dir, "worker_{:03d}.log".format(worker_index))
+    if os.path.exists(result_path):
+        os.remove(result_path)
+    remaining = list(files)
+    results = {}
+    while len(remaining) > 0:
+        start = time.perf_counter()
+        returncode, timed_out = run_worker_command(worker_command(args, remaining, result_path), result_path, log_path, args.timeout)
+        results.update(read_results(result_path))
+        finished = [filepath for filepath in remaining if filepath in results]
+        remaining = [filepath for filepath in remaining if filepath not in results]
+        if len(remaining) > 0:
+            failed = remaining.pop(0)
+            if timed_out:
+                error = "timed out after {:g}s".format(args.timeout)
+            elif returncode == None:
+                error = "worker could not be started: " + get_last_line(log_path)
+            else:
+                error = "worker exited with code {} after {} files: {}".format(returncode, len(finished), get_last_line(log_path))
+            results[failed] = {"file": failed, "ok": False, "seconds": time.perf_counter() - start, "error": error}
+    return [results[filepath] for filepath in files]
+
+
+def summarize(results, wall_seconds, workers):
+    seconds = [result["seconds"] for result in results]
+    return {"files": len(results),
+            "ok": len([result for result in results if result["ok"]]),
+            "failed": len([result for result in results if not result["ok"]]),
+            "workers": workers,
+            "wall_seconds": wall_seconds,
+            "file_seconds": sum(seconds),
+            "slowest": sorted(results, key=lambda result: -result["seconds"])[:5],
+            "results": results}
+
+
+def run_batch(args):
+    files = list(args.files)
+    if args.file_list:
+        with open(args.file_list) as file_list:
+            files.extend(line.strip() for line in file_list if line.strip() != "" and not line.startswith("#"))
+    if len(files) == 0:
+        print("No files given.")
+        return 1
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    workers = max(1, min(args.workers, len(files)))
+    start = time.perf_counter()
+    results = []
+    ### the threads only wait for their worker processes
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_worker_process, args, i, files[i::workers]) for i in range(workers)]
+        for future in futures:
+            results.extend(future.result())
+    summary = summarize(results, time.perf_counter() - start, workers)
+
+    for result in sorted(results, key=lambda result: result["file"]):
+        status = "ok" if result["ok"] else "FAILED"
+        stats = result.get("stats", {})
+        counts = ", ".join("{} {}".format(key, stats[key]) for key in ("created", "patched", "unchanged", "limits", "action_constraints", "failed") if key in stats)
+        print("{:<7} {:>8.2f}s  {}  {}".format(status, result["seconds"], result["file"], result.get("error", counts)))
+    print("{} files, {} failed, {:.2f}s wall time, {:.2f}s file time on {} workers".format(
+        summary["files"], summary["failed"], summary["wall_seconds"], summary["file_seconds"], workers))
+
+    if args.summary:
+        with open(args.summary, "w") as summary_file:
+            json.dump(summary, summary_file, indent=1, sort_keys=True)
+    return 0 if summary["failed"] == 0 else 1
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--setup", "--spec", dest="setup", required=True, help="driver spec (.jsonl/.csv) or driver constraint file (.dcjson)")
+    parser.add_argument("--files", nargs="*", default=[], help=".blend files to process")
+    parser.add_argument("--file-list", help="text file with one .blend path per line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable, defaults to $BLENDER")
+    parser.add_argument("--incremental", action="store_true", help="only update drivers that differ from the setup")
+    parser.add_argument("--save", action="store_true", help="save every file after the setup has been applied")
+    parser.add_argument("--summary", help="write the summary of all files as JSON")
+    parser.add_argument("--work-dir", default=os.path.join(os.getcwd(), ".batch_runner"), help="directory for the result files of the workers")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds a worker may spend on one file before it is killed, 0 waits forever")
+    parser.add_argument("--standin", action="store_true", help="run the workers against the bpy stand-in instead of Blender")
+    parser.add_argument("--standin-size", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args, rest = parser.parse_known_args(argv)
+    ### files of a worker come after a second "--"
+    if "--" in rest:
+        args.files = args.files + rest[rest.index("--") + 1:]
+    if args.standin and args.standin_size == 0:
+        args.standin_size = 100
+    return args
+
+
+def main(argv=None):
+    if argv == None:
+        argv = sys.argv[1:]
+        ### inside Blender the script arguments follow the first "--"
+        if "--" in argv and "--worker" not in argv[:argv.index("--")]:
+            argv = argv[argv.index("--") + 1:]
+    args = parse_args(argv)
+    if args.worker:
+        return run_worker(args)
+    return run_batch(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())